@@ -0,0 +1,5 @@
+"""Benchmarks for Blender Asset Tracer.
+
+Run them from the project root, for example with
+`python -m benchmarks.bench_load_blocks`.
+"""
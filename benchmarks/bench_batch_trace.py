@@ -0,0 +1,90 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Benchmark tracing many blend files that link the same libraries.
+
+Each synthetic shot file links a collection from each of the library files of
+bench_parallel_trace. The dependency graphs of the shots are built one by one
+with trace.dependency_graph(), and as one batch with batch.deps(). The blend file cache is cleared before each
+run.
+"""
+import argparse
+import pathlib
+import tempfile
+import typing
+
+from blender_asset_tracer import blendfile, trace
+from blender_asset_tracer.trace import batch
+from . import bench_parallel_trace, synthetic
+
+
+def trace_each(roots: typing.List[pathlib.Path]) -> typing.Callable[[], None]:
+    def run():
+        blendfile.close_all_cached()
+        for root in roots:
+            trace.dependency_graph(root)
+
+    return run
+
+
+def trace_batch(roots: typing.List[pathlib.Path]) -> typing.Callable[[], None]:
+    def run():
+        blendfile.close_all_cached()
+        for result in batch.deps(roots):
+            assert result.error is None
+
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shots", type=int, default=10)
+    parser.add_argument("--libs", type=int, default=4)
+    parser.add_argument("--objects", type=int, default=1000, help="per library")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    template = synthetic.Template()
+    builder = bench_parallel_trace.BlockBuilder(template)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmppath = pathlib.Path(tmpdir)
+        roots = []
+        for shot_index in range(args.shots):
+            root = tmppath / ("shot_%03d.blend" % shot_index)
+            template.write(root, bench_parallel_trace.root_blocks(builder, args.libs))
+            roots.append(root)
+        for lib_index in range(args.libs):
+            template.write(
+                tmppath / ("lib_%02d.blend" % lib_index),
+                bench_parallel_trace.library_blocks(builder, lib_index, args.objects),
+            )
+
+        print("%d shots, %d libraries" % (args.shots, args.libs))
+        benchmarks = [
+            ("dependency_graph() per shot", trace_each(roots)),
+            ("batch.deps()", trace_batch(roots)),
+        ]
+        for name, run in benchmarks:
+            duration = synthetic.timeit(run, args.repeat)
+            print("    %-30s %8.0f ms" % (name, duration * 1000))
+        blendfile.close_all_cached()
+
+
+if __name__ == "__main__":
+    main()
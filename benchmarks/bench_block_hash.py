@@ -0,0 +1,121 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Benchmark pointer-independent hashing of blocks.
+
+Uses a synthetic blend file with Object blocks, like bench_field_access.py.
+
+- "items_recursive + adler32" is how BlendFileBlock.hash() used to work:
+  converting every non-pointer field to a string, and hashing those.
+- "BlendFileBlock.hash()" zeroes the pointers with a mask per DNA struct, and
+  hashes the result with BLAKE2.
+- "block_hash.file_digest()" hashes the entire file that way.
+"""
+import argparse
+import pathlib
+import tempfile
+import typing
+import zlib
+
+from blender_asset_tracer import blendfile
+from blender_asset_tracer.blendfile import block_hash
+from . import bench_field_access, synthetic
+
+
+def items_recursive_hash(block: blendfile.BlendFileBlock) -> int:
+    dna_type = block.dna_type
+    pointer_size = block.bfile.header.pointer_size
+
+    hsh = 1
+    for path, value in block.items_recursive():
+        field, _ = dna_type.field_from_path(pointer_size, path)
+        if field.name.is_pointer:
+            continue
+        hsh = zlib.adler32(str(value).encode(), hsh)
+    return hsh
+
+
+def hash_blocks(
+    blocks: typing.List[blendfile.BlendFileBlock], hash_func: typing.Callable
+) -> typing.Callable[[], None]:
+    def run():
+        for block in blocks:
+            hash_func(block)
+
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=20_000)
+    parser.add_argument(
+        "--slow-blocks",
+        type=int,
+        default=200,
+        help="Number of blocks to hash the old way; its time is extrapolated "
+        "to --blocks",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--no-mmap", action="store_true", help="Read without memory-mapping"
+    )
+    args = parser.parse_args()
+
+    blendfile.BlendFile.use_mmap = not args.no_mmap
+
+    template = synthetic.Template()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = pathlib.Path(tmpdir) / "objects.blend"
+        template.write(path, bench_field_access.object_blocks(template, args.blocks))
+
+        with blendfile.BlendFile(path) as bfile:
+            blocks = list(bfile.code_index[b"OB"])
+            print(
+                "%d objects of %d bytes, %s"
+                % (
+                    len(blocks),
+                    blocks[0].size,
+                    "mmap" if bfile.is_mmapped else "pread",
+                )
+            )
+
+            slow_blocks = blocks[: args.slow_blocks]
+            duration = synthetic.timeit(
+                hash_blocks(slow_blocks, items_recursive_hash), args.repeat
+            )
+            duration *= len(blocks) / len(slow_blocks)
+            print(
+                "    %-26s %10.1f ms (extrapolated)"
+                % ("items_recursive + adler32", duration * 1000)
+            )
+
+            benchmarks = [
+                (
+                    "BlendFileBlock.hash()",
+                    hash_blocks(blocks, blendfile.BlendFileBlock.hash),
+                ),
+                ("block_hash.file_digest()", lambda: block_hash.file_digest(bfile)),
+            ]
+            for name, func in benchmarks:
+                duration = synthetic.timeit(func, args.repeat)
+                print("    %-26s %10.1f ms" % (name, duration * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Benchmark the queue of blocks used by file2blocks.BlockIterator.
+
+The synthetic blend file contains a collection of objects, each using a cache
+file, like the libraries of bench_parallel_trace. All blocks of the file are
+visited with iter_blocks(), which queues them in disk order, and queues them
+again when they are referenced.
+
+- "PriorityQueue" is how BAT used to queue blocks: a locking
+  queue.PriorityQueue of (Path, file offset, block) tuples, skipping blocks
+  that were already visited when they are taken from the queue.
+- "per-file heaps" is the current file2blocks.BlockQueue.
+"""
+import argparse
+import collections
+import pathlib
+import queue
+import tempfile
+import typing
+
+from blender_asset_tracer import blendfile, bpathlib
+from blender_asset_tracer.trace import file2blocks
+from . import bench_parallel_trace, synthetic
+
+
+class PriorityBlockQueue(queue.PriorityQueue):
+    """PriorityQueue that sorts by filepath and file offset, like BAT used to."""
+
+    def _put(self, item):
+        super()._put((item.bfile.filepath, item.file_offset, item))
+
+    def _get(self):
+        _, _, item = super()._get()
+        return item
+
+
+class PriorityQueueBlockIterator(file2blocks.BlockIterator):
+    """BlockIterator that queues and skips blocks like BAT used to."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.to_visit = PriorityBlockQueue()
+
+    def _queue(self, bpath, block):
+        self.to_visit.put(block)
+
+    def _visit_blocks(self, bfile, bpath):
+        root_dir = bpathlib.BlendPath(bpath.parent)
+        blocks_per_lib = collections.defaultdict(set)
+
+        while not self.to_visit.empty():
+            block = self.to_visit.get()
+            if (bpath, block.addr_old) in self.blocks_yielded:
+                continue
+
+            if block.code == b"ID":
+                lib = block.get_pointer(b"lib")
+                lib_bpath = bpathlib.BlendPath(lib[b"name"]).absolute(root_dir)
+                blocks_per_lib[lib_bpath].add(block)
+                self.to_visit.put(lib)
+                continue
+
+            self._queue_dependencies(bpath, block)
+            self.blocks_yielded.add((bpath, block.addr_old))
+            yield block
+
+        return blocks_per_lib
+
+
+def iter_blocks(
+    cls: typing.Type[file2blocks.BlockIterator], path: pathlib.Path
+) -> typing.Callable[[], None]:
+    def run():
+        bfile = blendfile.open_cached(path)
+        for _ in cls().iter_blocks(bfile):
+            pass
+
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--objects", type=int, default=66_666, help="3 blocks each")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    template = synthetic.Template()
+    builder = bench_parallel_trace.BlockBuilder(template)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = pathlib.Path(tmpdir) / "objects.blend"
+        template.write(
+            path, bench_parallel_trace.library_blocks(builder, 0, args.objects)
+        )
+        bfile = blendfile.open_cached(path)
+        print("%d blocks" % len(bfile.blocks))
+
+        benchmarks = [
+            ("PriorityQueue (before)", PriorityQueueBlockIterator),
+            ("per-file heaps", file2blocks.BlockIterator),
+        ]
+        for name, cls in benchmarks:
+            duration = synthetic.timeit(iter_blocks(cls, path), args.repeat)
+            print("    %-25s %8.0f ms" % (name, duration * 1000))
+        blendfile.close_all_cached()
+
+
+if __name__ == "__main__":
+    main()
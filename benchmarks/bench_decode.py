@@ -0,0 +1,96 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Benchmark decoding all fields of blocks.
+
+Uses a synthetic blend file with Object blocks, like bench_field_access.py.
+
+- "get_recursive_iter" is how BlendFileBlock.items_recursive() used to work:
+  calling get() for each field, and recursing into nested structs when get()
+  raises NoReaderImplemented.
+- "decode" uses a StructDecoder from the record module, which decodes all
+  fields of a block with a single struct.unpack_from() call.
+"""
+import argparse
+import pathlib
+import tempfile
+import typing
+
+from blender_asset_tracer import blendfile
+from . import bench_field_access, synthetic
+
+
+def get_recursive_iter(block: blendfile.BlendFileBlock) -> typing.List:
+    items = []
+    for key in block.keys():
+        items.extend(block.get_recursive_iter(key, as_str=False))
+    return items
+
+
+def decode_blocks(
+    blocks: typing.List[blendfile.BlendFileBlock], decode_func: typing.Callable
+) -> typing.Callable[[], None]:
+    def run():
+        for block in blocks:
+            decode_func(block)
+
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--no-mmap", action="store_true", help="Read without memory-mapping"
+    )
+    args = parser.parse_args()
+
+    blendfile.BlendFile.use_mmap = not args.no_mmap
+
+    template = synthetic.Template()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = pathlib.Path(tmpdir) / "objects.blend"
+        template.write(path, bench_field_access.object_blocks(template, args.blocks))
+
+        with blendfile.BlendFile(path) as bfile:
+            blocks = list(bfile.code_index[b"OB"])
+            print(
+                "%d objects with %d fields each, %s"
+                % (
+                    len(blocks),
+                    len(blocks[0].decode()),
+                    "mmap" if bfile.is_mmapped else "pread",
+                )
+            )
+
+            benchmarks = [
+                ("get_recursive_iter", get_recursive_iter),
+                ("decode", blendfile.BlendFileBlock.decode),
+            ]
+            for name, func in benchmarks:
+                duration = synthetic.timeit(decode_blocks(blocks, func), args.repeat)
+                print(
+                    "    %-20s %8.1f ms  %6.1f µs/block"
+                    % (name, duration * 1000, duration * 1e6 / len(blocks))
+                )
+
+
+if __name__ == "__main__":
+    main()
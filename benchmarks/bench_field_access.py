@@ -0,0 +1,198 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Microbenchmarks for reading fields of blocks.
+
+Uses a synthetic blend file with Object blocks that are linked together via
+their `id.next` pointers, and measures BlendFileBlock.get(), get_pointer(),
+get_many() and iterators.listbase() on all of them. The "pointers"
+benchmarks read an array of 18 pointers from each block, like the `mtex[18]`
+arrays of older blend files, pointer by pointer and all at once.
+"""
+import argparse
+import pathlib
+import tempfile
+import typing
+
+from blender_asset_tracer import blendfile
+from blender_asset_tracer.blendfile import iterators
+from . import synthetic
+
+BASE_ADDRESS = 0x10000
+ADDRESS_STEP = 0x1000
+
+
+def object_blocks(
+    template: synthetic.Template, num_blocks: int
+) -> typing.Iterator[synthetic.SyntheticBlock]:
+    """Generator, yield Object blocks forming a linked list."""
+    ob_struct = template.struct(b"Object")
+    sdna_index = template.sdna_index_from_id[b"Object"]
+    pointer_size = template.pointer_size
+    endian = template.endian
+    _, next_offset = ob_struct.field_from_path(pointer_size, (b"id", b"next"))
+    _, name_offset = ob_struct.field_from_path(pointer_size, (b"id", b"name"))
+    pointer_struct = endian.ULONG if pointer_size == 8 else endian.UINT
+
+    for index in range(num_blocks):
+        addr = BASE_ADDRESS + index * ADDRESS_STEP
+        next_addr = addr + ADDRESS_STEP if index < num_blocks - 1 else 0
+
+        payload = bytearray(ob_struct.size)
+        pointer_struct.pack_into(payload, next_offset, next_addr)
+        name = b"OBObject.%06d" % index
+        payload[name_offset : name_offset + len(name)] = name
+        yield b"OB", addr, sdna_index, 1, bytes(payload)
+
+
+def bench_get(bfile: blendfile.BlendFile, path, **kwargs) -> typing.Callable:
+    blocks = list(bfile.code_index[b"OB"])
+
+    def run():
+        for block in blocks:
+            block.get(path, **kwargs)
+
+    return run
+
+
+# Fields read by the Object expander in trace/expanders.py.
+OBJECT_FIELDS = (
+    b"transflag",
+    b"data",
+    b"proxy",
+    b"proxy_group",
+    b"pose",
+    (b"particlesystem", b"first"),
+)
+
+
+def bench_get_separately(bfile: blendfile.BlendFile) -> typing.Callable:
+    blocks = list(bfile.code_index[b"OB"])
+
+    def run():
+        for block in blocks:
+            for path in OBJECT_FIELDS:
+                block.get(path)
+
+    return run
+
+
+def bench_get_many(bfile: blendfile.BlendFile) -> typing.Callable:
+    blocks = list(bfile.code_index[b"OB"])
+
+    def run():
+        for block in blocks:
+            block.get_many(OBJECT_FIELDS)
+
+    return run
+
+
+def bench_get_pointer(bfile: blendfile.BlendFile) -> typing.Callable:
+    blocks = list(bfile.code_index[b"OB"])
+
+    def run():
+        for block in blocks:
+            block.get_pointer((b"id", b"next"))
+
+    return run
+
+
+def bench_pointer_loop(bfile: blendfile.BlendFile, count: int) -> typing.Callable:
+    offsets = [block.file_offset for block in bfile.code_index[b"OB"]]
+    pointer_size = bfile.header.pointer_size
+
+    def run():
+        for offset in offsets:
+            for index in range(count):
+                bfile.read_pointer_at(offset + index * pointer_size)
+
+    return run
+
+
+def bench_pointer_array(bfile: blendfile.BlendFile, count: int) -> typing.Callable:
+    offsets = [block.file_offset for block in bfile.code_index[b"OB"]]
+
+    def run():
+        for offset in offsets:
+            for _ in bfile.read_pointers_at(offset, count):
+                pass
+
+    return run
+
+
+def bench_listbase(bfile: blendfile.BlendFile) -> typing.Callable:
+    first = bfile.block_from_addr[BASE_ADDRESS]
+
+    def run():
+        for _ in iterators.listbase(first, next_path=(b"id", b"next")):
+            pass
+
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--no-mmap", action="store_true", help="Read without memory-mapping"
+    )
+    args = parser.parse_args()
+
+    blendfile.BlendFile.use_mmap = not args.no_mmap
+
+    template = synthetic.Template()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = pathlib.Path(tmpdir) / "objects.blend"
+        template.write(path, object_blocks(template, args.blocks))
+
+        with blendfile.BlendFile(path) as bfile:
+            # Keep the blocks alive, to measure field access and not the
+            # creation of BlendFileBlock objects.
+            all_blocks = list(bfile.blocks)
+
+            benchmarks = [
+                ("get id.name", bench_get(bfile, (b"id", b"name"), as_str=True)),
+                ("get type", bench_get(bfile, b"type")),
+                ("get loc", bench_get(bfile, b"loc")),
+                ("get loc[2]", bench_get(bfile, (b"loc", 2))),
+                ("get missing", bench_get(bfile, b"missing", default=None)),
+                ("get 6 fields", bench_get_separately(bfile)),
+                ("get_many 6", bench_get_many(bfile)),
+                ("get_pointer", bench_get_pointer(bfile)),
+                ("18 pointers", bench_pointer_loop(bfile, 18)),
+                ("18 at once", bench_pointer_array(bfile, 18)),
+                ("listbase", bench_listbase(bfile)),
+            ]
+
+            print(
+                "%d blocks, %s"
+                % (args.blocks, "mmap" if bfile.is_mmapped else "pread")
+            )
+            for name, func in benchmarks:
+                duration = synthetic.timeit(func, args.repeat)
+                print(
+                    "    %-12s %8.2f ms  %6.0f ns/block"
+                    % (name, duration * 1000, duration * 1e9 / args.blocks)
+                )
+            del all_blocks
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Benchmark finding ID blocks by name, like when expanding linked IDs.
+
+Uses a synthetic blend file with Object blocks, like bench_field_access.py.
+
+- "scan per name" is how file2blocks used to find each linked ID: looping
+  over all blocks with the same code, reading their ID names.
+- "find_blocks_from_id_name" reads all ID names once to build an index, and
+  then looks up each name in that index. The time includes building the
+  index.
+"""
+import argparse
+import pathlib
+import random
+import tempfile
+import typing
+
+from blender_asset_tracer import blendfile
+from . import bench_field_access, synthetic
+
+
+def scan_per_name(
+    bfile: blendfile.BlendFile, names: typing.List[bytes]
+) -> typing.Callable[[], int]:
+    def run():
+        found = 0
+        for name in names:
+            for block in bfile.find_blocks_from_code(name[:2]):
+                if block.id_name == name:
+                    found += 1
+        return found
+
+    return run
+
+
+def index_lookup(
+    bfile: blendfile.BlendFile, names: typing.List[bytes]
+) -> typing.Callable[[], int]:
+    def run():
+        # Start without index, as every library is opened only once.
+        bfile._id_name_index = None
+        found = 0
+        for name in names:
+            found += len(bfile.find_blocks_from_id_name(name[:2], name))
+        return found
+
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=20_000)
+    parser.add_argument("--names", type=int, default=5_000)
+    parser.add_argument(
+        "--scan-names",
+        type=int,
+        default=50,
+        help="Number of names to find with the slow scan; its time is "
+        "extrapolated to --names",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--no-mmap", action="store_true", help="Read without memory-mapping"
+    )
+    args = parser.parse_args()
+
+    blendfile.BlendFile.use_mmap = not args.no_mmap
+
+    template = synthetic.Template()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = pathlib.Path(tmpdir) / "objects.blend"
+        template.write(path, bench_field_access.object_blocks(template, args.blocks))
+
+        rng = random.Random(47)
+        names = [
+            b"OBObject.%06d" % index
+            for index in rng.sample(range(args.blocks), args.names)
+        ]
+
+        with blendfile.BlendFile(path) as bfile:
+            print(
+                "%d objects, finding %d names, %s"
+                % (args.blocks, args.names, "mmap" if bfile.is_mmapped else "pread")
+            )
+
+            scan_names = names[: args.scan_names]
+            duration = synthetic.timeit(scan_per_name(bfile, scan_names), args.repeat)
+            duration *= len(names) / len(scan_names)
+            print(
+                "    %-26s %10.1f ms (extrapolated)"
+                % ("scan per name", duration * 1000)
+            )
+
+            duration = synthetic.timeit(index_lookup(bfile, names), args.repeat)
+            print("    %-26s %10.1f ms" % ("find_blocks_from_id_name", duration * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Benchmark tracing unchanged libraries with the library cache.
+
+Uses the synthetic files of bench_parallel_trace. "cold" stores the trace
+results of the libraries, "warm" reuses them without opening the libraries.
+The blend file cache is cleared before each run.
+"""
+import argparse
+import pathlib
+import tempfile
+
+from blender_asset_tracer import blendfile, trace
+from blender_asset_tracer.trace import library_cache
+from . import bench_parallel_trace, synthetic
+
+
+def trace_cold(root: pathlib.Path, cache_root: pathlib.Path):
+    def run():
+        library_cache.set_disk_cache(cache_root)
+        library_cache.clear()
+        bench_parallel_trace.trace_deps(root, jobs=1)()
+
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--libs", type=int, default=8)
+    parser.add_argument("--objects", type=int, default=2000, help="per library")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    template = synthetic.Template()
+    builder = bench_parallel_trace.BlockBuilder(template)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmppath = pathlib.Path(tmpdir)
+        root = tmppath / "root.blend"
+        template.write(root, bench_parallel_trace.root_blocks(builder, args.libs))
+        for lib_index in range(args.libs):
+            template.write(
+                tmppath / ("lib_%02d.blend" % lib_index),
+                bench_parallel_trace.library_blocks(builder, lib_index, args.objects),
+            )
+        cache_root = tmppath / "trace-results"
+        trace_deps = bench_parallel_trace.trace_deps(root, jobs=1)
+
+        num_usages = sum(1 for _ in trace.deps(root))
+        print("%d libraries, %d usages" % (args.libs, num_usages))
+
+        library_cache.set_disk_cache(None)
+        duration = synthetic.timeit(trace_deps, args.repeat)
+        print("    %-12s %8.0f ms" % ("no cache", duration * 1000))
+
+        duration = synthetic.timeit(trace_cold(root, cache_root), args.repeat)
+        print("    %-12s %8.0f ms" % ("cold cache", duration * 1000))
+
+        duration = synthetic.timeit(trace_deps, args.repeat)
+        print("    %-12s %8.0f ms" % ("warm cache", duration * 1000))
+
+        library_cache.set_disk_cache(None)
+        blendfile.close_all_cached()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Benchmark walking a long ListBase.
+
+Uses a synthetic blend file with Object blocks that are linked together via
+their `id.next` pointers, like bench_field_access.py but with a longer list.
+
+- "per-element get()" is how iterators.listbase() used to walk the list:
+  reading the `next` pointer with `block[next_path]`, which resolves the
+  field path for every element.
+- "iterators.listbase" looks up the offset of the `next` pointer once, and
+  reads the pointer directly from the file.
+"""
+import argparse
+import pathlib
+import tempfile
+import typing
+
+from blender_asset_tracer import blendfile
+from blender_asset_tracer.blendfile import iterators
+from . import bench_field_access, synthetic
+
+NEXT_PATH = (b"id", b"next")
+
+
+def listbase_with_get(
+    block: typing.Optional[blendfile.BlendFileBlock],
+) -> typing.Iterator[blendfile.BlendFileBlock]:
+    while block:
+        yield block
+        next_ptr = block[NEXT_PATH]
+        if next_ptr == 0:
+            break
+        block = block.bfile.dereference_pointer(next_ptr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--no-mmap", action="store_true", help="Read without memory-mapping"
+    )
+    args = parser.parse_args()
+
+    blendfile.BlendFile.use_mmap = not args.no_mmap
+
+    template = synthetic.Template()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = pathlib.Path(tmpdir) / "objects.blend"
+        template.write(path, bench_field_access.object_blocks(template, args.blocks))
+
+        with blendfile.BlendFile(path) as bfile:
+            # Keep the blocks alive, to measure the walk and not the creation
+            # of BlendFileBlock objects.
+            all_blocks = list(bfile.blocks)
+            first = bfile.block_from_addr[bench_field_access.BASE_ADDRESS]
+
+            benchmarks = [
+                ("per-element get()", lambda: sum(1 for _ in listbase_with_get(first))),
+                (
+                    "iterators.listbase",
+                    lambda: sum(1 for _ in iterators.listbase(first, NEXT_PATH)),
+                ),
+            ]
+
+            print(
+                "%d list elements, %s"
+                % (args.blocks, "mmap" if bfile.is_mmapped else "pread")
+            )
+            for name, func in benchmarks:
+                duration = synthetic.timeit(func, args.repeat)
+                print(
+                    "    %-20s %8.2f ms  %6.0f ns/element"
+                    % (name, duration * 1000, duration * 1e9 / args.blocks)
+                )
+            del all_blocks
+
+
+if __name__ == "__main__":
+    main()
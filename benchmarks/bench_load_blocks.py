@@ -0,0 +1,130 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Benchmark opening blend files, comparing block-header scanners.
+
+- "per-block" reads each block header with its own read() call and then
+  seeks past the block data, as BAT did before the bulk scanner existed.
+- "buffered" uses the bulk scanner with read-ahead windows.
+- "mmap" uses the bulk scanner on the memory-mapped file.
+- "indexed" loads the block table from the block index, see the
+  blendfile.block_index module.
+"""
+import argparse
+import os
+import pathlib
+import tempfile
+import typing
+
+from blender_asset_tracer import blendfile
+from blender_asset_tracer.blendfile import block_index
+from . import synthetic
+
+BLENDFILES = pathlib.Path(__file__).parent.parent / "tests/blendfiles"
+
+
+class PerBlockBlendFile(blendfile.BlendFile):
+    """BlendFile that reads one block header at a time."""
+
+    use_mmap = False
+
+    def iter_block_headers(self) -> typing.Iterator[blendfile.BlockHeader]:
+        fileobj = self.fileobj
+        header_struct = self.block_header_struct
+        read_data0 = self.header.endian.read_data0
+        offset = self.header.structure.size
+
+        while True:
+            fileobj.seek(offset, os.SEEK_SET)
+            data = fileobj.read(header_struct.size)
+            if len(data) != header_struct.size:
+                return
+            code, size, addr_old, sdna_index, count = header_struct.unpack(data)
+            code = read_data0(code)
+            if code == b"ENDB":
+                return
+            offset += header_struct.size
+            yield code, size, addr_old, sdna_index, count, offset
+            offset += size
+
+
+class BufferedBlendFile(blendfile.BlendFile):
+    use_mmap = False
+
+
+def open_and_close(cls: typing.Type[blendfile.BlendFile], path: pathlib.Path):
+    def run():
+        cls(path).close()
+
+    return run
+
+
+def benchmark(path: pathlib.Path, repeat: int) -> None:
+    with blendfile.BlendFile(path) as bfile:
+        num_blocks = len(bfile.blocks)
+
+    timings = [
+        (name, synthetic.timeit(open_and_close(cls, path), repeat))
+        for name, cls in (
+            ("per-block", PerBlockBlendFile),
+            ("buffered", BufferedBlendFile),
+            ("mmap", blendfile.BlendFile),
+        )
+    ]
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        block_index.set_disk_cache(pathlib.Path(index_dir))
+        try:
+            # Open once to write the index.
+            blendfile.BlendFile(path).close()
+            run = open_and_close(blendfile.BlendFile, path)
+            timings.append(("indexed", synthetic.timeit(run, repeat)))
+        finally:
+            block_index.set_disk_cache(None)
+
+    baseline = timings[0][1]
+    print("%s (%d blocks)" % (path.name, num_blocks))
+    for name, duration in timings:
+        print(
+            "    %-10s %8.2f ms  %5.2fx"
+            % (name, duration * 1000, baseline / duration if duration else 0)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for path in sorted(BLENDFILES.glob("*.blend")):
+        try:
+            benchmark(path, args.repeat)
+        except (blendfile.exceptions.BlendFileError, OSError) as ex:
+            print("%s: skipped, %s" % (path.name, ex))
+
+    template = synthetic.Template()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = pathlib.Path(tmpdir) / "synthetic.blend"
+        template.write(path, synthetic.data_blocks(args.blocks))
+        benchmark(path, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Benchmark reading an array of structs from a DATA block.
+
+Uses a synthetic blend file with a single DATA block of MVert structs, and
+computes the bounding box of the vertex coordinates.
+
+- "get() per element" reads the coordinates of each vertex like
+  BlendFileBlock.get() does, which is how this had to be done before.
+- "decode_all()" decodes all structs with the record module.
+- "numpy_views" uses a structured NumPy array over the memory-mapped file.
+  This requires NumPy.
+"""
+import argparse
+import pathlib
+import random
+import tempfile
+
+from blender_asset_tracer import blendfile
+from blender_asset_tracer.blendfile import numpy_views
+from . import synthetic
+
+
+def mvert_block(template: synthetic.Template, count: int) -> synthetic.SyntheticBlock:
+    mvert = template.struct(b"MVert")
+    _, co_offset = mvert.field_from_path(template.pointer_size, b"co")
+    float_struct = template.endian.FLOAT
+
+    rng = random.Random(47)
+    payload = bytearray(mvert.size * count)
+    for index in range(count):
+        for axis in range(3):
+            offset = index * mvert.size + co_offset + axis * float_struct.size
+            float_struct.pack_into(payload, offset, rng.uniform(-10.0, 10.0))
+    sdna_index = template.sdna_index_from_id[b"MVert"]
+    return b"DATA", 0x10000, sdna_index, count, bytes(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--verts", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    template = synthetic.Template()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = pathlib.Path(tmpdir) / "mesh.blend"
+        template.write(path, [mvert_block(template, args.verts)])
+
+        with blendfile.BlendFile(path) as bfile:
+            block = bfile.code_index[b"DATA"][0]
+            stride = block.dna_type.size
+
+            def get_per_element():
+                # get() only reads the first struct of a block, so read the
+                # field of each struct the way get() does it.
+                dna_struct = block.dna_type
+                coords = [
+                    dna_struct.field_get_from_buffer(
+                        bfile.header, bfile._view, block.file_offset + i * stride, b"co"
+                    )[1]
+                    for i in range(block.count)
+                ]
+                return [min(c[axis] for c in coords) for axis in range(3)]
+
+            def decode_all():
+                coords = [values[b"co"] for values in block.decode_all()]
+                return [min(c[axis] for c in coords) for axis in range(3)]
+
+            def numpy_array():
+                return numpy_views.block_array(block)["co"].min(axis=0)
+
+            benchmarks = [
+                ("get() per element", get_per_element),
+                ("decode_all()", decode_all),
+            ]
+            if numpy_views.has_numpy:
+                benchmarks.append(("numpy_views", numpy_array))
+
+            print("%d vertices" % block.count)
+            for name, func in benchmarks:
+                duration = synthetic.timeit(func, args.repeat)
+                print("    %-20s %8.1f ms" % (name, duration * 1000))
+
+
+if __name__ == "__main__":
+    main()
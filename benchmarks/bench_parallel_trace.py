@@ -0,0 +1,166 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Benchmark tracing linked libraries serially and in parallel.
+
+The synthetic root file links a collection from each of a number of library
+files. Each collection contains many objects, and each object uses a cache
+file, so that every library has many blocks to expand and many assets to
+report. The blend file cache is cleared before each run.
+"""
+import argparse
+import os
+import pathlib
+import tempfile
+import typing
+
+from blender_asset_tracer import blendfile, trace
+from . import synthetic
+
+BASE_ADDRESS = 0x10000
+ADDRESS_STEP = 0x1000
+
+
+class BlockBuilder:
+    """Construct synthetic blocks of a DNA struct, with some fields set."""
+
+    def __init__(self, template: synthetic.Template) -> None:
+        self.template = template
+        endian = template.endian
+        self.pointer_struct = endian.ULONG if template.pointer_size == 8 else endian.UINT
+
+    def block(
+        self, code: bytes, dna_type_id: bytes, addr: int, **fields
+    ) -> synthetic.SyntheticBlock:
+        """Return the block, with fields given as `field__subfield=value`.
+
+        Integer values are written as pointers, bytes are copied.
+        """
+        template = self.template
+        struct = template.struct(dna_type_id)
+        payload = bytearray(struct.size)
+        for name, value in fields.items():
+            path = tuple(part.encode() for part in name.split("__"))
+            _, offset = struct.field_from_path(template.pointer_size, path)
+            if isinstance(value, int):
+                self.pointer_struct.pack_into(payload, offset, value)
+            else:
+                payload[offset : offset + len(value)] = value
+        sdna_index = template.sdna_index_from_id[dna_type_id]
+        return code, addr, sdna_index, 1, bytes(payload)
+
+
+def library_blocks(
+    builder: BlockBuilder, lib_index: int, num_objects: int
+) -> typing.Iterator[synthetic.SyntheticBlock]:
+    """Generator, yield a collection of objects that each use a cache file."""
+    addr = iter(range(BASE_ADDRESS, 2**40, ADDRESS_STEP))
+    group_addr = next(addr)
+    items = [(next(addr), next(addr), next(addr)) for _ in range(num_objects)]
+
+    yield builder.block(
+        b"GR",
+        b"Group",
+        group_addr,
+        id__name=b"GRCollection",
+        gobject__first=items[0][0],
+        gobject__last=items[-1][0],
+    )
+    for index, (item_addr, ob_addr, cache_addr) in enumerate(items):
+        next_addr = items[index + 1][0] if index < num_objects - 1 else 0
+        yield builder.block(
+            b"DATA", b"GroupObject", item_addr, next=next_addr, ob=ob_addr
+        )
+        yield builder.block(
+            b"OB",
+            b"Object",
+            ob_addr,
+            id__name=b"OBObject.%06d" % index,
+            data=cache_addr,
+        )
+        yield builder.block(
+            b"CF",
+            b"CacheFile",
+            cache_addr,
+            id__name=b"CFCache.%06d" % index,
+            filepath=b"//cache/lib_%02d_%06d.abc" % (lib_index, index),
+        )
+
+
+def root_blocks(
+    builder: BlockBuilder, num_libs: int
+) -> typing.Iterator[synthetic.SyntheticBlock]:
+    """Generator, yield a linked-in collection from each library."""
+    addr = iter(range(BASE_ADDRESS, 2**40, ADDRESS_STEP))
+    for lib_index in range(num_libs):
+        lib_addr = next(addr)
+        yield builder.block(
+            b"LI",
+            b"Library",
+            lib_addr,
+            id__name=b"LIlib_%02d.blend" % lib_index,
+            name=b"//lib_%02d.blend" % lib_index,
+        )
+        yield builder.block(
+            b"ID", b"ID", next(addr), name=b"GRCollection", lib=lib_addr
+        )
+
+
+def trace_deps(root: pathlib.Path, jobs: int) -> typing.Callable[[], None]:
+    def run():
+        blendfile.close_all_cached()
+        for _ in trace.deps(root, jobs=jobs):
+            pass
+
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--libs", type=int, default=8)
+    parser.add_argument("--objects", type=int, default=2000, help="per library")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    template = synthetic.Template()
+    builder = BlockBuilder(template)
+    num_cpus = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmppath = pathlib.Path(tmpdir)
+        root = tmppath / "root.blend"
+        template.write(root, root_blocks(builder, args.libs))
+        for lib_index in range(args.libs):
+            template.write(
+                tmppath / ("lib_%02d.blend" % lib_index),
+                library_blocks(builder, lib_index, args.objects),
+            )
+
+        num_usages = sum(1 for _ in trace.deps(root))
+        print(
+            "%d libraries, %d usages, %d CPUs" % (args.libs, num_usages, num_cpus)
+        )
+
+        for jobs in sorted({1, 2, num_cpus}):
+            duration = synthetic.timeit(trace_deps(root, jobs), args.repeat)
+            print("    %2d jobs %8.0f ms" % (jobs, duration * 1000))
+        blendfile.close_all_cached()
+
+
+if __name__ == "__main__":
+    main()
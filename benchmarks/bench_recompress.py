@@ -0,0 +1,114 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Benchmark rewriting modified compressed blend files.
+
+Each run opens a compressed copy of a synthetic blend file for writing, marks
+it as modified, and closes it, which compresses it again.
+
+- "gzip" is how BAT used to recompress every file, regardless of how the
+  file was compressed originally.
+- "zstd N threads" keeps Zstandard compression, compressing with N threads.
+"""
+import argparse
+import gzip
+import os
+import pathlib
+import random
+import shutil
+import tempfile
+import typing
+
+from blender_asset_tracer import blendfile
+from blender_asset_tracer.blendfile import magic_compression
+from . import synthetic
+
+
+class GZipRecompressBlendFile(blendfile.BlendFile):
+    """BlendFile that always recompresses with gzip, like BAT used to."""
+
+    def _open_file(self, path: pathlib.Path, mode: str) -> typing.IO[bytes]:
+        fileobj = super()._open_file(path, mode)
+        self.compression = magic_compression.Compression.GZIP
+        return fileobj
+
+
+def blocks(num_blocks: int) -> typing.Iterator[synthetic.SyntheticBlock]:
+    """Generator, yield DATA blocks that are partially compressible."""
+    rng = random.Random(47)
+    for index in range(num_blocks):
+        payload = rng.getrandbits(2048).to_bytes(256, "little") * 4 + bytes(3072)
+        yield b"DATA", 0x10000 + index * 0x1000, 0, 1, payload
+
+
+def rewrite(
+    cls: typing.Type[blendfile.BlendFile], source: pathlib.Path, work: pathlib.Path
+) -> typing.Callable[[], None]:
+    def run():
+        shutil.copyfile(str(source), str(work))
+        bfile = cls(work, mode="rb+")
+        bfile.mark_modified()
+        bfile.close()
+
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=50_000, help="4 KiB each")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    template = synthetic.Template()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmppath = pathlib.Path(tmpdir)
+        raw = tmppath / "raw.blend"
+        template.write(raw, blocks(args.blocks))
+
+        zstd_source = tmppath / "zstd.blend"
+        with raw.open("rb") as infile:
+            magic_compression.compress(
+                infile, zstd_source, magic_compression.Compression.ZSTD, 2**20
+            )
+        gzip_source = tmppath / "gzip.blend"
+        with raw.open("rb") as infile, gzip.open(str(gzip_source), "wb") as outfile:
+            shutil.copyfileobj(infile, outfile)
+
+        work = tmppath / "work.blend"
+        print(
+            "%.0f MiB decompressed, %d CPUs"
+            % (raw.stat().st_size / 2**20, os.cpu_count() or 1)
+        )
+
+        benchmarks = [
+            ("gzip source, gzip (before)", GZipRecompressBlendFile, gzip_source, -1),
+            ("gzip source, gzip", blendfile.BlendFile, gzip_source, -1),
+            ("zstd source, gzip (before)", GZipRecompressBlendFile, zstd_source, -1),
+            ("zstd source, zstd 1 thread", blendfile.BlendFile, zstd_source, 1),
+            ("zstd source, zstd all threads", blendfile.BlendFile, zstd_source, -1),
+        ]
+        for name, cls, source, threads in benchmarks:
+            magic_compression.set_compression_policy(zstd_threads=threads)
+            duration = synthetic.timeit(rewrite(cls, source, work), args.repeat)
+            print("    %-30s %8.0f ms" % (name, duration * 1000))
+        magic_compression.set_compression_policy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Benchmark rewriting paths in blend files, like the Packer does.
+
+Each run opens a synthetic blend file read-only, changes the paths of its
+libraries, and writes the result to another file.
+
+- "copy_and_rebind" is how the Packer used to do this: copy the file, reopen
+  the copy for writing, change it in place, and close it (which compresses
+  it again for compressed files).
+- "write_to" keeps the changes in memory, and writes the original file with
+  the changes applied in one sequential pass.
+"""
+import argparse
+import os
+import pathlib
+import random
+import tempfile
+import typing
+
+from blender_asset_tracer import blendfile
+from blender_asset_tracer.blendfile import magic_compression
+from . import synthetic
+
+NUM_LIBRARIES = 100
+
+
+def blocks(
+    template: synthetic.Template, num_blocks: int
+) -> typing.Iterator[synthetic.SyntheticBlock]:
+    """Generator, yield library blocks followed by 4 KiB DATA blocks."""
+    library_size = template.struct_sizes[b"Library"]
+    library_index = template.sdna_index_from_id[b"Library"]
+    for index in range(NUM_LIBRARIES):
+        yield b"LI", 0x1000 + index * 0x100, library_index, 1, bytes(library_size)
+
+    rng = random.Random(47)
+    for index in range(num_blocks):
+        payload = rng.getrandbits(2048).to_bytes(256, "little") * 4 + bytes(3072)
+        yield b"DATA", 0x100000 + index * 0x1000, 0, 1, payload
+
+
+def set_paths(bfile: blendfile.BlendFile) -> None:
+    for index, library in enumerate(bfile.code_index[b"LI"]):
+        library[b"filepath"] = b"//libs/library-%d.blend" % index
+
+
+def copy_and_rebind(source: pathlib.Path, work: pathlib.Path) -> None:
+    bfile = blendfile.BlendFile(source)
+    bfile.copy_and_rebind(work, mode="rb+")
+    set_paths(bfile)
+    bfile.close()
+
+
+def write_to(source: pathlib.Path, work: pathlib.Path) -> None:
+    with blendfile.BlendFile(source) as bfile:
+        set_paths(bfile)
+        with work.open("wb") as outfile:
+            bfile.write_to(outfile, bfile.compression)
+
+
+def run(
+    func: typing.Callable[[pathlib.Path, pathlib.Path], None],
+    source: pathlib.Path,
+    work: pathlib.Path,
+) -> typing.Callable[[], None]:
+    def timed():
+        # Overwriting the file of the previous run would also time the
+        # kernel writing back its data.
+        if work.exists():
+            work.unlink()
+            os.sync()
+        func(source, work)
+
+    return timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=50_000, help="4 KiB each")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    template = synthetic.Template()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmppath = pathlib.Path(tmpdir)
+        raw = tmppath / "raw.blend"
+        template.write(raw, blocks(template, args.blocks))
+        zstd_source = tmppath / "zstd.blend"
+        with raw.open("rb") as infile:
+            magic_compression.compress(
+                infile, zstd_source, magic_compression.Compression.ZSTD, 2**20
+            )
+        work = tmppath / "work.blend"
+        print("%.0f MiB decompressed" % (raw.stat().st_size / 2**20))
+
+        for source_name, source in (("uncompressed", raw), ("zstd", zstd_source)):
+            for name, func in (
+                ("copy_and_rebind", copy_and_rebind),
+                ("write_to", write_to),
+            ):
+                duration = synthetic.timeit(run(func, source, work), args.repeat)
+                print("    %-12s %-16s %8.0f ms" % (source_name, name, duration * 1000))
+
+
+if __name__ == "__main__":
+    main()
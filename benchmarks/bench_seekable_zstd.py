@@ -0,0 +1,128 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Benchmark tracing a large Zstandard-compressed library.
+
+The synthetic root file links a collection from one library file, which
+contains many objects that each use a cache file. The blocks of the library
+are shuffled, so that tracing it reads the file in random order. The library
+is compressed in the seekable Zstandard format, like Blender does.
+
+- "full decompression" decompresses the library completely when opening it,
+  like BAT did before it could read the seekable format.
+- "seekable" reads it via SeekableZstdFile, decompressing frames on demand.
+- "seekable, block index" does the same, with the block index of the library
+  loaded from the disk cache, so that not all block headers are read.
+
+The blend file cache is cleared before each run.
+"""
+import argparse
+import io
+import pathlib
+import random
+import tempfile
+import typing
+
+from blender_asset_tracer import blendfile, trace
+from blender_asset_tracer.blendfile import block_index, magic_compression
+from . import bench_parallel_trace, synthetic
+
+
+def write_compressed_library(
+    template: synthetic.Template, path: pathlib.Path, num_objects: int
+) -> int:
+    """Write the library with shuffled blocks, returning its uncompressed size."""
+    builder = bench_parallel_trace.BlockBuilder(template)
+    blocks = list(bench_parallel_trace.library_blocks(builder, 0, num_objects))
+    random.Random(47).shuffle(blocks)
+
+    uncompressed = path.with_suffix(".uncompressed")
+    template.write(uncompressed, blocks)
+    data = uncompressed.read_bytes()
+    uncompressed.unlink()
+    with path.open("wb") as outfile:
+        magic_compression.compress_to(
+            io.BytesIO(data),
+            outfile,
+            magic_compression.Compression.ZSTD,
+            blendfile.FILE_BUFFER_SIZE,
+        )
+    return len(data)
+
+
+def trace_deps(root: pathlib.Path, lib: pathlib.Path) -> typing.Callable[[], None]:
+    def run():
+        blendfile.close_all_cached()
+        for _ in trace.deps(root):
+            pass
+
+        fileobj = blendfile.open_cached(lib).fileobj
+        if isinstance(fileobj, magic_compression.SeekableZstdFile):
+            run.frames_decompressed = fileobj.frames_decompressed
+
+    run.frames_decompressed = 0
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--objects", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    template = synthetic.Template()
+    builder = bench_parallel_trace.BlockBuilder(template)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmppath = pathlib.Path(tmpdir)
+        root = tmppath / "root.blend"
+        template.write(root, bench_parallel_trace.root_blocks(builder, 1))
+        lib = tmppath / "lib_00.blend"
+        size = write_compressed_library(template, lib, args.objects)
+
+        num_usages = sum(1 for _ in trace.deps(root))
+        print(
+            "library of %.1f MB (%.1f MB compressed), %d usages"
+            % (size / 2**20, lib.stat().st_size / 2**20, num_usages)
+        )
+
+        variants = [
+            ("full decompression", False, False),
+            ("seekable", True, False),
+            ("seekable, block index", True, True),
+        ]
+        try:
+            for label, random_access, use_index in variants:
+                magic_compression.set_decompression_policy(random_access=random_access)
+                block_index.set_disk_cache(tmppath / "index" if use_index else None)
+                run = trace_deps(root, lib)
+                run()  # Store the block index, if enabled.
+
+                duration = synthetic.timeit(run, args.repeat)
+                print(
+                    "    %-22s %8.0f ms, %5d frames decompressed"
+                    % (label, duration * 1000, run.frames_decompressed)
+                )
+        finally:
+            magic_compression.set_decompression_policy()
+            block_index.set_disk_cache(None)
+            blendfile.close_all_cached()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Construction of synthetic blend files for benchmarking.
+
+The files use the file header and DNA1 block of a real blend file from the
+test suite, followed by whatever blocks the benchmark needs.
+"""
+import pathlib
+import time
+import typing
+
+from blender_asset_tracer import blendfile
+
+TEMPLATE = pathlib.Path(__file__).parent.parent / "tests/blendfiles/basic_file.blend"
+
+# Tuple (code, addr_old, sdna_index, count, payload)
+SyntheticBlock = typing.Tuple[bytes, int, int, int, bytes]
+
+
+class Template:
+    """File header and SDNA of an existing blend file."""
+
+    def __init__(self, path: pathlib.Path = TEMPLATE) -> None:
+        with blendfile.BlendFile(path) as bfile:
+            self.file_header = bfile.read_at(0, bfile.header.structure.size)
+            self.header_struct = bfile.block_header_struct
+            self.pointer_size = bfile.header.pointer_size
+            self.endian = bfile.header.endian
+            self.sdna_index_from_id = dict(bfile.sdna_index_from_id)
+            self.struct_sizes = {
+                struct.dna_type_id: struct.size for struct in bfile.structs
+            }
+
+            dna1 = bfile.code_index[b"DNA1"][0]
+            self.dna1_payload = dna1.raw_data()
+            self.dna1_header = self.header_struct.pack(
+                b"DNA1", dna1.size, dna1.addr_old, dna1.sdna_index, dna1.count
+            )
+            self.structs = bfile.structs
+
+    def struct(self, dna_type_id: bytes):
+        return self.structs[self.sdna_index_from_id[dna_type_id]]
+
+    def write(
+        self, path: pathlib.Path, blocks: typing.Iterable[SyntheticBlock]
+    ) -> None:
+        """Write a blend file consisting of the DNA1 block and the given blocks."""
+        pack = self.header_struct.pack
+        with path.open("wb") as outfile:
+            outfile.write(self.file_header)
+            for code, addr_old, sdna_index, count, payload in blocks:
+                outfile.write(pack(code, len(payload), addr_old, sdna_index, count))
+                outfile.write(payload)
+            outfile.write(self.dna1_header)
+            outfile.write(self.dna1_payload)
+            outfile.write(pack(b"ENDB", 0, 0, 0, 0))
+
+
+def data_blocks(
+    num_blocks: int, payload_size: int = 64
+) -> typing.Iterator[SyntheticBlock]:
+    """Generator, yield DATA blocks with unique addresses."""
+    payload = bytes(payload_size)
+    for index in range(num_blocks):
+        yield b"DATA", 0x10000 + index * 0x100, 0, 1, payload
+
+
+def timeit(func: typing.Callable[[], typing.Any], repeat: int = 3) -> float:
+    """Return the fastest wall time of calling func() 'repeat' times."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return min(durations)
@@ -21,32 +21,57 @@
 # (c) 2018, Blender Foundation - Sybren A. Stüvel
 
 import atexit
-import collections
+import contextlib
+import errno
 import functools
-import gzip
+import io
 import logging
+import mmap
 import os
-import struct
 import pathlib
 import shutil
+import sys
 import tempfile
+import threading
 import typing
-
-from . import exceptions, dna, header, magic_compression
+import weakref
+
+from . import (
+    exceptions,
+    dna,
+    header,
+    magic_compression,
+    block_table,
+    block_index,
+    sdna_cache,
+    file_cache,
+    overlay,
+)
 from blender_asset_tracer import bpathlib
 
 log = logging.getLogger(__name__)
 
 FILE_BUFFER_SIZE = 1024 * 1024
-BFBList = typing.List["BlendFileBlock"]
 
-_cached_bfiles = {}  # type: typing.Dict[pathlib.Path, BlendFile]
+# Like shutil, only use os.sendfile() to copy files on Linux.
+_USE_SENDFILE = hasattr(os, "sendfile") and sys.platform.startswith("linux")
+BFBList = typing.Sequence["BlendFileBlock"]
+
+# Tuple (code, size, addr_old, sdna_index, count, file_offset) describing one
+# data block, as produced by BlendFile.iter_block_headers().
+BlockHeader = typing.Tuple[bytes, int, int, int, int, int]
+
+_cached_bfiles = file_cache.BlendFileCache()
 
 
 def open_cached(
     path: pathlib.Path, mode="rb", assert_cached: typing.Optional[bool] = None
 ) -> "BlendFile":
-    """Open a blend file, ensuring it is only opened once."""
+    """Open a blend file, ensuring it is only opened once.
+
+    This is thread-safe. The number of files that are kept open is limited,
+    see set_cache_limits().
+    """
     my_log = log.getChild("open_cached")
     bfile_path = bpathlib.make_absolute(path)
 
@@ -57,18 +82,37 @@ def open_cached(
         elif not assert_cached and is_cached:
             raise AssertionError("File %s was cached" % bfile_path)
 
-    try:
-        bfile = _cached_bfiles[bfile_path]
-    except KeyError:
+    opened = []  # type: typing.List[BlendFile]
+
+    def opener() -> BlendFile:
         my_log.debug("Opening non-cached %s", path)
-        bfile = BlendFile(path, mode=mode)
-        _cached_bfiles[bfile_path] = bfile
-    else:
-        my_log.debug("Returning cached %s", path)
+        opened.append(BlendFile(path, mode=mode))
+        return opened[0]
 
+    bfile = _cached_bfiles.get_or_open(bfile_path, opener)
+    if not opened:
+        my_log.debug("Returning cached %s", path)
     return bfile
 
 
+def set_cache_limits(
+    max_open_files: typing.Optional[int] = file_cache.DEFAULT_MAX_OPEN_FILES,
+    max_temp_bytes: typing.Optional[int] = None,
+) -> None:
+    """Limit the resources used by files opened with open_cached().
+
+    When a limit is exceeded, the least recently used files are closed. They
+    stay in the cache, and are transparently reopened when they are used
+    again. Modified files are kept open.
+
+    :param max_open_files: maximum number of open files, or None for no limit.
+    :param max_temp_bytes: maximum total size of the decompressed copies of
+        compressed blend files, in memory or in temporary files, or None for
+        no limit.
+    """
+    _cached_bfiles.set_limits(max_open_files, max_temp_bytes)
+
+
 @atexit.register
 def close_all_cached() -> None:
     if not _cached_bfiles:
@@ -93,6 +137,11 @@ def _uncache(path: pathlib.Path):
     _cached_bfiles.pop(bfile_path, None)
 
 
+def _stat_key(path: pathlib.Path) -> typing.Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
 class BlendFile:
     """Representation of a blend file.
 
@@ -100,6 +149,16 @@ class BlendFile:
     :ivar raw_filepath: which file is accessed; same as filepath for
         uncompressed files, but a temporary file for compressed files.
     :ivar fileobj: the file object that's being accessed.
+
+    Reading from a BlendFile is thread-safe. Data is read from the
+    memory-mapped file, with os.pread() or SeekableZstdFile.pread(), or (if
+    neither is available) with seek() and read() calls while holding a lock.
+    Writes with BlendFileBlock.set() hold that same lock.
+
+    Files that are opened read-only are never written to. Within patch_mode(),
+    changes made with BlendFileBlock.set() are kept in memory instead, and
+    visible to reads from this BlendFile. Use write_to() to save the modified
+    file.
     """
 
     log = log.getChild("BlendFile")
@@ -110,6 +169,14 @@ class BlendFile:
     Set to False to disable this exception, and to return None instead.
     """
 
+    use_mmap = True
+    """Memory-map blend files that are opened read-only.
+
+    Reading fields from a memory-mapped file avoids a seek() and read() call
+    for each access. Files that are opened for writing, or that cannot be
+    memory-mapped, are always read with seek() and read() calls.
+    """
+
     def __init__(self, path: pathlib.Path, mode="rb") -> None:
         """Create a BlendFile instance for the blend file at the path.
 
@@ -122,17 +189,41 @@ class BlendFile:
         self.filepath = path
         self.raw_filepath = path
         self._is_modified = False
+        self._patches = None  # type: typing.Optional[overlay.PatchOverlay]
+        self._patch_mode = 0
+        self._mmap = None  # type: typing.Optional[mmap.mmap]
+        self._view = None  # type: typing.Optional[memoryview]
+        self._pread_file = None  # type: typing.Optional[typing.IO[bytes]]
+        # Protects the position of self.fileobj, the opening and closing of
+        # file handles, and the creation of blocks.
+        self._lock = threading.RLock()
+        self._handles_closed = False
         self.fileobj = self._open_file(path, mode)
 
-        self.blocks = []  # type: BFBList
+        # The block headers are stored in a compact table, and BlendFileBlock
+        # objects are only created when they are accessed. They are kept
+        # around for as long as they are referenced elsewhere.
+        self._table = block_table.BlockTable()
+        self._materialised = (
+            weakref.WeakValueDictionary()
+        )  # type: weakref.WeakValueDictionary[int, BlendFileBlock]
+
+        self.blocks = block_table.BlockSequence(self)  # type: BFBList
         """BlendFileBlocks of this file, in disk order."""
 
-        self.code_index = collections.defaultdict(
-            list
-        )  # type: typing.Dict[bytes, BFBList]
+        self.code_index = block_table.CodeIndex(
+            self
+        )  # type: typing.Mapping[bytes, BFBList]
         self.structs = []  # type: typing.List[dna.Struct]
         self.sdna_index_from_id = {}  # type: typing.Dict[bytes, int]
-        self.block_from_addr = {}  # type: typing.Dict[int, BlendFileBlock]
+        self.block_from_addr = block_table.AddressIndex(
+            self
+        )  # type: typing.MutableMapping[int, BlendFileBlock]
+        # Mapping from (code, ID name) to block table indices, built on the
+        # first lookup by find_blocks_from_id_name().
+        self._id_name_index = (
+            None
+        )  # type: typing.Optional[typing.Dict[typing.Tuple[bytes, bytes], typing.List[int]]]
 
         self.header = header.BlendFileHeader(self.fileobj, self.raw_filepath)
         self.block_header_struct = self.header.create_block_header_struct()
@@ -143,7 +234,7 @@ class BlendFile:
 
         This does not parse the blend file yet, just makes sure that
         self.fileobj is opened and that self.filepath and self.raw_filepath
-        are set.
+        are set. When possible, the file is also memory-mapped.
 
         :raises exceptions.BlendFileError: when the blend file doesn't have the
             correct magic bytes.
@@ -153,34 +244,376 @@ class BlendFile:
 
         self.filepath = path
         self.is_compressed = decompressed.is_compressed
+        self.compression = decompressed.compression
         self.raw_filepath = decompressed.path
+        self._mode = mode
+        self._stat_key = _stat_key(path)
+        self._handles_closed = False
+        self._map_file(decompressed.fileobj, mode)
+        self._pread_file = None
+        if self._view is None and self._supports_pread(decompressed.fileobj):
+            self._pread_file = decompressed.fileobj
+
+        self._temp_file_size = decompressed.temp_size
 
         return decompressed.fileobj
 
+    @staticmethod
+    def _supports_pread(fileobj: typing.IO[bytes]) -> bool:
+        """Return whether the file can be read without using its position.
+
+        That is, with SeekableZstdFile.pread() or os.pread().
+        """
+        if isinstance(fileobj, magic_compression.SeekableZstdFile):
+            return True
+        if not hasattr(os, "pread"):
+            # Windows does not have os.pread().
+            return False
+        try:
+            fileobj.fileno()
+        except (OSError, AttributeError):
+            # io.UnsupportedOperation (a subclass of OSError) is raised for
+            # file objects without file descriptor.
+            return False
+        return True
+
+    @property
+    def has_open_handles(self) -> bool:
+        """Whether the file is open, i.e. not closed or evicted from the cache."""
+        return not self._handles_closed and not self.fileobj.closed
+
+    @property
+    def temp_file_size(self) -> int:
+        """Size of the decompressed copy of a compressed file, or 0 if there is none.
+
+        The decompressed copy can be in memory or in a temporary file, see
+        magic_compression.set_decompression_policy().
+        """
+        return self._temp_file_size
+
+    def close_handles(self) -> bool:
+        """Close the file, but keep the loaded blocks for later use.
+
+        The file is reopened as soon as data is read from it again. This is
+        used by open_cached() to limit the number of open files.
+
+        :returns: whether the handles were closed. Modified files are never
+            closed this way, and neither are files that are in use by another
+            thread at this moment.
+        """
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            if not self.has_open_handles or self._is_modified:
+                return False
+
+            self.log.debug("Closing handles of %s", self.filepath)
+            if self._view is not None:
+                # Readers only use the memory map, so it is safe to close the
+                # file object. The map itself is released when the last
+                # reader is done with it.
+                self.fileobj.close()
+            # Without memory map, other threads may still be reading via
+            # os.pread(). Dropping the reference closes the file after they
+            # are done.
+            self.fileobj = None  # type: ignore
+            self._pread_file = None
+            self._view = None
+            self._mmap = None
+            self._handles_closed = True
+            return True
+        finally:
+            self._lock.release()
+
+    def _reopen(self) -> None:
+        """Reopen the file after close_handles() was called."""
+        with self._lock:
+            if not self._handles_closed:
+                return
+
+            if _stat_key(self.filepath) != self._stat_key:
+                raise exceptions.BlendFileError(
+                    "File was changed on disk after it was opened", self.filepath
+                )
+            self.log.debug("Reopening %s", self.filepath)
+            self.fileobj = self._open_file(self.filepath, self._mode)
+
+        _cached_bfiles.file_reopened(self)
+
+    def _map_file(self, fileobj: typing.IO[bytes], mode: str) -> None:
+        """Memory-map the file, if it is opened read-only.
+
+        Failure to map the file is not an error; in that case the regular
+        seek() and read() calls on the file object are used.
+        """
+        self._mmap = None
+        self._view = None
+
+        if not self.use_mmap or "+" in mode or "w" in mode:
+            return
+
+        try:
+            # Data may still be buffered when the file was just decompressed.
+            fileobj.flush()
+            self._mmap = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as ex:
+            # ValueError is raised for empty files, and io.UnsupportedOperation
+            # (a subclass of OSError) for file objects without file descriptor.
+            self.log.debug("Not memory-mapping %s: %s", self.raw_filepath, ex)
+            return
+
+        self._view = memoryview(self._mmap)
+
+    def _unmap_file(self) -> None:
+        if self._view is not None:
+            self._view.release()
+            self._view = None
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Something still references the mapped memory. It will be
+                # unmapped when that reference is garbage-collected.
+                self.log.warning(
+                    "Unable to unmap %s, it is still in use", self.raw_filepath
+                )
+            self._mmap = None
+
+    @property
+    def is_mmapped(self) -> bool:
+        """Whether data is read from a memory-mapped view of the file."""
+        return self._view is not None
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        """Return 'size' bytes of the file, starting at 'offset'.
+
+        This does not use the position of self.fileobj, and is thread-safe.
+        """
+        view = self._view
+        if view is not None:
+            data = bytes(view[offset : offset + size])
+        else:
+            pread_file = self._pread_file
+            if isinstance(pread_file, magic_compression.SeekableZstdFile):
+                data = pread_file.pread(offset, size)
+            elif pread_file is not None:
+                data = os.pread(pread_file.fileno(), size, offset)
+            else:
+                with self._lock:
+                    if self._handles_closed:
+                        self._reopen()
+                        return self.read_at(offset, size)
+                    self.fileobj.seek(offset, os.SEEK_SET)
+                    data = self.fileobj.read(size)
+
+        if self._patches is not None:
+            with self._lock:
+                if self._patches is not None:
+                    data = self._patches.apply(offset, data)
+        return data
+
+    def read_pointer_at(self, offset: int) -> int:
+        """Return the pointer stored at the given file offset."""
+        endian = self.header.endian
+        pointer_size = self.header.pointer_size
+        view = self._view
+        if view is not None and self._patches is None:
+            return endian.read_pointer_from(view, offset, pointer_size)
+        data = self.read_at(offset, pointer_size)
+        return endian.read_pointer_from(data, 0, pointer_size)
+
+    def pointer_reader(self) -> typing.Callable[[int], int]:
+        """Return a function that reads the pointer at a given file offset.
+
+        This is the same as read_pointer_at(), but faster for reading many
+        pointers from a memory-mapped file. Obtain a new reader after
+        changing the file.
+        """
+        view = self._view
+        if view is None or self._patches is not None:
+            return self.read_pointer_at
+
+        endian = self.header.endian
+        pointer_struct = endian.ULONG if self.header.pointer_size == 8 else endian.UINT
+        unpack_from = pointer_struct.unpack_from
+
+        def read_pointer(offset: int) -> int:
+            return unpack_from(view, offset)[0]
+
+        return read_pointer
+
+    def read_pointers_at(self, offset: int, count: int) -> typing.Sequence[int]:
+        """Return the array of 'count' pointers stored at the given file offset.
+
+        The array is read and decoded at once, which is much faster than
+        calling read_pointer_at() for each pointer. Fewer pointers are
+        returned when the array extends beyond the end of the file.
+        """
+        pointer_size = self.header.pointer_size
+        view = self._view
+        if view is not None and self._patches is None:
+            data = view[offset : offset + count * pointer_size]
+        else:
+            data = self.read_at(offset, count * pointer_size)
+        return self.header.endian.read_pointers_from(data, pointer_size)
+
+    def dereference_pointers(
+        self, addresses: typing.Iterable[int]
+    ) -> typing.Iterator["BlendFileBlock"]:
+        """Generator, yield the blocks the non-null pointers point to.
+
+        Pointers to unknown addresses are skipped when strict pointer mode is
+        disabled, and raise exceptions.SegmentationFault otherwise.
+        """
+        for address in addresses:
+            if not address:
+                continue
+            dereferenced = self.dereference_pointer(address)
+            if dereferenced is None:
+                # This can happen when strict pointer mode is disabled.
+                continue
+            yield dereferenced
+
     def _load_blocks(self) -> None:
         """Read the blend file to load its DNA structure to memory."""
 
         self.structs.clear()
         self.sdna_index_from_id.clear()
-        while True:
-            block = BlendFileBlock(self)
-            if block.code == b"ENDB":
-                break
+        self._materialised.clear()
+        self._id_name_index = None
+
+        # Only read-only files are indexed, as files opened for writing are
+        # likely to change before they are opened again.
+        index_key = None
+        if self._mode == "rb" and block_index.is_enabled():
+            index_key = block_index.file_key(self.filepath)
+            index = block_index.load(index_key)
+            if index is not None and self._use_index(index):
+                return
 
-            if block.code == b"DNA1":
-                self.decode_structs(block)
-            else:
-                self.fileobj.seek(block.size, os.SEEK_CUR)
+        self._table = block_table.BlockTable()
+        self._table.extend(self.iter_block_headers())
 
-            self.blocks.append(block)
-            self.code_index[block.code].append(block)
-            self.block_from_addr[block.addr_old] = block
+        catalog_keys = [
+            self.decode_structs(block) for block in self.code_index[b"DNA1"]
+        ]
 
         if not self.structs:
             raise exceptions.NoDNA1Block(
                 "No DNA1 block in file, not a valid .blend file", self.filepath
             )
 
+        if index_key is not None:
+            block_index.save(index_key, block_index.Index(self._table, catalog_keys))
+
+    def _use_index(self, index: block_index.Index) -> bool:
+        """Use the block table and DNA catalogs from a stored block index.
+
+        :return: False when the index cannot be used, in which case the file
+            should be scanned instead.
+        """
+        catalogs = [sdna_cache.get(key) for key in index.catalog_keys]
+        if not catalogs:
+            return False
+
+        self._table = index.table
+        if None in catalogs:
+            # The catalogs are no longer cached, so decode them again.
+            for block in self.code_index[b"DNA1"]:
+                self.decode_structs(block)
+            return True
+
+        for catalog in catalogs:
+            self.structs.extend(catalog.structs)
+            self.sdna_index_from_id.update(catalog.sdna_index_from_id)
+        return True
+
+    def iter_block_headers(self) -> typing.Iterator[BlockHeader]:
+        """Generator, yield the header values of all blocks in disk order.
+
+        Stops at the ENDB block, which is not yielded itself. The headers are
+        decoded from the memory-mapped file when possible, and otherwise from
+        large read-ahead windows, instead of reading each header separately.
+        """
+        first_offset = self.header.structure.size
+        if self._view is not None:
+            return self._iter_block_headers_mapped(first_offset)
+        return self._iter_block_headers_buffered(first_offset)
+
+    def _iter_block_headers_mapped(self, offset: int) -> typing.Iterator[BlockHeader]:
+        view = self._view
+        assert view is not None
+        unpack_from = self.block_header_struct.unpack_from
+        header_size = self.block_header_struct.size
+        read_data0 = self.header.endian.read_data0
+        end = len(view)
+
+        # There are only a handful of different block codes, so decoding
+        # them once also makes all blocks share the same bytes objects.
+        codes = {}  # type: typing.Dict[bytes, bytes]
+
+        while offset + header_size <= end:
+            raw_code, size, addr_old, sdna_index, count = unpack_from(view, offset)
+            offset += header_size
+            try:
+                code = codes[raw_code]
+            except KeyError:
+                code = codes[raw_code] = read_data0(raw_code)
+            if code == b"ENDB":
+                return
+            yield code, size, addr_old, sdna_index, count, offset
+            offset += size
+
+        self._warn_truncated(bytes(view[offset:]))
+
+    def _iter_block_headers_buffered(
+        self, offset: int
+    ) -> typing.Iterator[BlockHeader]:
+        unpack_from = self.block_header_struct.unpack_from
+        header_size = self.block_header_struct.size
+        read_data0 = self.header.endian.read_data0
+
+        codes = {}  # type: typing.Dict[bytes, bytes]
+        window = b""
+        window_offset = offset  # File offset of window[0]
+        pos = 0  # Offset of the next block header in the window.
+
+        while True:
+            if pos + header_size > len(window):
+                window_offset += pos
+                pos = 0
+                window = self.read_at(window_offset, FILE_BUFFER_SIZE)
+                if len(window) < header_size:
+                    self._warn_truncated(window)
+                    return
+
+            raw_code, size, addr_old, sdna_index, count = unpack_from(window, pos)
+            pos += header_size
+            try:
+                code = codes[raw_code]
+            except KeyError:
+                code = codes[raw_code] = read_data0(raw_code)
+            if code == b"ENDB":
+                return
+            yield code, size, addr_old, sdna_index, count, window_offset + pos
+            pos += size
+
+    def _warn_truncated(self, remaining: bytes) -> None:
+        """Log about the file ending without a complete ENDB block header."""
+
+        # Old blend files end in an 8-byte ENDB block header.
+        if remaining[:4] == b"ENDB":
+            self.log.debug("interpreting block as old-style ENDB block")
+            return
+
+        self.log.warning(
+            "Blend file %s seems to be truncated, "
+            "expected %d bytes but could read only %d",
+            self.filepath,
+            self.block_header_struct.size,
+            len(remaining),
+        )
+
     def __repr__(self) -> str:
         clsname = self.__class__.__qualname__
         if self.filepath == self.raw_filepath:
@@ -214,22 +647,233 @@ class BlendFile:
 
     @property
     def is_modified(self) -> bool:
-        return self._is_modified
+        """Whether the file was changed, either on disk or in memory."""
+        return self._is_modified or self._patches is not None
+
+    @property
+    def is_writable(self) -> bool:
+        """Whether the file is opened for writing.
+
+        BlendFileBlock.set() writes directly to writable files. Changes to
+        other files can only be kept in memory, see patch_mode().
+        """
+        return "+" in self._mode or "w" in self._mode
+
+    @contextlib.contextmanager
+    def patch_mode(self) -> typing.Iterator[None]:
+        """Context manager, keep changes to a read-only file in memory.
+
+        Within this context, BlendFileBlock.set() records changes to a file
+        that is opened read-only in memory, instead of raising an error. The
+        changes stay after the context exits, until they are written with
+        write_to(), or discarded with discard_patches() or close().
+        """
+        with self._lock:
+            self._patch_mode += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._patch_mode -= 1
+
+    def write_to(
+        self,
+        dst_fileobj: typing.IO[bytes],
+        compression=magic_compression.Compression.NONE,
+    ) -> None:
+        """Write the file, including changes kept in memory, to dst_fileobj.
+
+        This reads the original file once, sequentially, and writes it with
+        the in-memory changes applied. The file itself is not changed.
+
+        :param compression: compress the written data, for example using
+            self.compression to keep the compression of the original file.
+        """
+        self.log.debug("Writing %s to %s", self.filepath, dst_fileobj)
+        if compression == magic_compression.Compression.NONE and self._sendfile_to(
+            dst_fileobj
+        ):
+            return
+
+        reader = io.BufferedReader(
+            overlay.PatchedReader(self.read_at), FILE_BUFFER_SIZE
+        )
+        if compression == magic_compression.Compression.NONE:
+            shutil.copyfileobj(reader, dst_fileobj, FILE_BUFFER_SIZE)
+        else:
+            magic_compression.compress_to(
+                reader, dst_fileobj, compression, FILE_BUFFER_SIZE
+            )
+
+    def _sendfile_to(self, dst_fileobj: typing.IO[bytes]) -> bool:
+        """Write the file to dst_fileobj, letting the kernel copy the data.
+
+        Only the in-memory changes pass through Python; the rest of the file
+        is copied with os.sendfile(), like shutil.copyfile() does.
+
+        :returns: False if this is not possible, in which case nothing was
+            written.
+        """
+        if not _USE_SENDFILE:
+            return False
+        with self._lock:
+            if self._handles_closed:
+                self._reopen()
+            try:
+                src_fd = self.fileobj.fileno()
+                dst_fd = dst_fileobj.fileno()
+            except (OSError, AttributeError):
+                return False
+            file_size = os.fstat(src_fd).st_size
+            patches = list(self._patches or ())
+
+        # Write at the current position of dst_fileobj, which after flushing
+        # may differ from the position of its descriptor, for example when a
+        # file opened for reading and writing has read ahead.
+        dst_fileobj.flush()
+        start = dst_fileobj.tell()
+        os.lseek(dst_fd, start, os.SEEK_SET)
+        offset = 0
+        for patch_offset, data in patches + [(file_size, b"")]:
+            while offset < patch_offset:
+                try:
+                    sent = os.sendfile(dst_fd, src_fd, offset, patch_offset - offset)
+                except OSError as ex:
+                    if offset == 0 and ex.errno in {errno.EINVAL, errno.ENOTSUP}:
+                        # Not supported for these files, see shutil.
+                        return False
+                    raise
+                if sent == 0:
+                    raise EOFError("%s is shorter than expected" % self.raw_filepath)
+                offset += sent
+            offset += len(data)
+            while data:
+                data = data[os.write(dst_fd, data) :]
+
+        # Make the file object aware of the new position of its descriptor,
+        # at the end of the written data.
+        dst_fileobj.seek(start + file_size, os.SEEK_SET)
+        return True
+
+    def discard_patches(self) -> None:
+        """Forget the changes that are kept in memory."""
+        with self._lock:
+            self._patches = None
 
     def mark_modified(self) -> None:
         """Recompess the file when it is closed."""
         self.log.debug("Marking %s as modified", self.raw_filepath)
         self._is_modified = True
 
-    def find_blocks_from_code(self, code: bytes) -> typing.List["BlendFileBlock"]:
+    def find_blocks_from_code(self, code: bytes) -> BFBList:
         assert isinstance(code, bytes)
         return self.code_index[code]
 
+    def find_blocks_from_id_name(self, code: bytes, id_name: bytes) -> BFBList:
+        """Return the blocks with this code and ID name.
+
+        This is the same as filtering find_blocks_from_code(code) on
+        block.id_name, but uses an index of all ID names in the file. The
+        index is built on the first call, by reading the names of all ID
+        blocks in one pass.
+        """
+        assert isinstance(code, bytes)
+        assert isinstance(id_name, bytes)
+        index = self._id_name_index
+        if index is None:
+            index = self._build_id_name_index()
+        return block_table.BlockSequence(self, index.get((code, id_name), []))
+
+    def _build_id_name_index(
+        self,
+    ) -> typing.Dict[typing.Tuple[bytes, bytes], typing.List[int]]:
+        with self._lock:
+            if self._id_name_index is not None:
+                return self._id_name_index
+
+            file_header = self.header
+            read_data0 = file_header.endian.read_data0
+            view = self._view if self._patches is None else None
+            table = self._table
+            sdna_indices = table.sdna_indices
+            offsets = table.offsets
+            num_structs = len(self.structs)
+
+            # Accessor of the ID name per SDNA index, or None for non-ID structs.
+            accessors = {}  # type: typing.Dict[int, typing.Optional[dna.FieldAccessor]]
+            index = {}  # type: typing.Dict[typing.Tuple[bytes, bytes], typing.List[int]]
+            for code, block_indices in table.by_code.items():
+                if code == b"DATA":
+                    # DATA blocks are never ID blocks, and there are many.
+                    continue
+                for block_index in block_indices:
+                    sdna_index = sdna_indices[block_index]
+                    try:
+                        accessor = accessors[sdna_index]
+                    except KeyError:
+                        accessor = None
+                        if sdna_index < num_structs:
+                            accessor = self.structs[sdna_index].field_accessor(
+                                file_header, (b"id", b"name")
+                            )
+                        accessors[sdna_index] = accessor
+                    if accessor is None:
+                        continue
+
+                    offset = offsets[block_index] + accessor.offset
+                    if view is not None:
+                        data = view[offset : offset + accessor.size]
+                    else:
+                        data = self.read_at(offset, accessor.size)
+                    id_name = read_data0(bytes(data))
+                    index.setdefault((code, id_name), []).append(block_index)
+
+            self._id_name_index = index
+        return index
+
+    def _block_at(self, index: int) -> "BlendFileBlock":
+        """Return the block at this index of the block table.
+
+        Returns the same BlendFileBlock object for as long as it is referenced.
+        """
+        try:
+            return self._materialised[index]
+        except KeyError:
+            pass
+
+        with self._lock:
+            # Another thread may have created the block in the mean time.
+            block = self._materialised.get(index)
+            if block is not None:
+                return block
+
+            table = self._table
+            block = BlendFileBlock(
+                self,
+                table.code(index),
+                table.sizes[index],
+                table.addrs[index],
+                table.sdna_indices[index],
+                table.counts[index],
+                table.offsets[index],
+                table_index=index,
+            )
+            self._materialised[index] = block
+        return block
+
     def close(self) -> None:
         """Close the blend file.
 
-        Recompresses the blend file if it was compressed and changed.
+        Recompresses the blend file if it was compressed and changed. Changes
+        that are kept in memory are discarded; use write_to() to save them.
         """
+        if self._handles_closed:
+            # The file was already closed by close_handles().
+            self._handles_closed = False
+            self._patches = None
+            _cached_bfiles.discard(bpathlib.make_absolute(self.filepath), self)
+            return
+
         if not self.fileobj:
             return
 
@@ -237,26 +881,26 @@ class BlendFile:
             log.debug("closing blend file %s after it was modified", self.raw_filepath)
 
         if self._is_modified and self.is_compressed:
-            log.debug("GZip-recompressing modified blend file %s", self.raw_filepath)
-            self.fileobj.seek(os.SEEK_SET, 0)
-
-            with gzip.open(str(self.filepath), "wb") as gzfile:
-                while True:
-                    data = self.fileobj.read(FILE_BUFFER_SIZE)
-                    if not data:
-                        break
-                    gzfile.write(data)
-            log.debug("GZip-compression to %s finished", self.filepath)
+            log.debug(
+                "%s-recompressing modified blend file %s",
+                self.compression.name,
+                self.raw_filepath,
+            )
+            self.fileobj.seek(0, os.SEEK_SET)
+            magic_compression.compress(
+                self.fileobj, self.filepath, self.compression, FILE_BUFFER_SIZE
+            )
+            log.debug("Compression to %s finished", self.filepath)
 
         # Close the file object after recompressing, as it may be a temporary
         # file that'll disappear as soon as we close it.
+        self._unmap_file()
+        self._pread_file = None
         self.fileobj.close()
         self._is_modified = False
+        self._patches = None
 
-        try:
-            del _cached_bfiles[self.filepath]
-        except KeyError:
-            pass
+        _cached_bfiles.discard(self.filepath, self)
 
     def ensure_subtype_smaller(self, sdna_index_curr, sdna_index_next) -> None:
         # never refine to a smaller type
@@ -271,15 +915,33 @@ class BlendFile:
                 )
             )
 
-    def decode_structs(self, block: "BlendFileBlock"):
+    def decode_structs(self, block: "BlendFileBlock") -> str:
         """
         DNACatalog is a catalog of all information in the DNA1 file-block
+
+        Decoded catalogs are shared between files with the same DNA1 block,
+        see the sdna_cache module.
+
+        :return: the sdna_cache key of the catalog.
         """
+        data = self.read_at(block.file_offset, block.size)
+        key = sdna_cache.cache_key(data, self.header)
+        catalog = sdna_cache.get(key)
+        if catalog is None:
+            catalog = sdna_cache.put(key, self._decode_catalog(data))
+        else:
+            self.log.debug("reusing cached DNA catalog %s", key)
+
+        self.structs.extend(catalog.structs)
+        self.sdna_index_from_id.update(catalog.sdna_index_from_id)
+        return key
+
+    def _decode_catalog(self, data: bytes) -> sdna_cache.Catalog:
+        """Decode the contents of the DNA1 block."""
         self.log.debug("building DNA catalog")
 
-        # Get some names in the local scope for faster access.
-        structs = self.structs
-        sdna_index_from_id = self.sdna_index_from_id
+        structs = []  # type: typing.List[dna.Struct]
+        sdna_index_from_id = {}  # type: typing.Dict[bytes, int]
         endian = self.header.endian
         shortstruct = endian.USHORT
         shortstruct2 = endian.USHORT2
@@ -289,7 +951,6 @@ class BlendFile:
         def pad_up_4(off: int) -> int:
             return (off + 3) & ~3
 
-        data = self.fileobj.read(block.size)
         types = []
         typenames = []
 
@@ -356,6 +1017,8 @@ class BlendFile:
                 dna_struct.append_field(field)
                 dna_offset += dna_size
 
+        return sdna_cache.Catalog(structs, sdna_index_from_id)
+
     def abspath(self, relpath: bpathlib.BlendPath) -> bpathlib.BlendPath:
         """Construct an absolute path from a blendfile-relative path."""
 
@@ -419,60 +1082,44 @@ class BlendFileBlock:
         "file_offset",
         "endian",
         "_id_name",
+        "_table_index",
+        "__weakref__",
     )
 
     log = log.getChild("BlendFileBlock")
-    old_structure = struct.Struct(b"4sI")
-    """old blend files ENDB block structure"""
 
-    def __init__(self, bfile: BlendFile) -> None:
+    def __init__(
+        self,
+        bfile: BlendFile,
+        code: bytes = b"",
+        size: int = 0,
+        addr_old: int = 0,
+        sdna_index: int = 0,
+        count: int = 0,
+        file_offset: int = 0,
+        table_index: int = -1,
+    ) -> None:
+        """Create a block from the values in its block header.
+
+        See BlendFile.iter_block_headers() for reading those values.
+
+        :param table_index: index of this block in the block table of the
+            BlendFile, or -1 if the block is not stored there.
+        """
         self.bfile = bfile
-
-        # Defaults; actual values are set by interpreting the block header.
-        self.code = b""
-        self.size = 0
-        self.addr_old = 0
-        self.sdna_index = 0
-        self.count = 0
-        self.file_offset = 0
+        self.code = code
+        self.size = size
+        self.addr_old = addr_old
+        self.sdna_index = sdna_index
+        self.count = count
+        self.file_offset = file_offset
         """Offset in bytes from start of file to beginning of the data block.
 
         Points to the data after the block header.
         """
         self.endian = bfile.header.endian
         self._id_name = ...  # type: typing.Union[None, ellipsis, bytes]
-
-        header_struct = bfile.block_header_struct
-        data = bfile.fileobj.read(header_struct.size)
-        if len(data) != header_struct.size:
-            self.log.warning(
-                "Blend file %s seems to be truncated, "
-                "expected %d bytes but could read only %d",
-                bfile.filepath,
-                header_struct.size,
-                len(data),
-            )
-            self.code = b"ENDB"
-            return
-
-        # header size can be 8, 20, or 24 bytes long
-        # 8: old blend files ENDB block (exception)
-        # 20: normal headers 32 bit platform
-        # 24: normal headers 64 bit platform
-        if len(data) <= 15:
-            self.log.debug("interpreting block as old-style ENB block")
-            blockheader = self.old_structure.unpack(data)
-            self.code = self.endian.read_data0(blockheader[0])
-            return
-
-        blockheader = header_struct.unpack(data)
-        self.code = self.endian.read_data0(blockheader[0])
-        if self.code != b"ENDB":
-            self.size = blockheader[1]
-            self.addr_old = blockheader[2]
-            self.sdna_index = blockheader[3]
-            self.count = blockheader[4]
-            self.file_offset = bfile.fileobj.tell()
+        self._table_index = table_index
 
     def __repr__(self) -> str:
         return "<%s.%s (%s), size=%d at %s>" % (
@@ -549,6 +1196,11 @@ class BlendFileBlock:
         self.bfile.ensure_subtype_smaller(sdna_index_curr, sdna_index)
         self.sdna_index = sdna_index
 
+        # Store the refined type, so that it is retained when this object is
+        # garbage-collected and the block is accessed again later.
+        if self._table_index >= 0:
+            self.bfile._table.sdna_indices[self._table_index] = sdna_index
+
     def refine_type(self, dna_type_id: bytes):
         """Change the DNA Struct associated with this block.
 
@@ -595,12 +1247,29 @@ class BlendFileBlock:
         :param return_field: When True, returns tuple (dna.Field, value).
             Otherwise just returns the value.
         """
-        self.bfile.fileobj.seek(self.file_offset, os.SEEK_SET)
+        bfile = self.bfile
+        dna_struct = bfile.structs[self.sdna_index]
+
+        # Changes kept in memory are applied by read_at(), and not visible in
+        # the memory-mapped view of the file.
+        buffer = bfile._view if bfile._patches is None else None
+        struct_offset = self.file_offset
+        if buffer is None:
+            # Only read the bytes of the field itself.
+            accessor = dna_struct.field_accessor(bfile.header, path)
+            if accessor is None:
+                buffer, struct_offset = b"", 0
+            else:
+                buffer = bfile.read_at(
+                    self.file_offset + accessor.offset, accessor.size
+                )
+                # The buffer starts at the field, not at the struct.
+                struct_offset = -accessor.offset
 
-        dna_struct = self.bfile.structs[self.sdna_index]
-        field, value = dna_struct.field_get(
-            self.bfile.header,
-            self.bfile.fileobj,
+        field, value = dna_struct.field_get_from_buffer(
+            bfile.header,
+            buffer,
+            struct_offset,
             path,
             default=default,
             null_terminated=null_terminated,
@@ -610,10 +1279,73 @@ class BlendFileBlock:
             return value, field
         return value
 
+    def get_many(
+        self,
+        paths: typing.Sequence[dna.FieldPath],
+        default=...,
+        null_terminated=True,
+        as_str=False,
+        return_field=False,
+        dereference=False,
+    ) -> typing.List[typing.Any]:
+        """Read multiple properties and return their values.
+
+        This is the same as calling get() for each path, but the data of the
+        block is read from the file only once, instead of once per property.
+
+        :param paths: the properties to read, see get().
+        :param default: The value to return for fields that do not exist.
+            Use Ellipsis (the default value) to raise a KeyError instead.
+        :param return_field: When True, returns (value, dna.Field) tuples.
+        :param dereference: When True, the values of pointer fields are
+            dereferenced, like get_pointer() does. Other fields are returned
+            as-is.
+        :returns: the values, in the same order as the paths.
+        :raises exceptions.SegmentationFault: when dereferencing a pointer to
+            an address without datablock.
+        """
+        bfile = self.bfile
+        file_header = bfile.header
+        dna_struct = bfile.structs[self.sdna_index]
+
+        buffer = bfile._view if bfile._patches is None else None
+        struct_offset = self.file_offset
+        if buffer is None:
+            # Read the bytes from the first to the last requested field.
+            accessors = [
+                accessor
+                for accessor in (
+                    dna_struct.field_accessor(file_header, path) for path in paths
+                )
+                if accessor is not None
+            ]
+            if accessors:
+                start = min(accessor.offset for accessor in accessors)
+                end = max(accessor.offset + accessor.size for accessor in accessors)
+                buffer = bfile.read_at(self.file_offset + start, end - start)
+                struct_offset = -start
+            else:
+                buffer, struct_offset = b"", 0
+
+        results = []  # type: typing.List[typing.Any]
+        for path in paths:
+            field, value = dna_struct.field_get_from_buffer(
+                file_header,
+                buffer,
+                struct_offset,
+                path,
+                default=default,
+                null_terminated=null_terminated,
+                as_str=as_str,
+            )
+            if dereference and field is not None and field.name.is_pointer:
+                value = self._dereference(path, value)
+            results.append((value, field) if return_field else value)
+        return results
+
     def raw_data(self) -> bytes:
         """Read low-level raw data of this datablock."""
-        self.bfile.fileobj.seek(self.file_offset, os.SEEK_SET)
-        return self.bfile.fileobj.read(self.size)
+        return self.bfile.read_at(self.file_offset, self.size)
 
     def as_string(self) -> str:
         """Interpret the bytes of this datablock as null-terminated utf8 string."""
@@ -675,27 +1407,64 @@ class BlendFileBlock:
         Generates a 'hash' that can be used instead of addr_old as block id,
         which should be 'stable' across .blend file load & save (i.e. it does
         not changes due to pointer addresses variations).
-        """
-        # TODO This implementation is most likely far from optimal... and CRC32
-        # is not kown as the best hashing algo either. But for now does the job!
-        import zlib
 
-        dna_type = self.dna_type
-        pointer_size = self.bfile.header.pointer_size
+        See the block_hash module for the full digest, and for hashing
+        entire files.
+        """
+        from . import block_hash
 
-        hsh = 1
-        for path, value in self.items_recursive():
-            field, _ = dna_type.field_from_path(pointer_size, path)
-            if field.name.is_pointer:
-                continue
-            hsh = zlib.adler32(str(value).encode(), hsh)
-        return hsh
+        return int.from_bytes(block_hash.block_digest(self)[:8], "little")
 
     def set(self, path: bytes, value):
-        dna_struct = self.bfile.structs[self.sdna_index]
-        self.bfile.mark_modified()
-        self.bfile.fileobj.seek(self.file_offset, os.SEEK_SET)
-        return dna_struct.field_set(self.bfile.header, self.bfile.fileobj, path, value)
+        """Change a property.
+
+        Files that are opened read-only are not written to. Within
+        BlendFile.patch_mode() the change is kept in memory instead, see
+        BlendFile.write_to().
+
+        :returns: the number of bytes written.
+        :raises io.UnsupportedOperation: when the file is opened read-only,
+            and not in patch mode.
+        """
+        bfile = self.bfile
+        dna_struct = bfile.structs[self.sdna_index]
+        with bfile._lock:
+            if self._touches_id_name(dna_struct, path):
+                # The ID name is cached per block and in the index of
+                # BlendFile.find_blocks_from_id_name().
+                self._id_name = ...
+                bfile._id_name_index = None
+
+            if not bfile.is_writable:
+                if not bfile._patch_mode:
+                    raise io.UnsupportedOperation(
+                        "%s is opened read-only; use patch_mode() to keep "
+                        "changes in memory" % bfile.filepath
+                    )
+                if bfile._patches is None:
+                    bfile._patches = overlay.PatchOverlay()
+                bfile._patches.seek(self.file_offset, os.SEEK_SET)
+                return dna_struct.field_set(
+                    bfile.header, bfile._patches, path, value
+                )
+
+            if bfile._handles_closed:
+                bfile._reopen()
+            bfile.mark_modified()
+            bfile.fileobj.seek(self.file_offset, os.SEEK_SET)
+            result = dna_struct.field_set(bfile.header, bfile.fileobj, path, value)
+            # Make the new value visible to os.pread().
+            bfile.fileobj.flush()
+        return result
+
+    def _touches_id_name(self, dna_struct: dna.Struct, path: bytes) -> bool:
+        """Return whether setting the field changes the ID name of this block."""
+        file_header = self.bfile.header
+        name = dna_struct.field_accessor(file_header, (b"id", b"name"))
+        if name is None:
+            return False
+        field, offset = dna_struct.field_from_path(file_header.pointer_size, path)
+        return offset < name.offset + name.size and name.offset < offset + field.size
 
     def get_pointer(
         self,
@@ -707,8 +1476,11 @@ class BlendFileBlock:
         :raises exceptions.SegmentationFault: when there is no datablock with
             the pointed-to address.
         """
-        result = self.get(path, default=default)
+        return self._dereference(path, self.get(path, default=default))
 
+    def _dereference(
+        self, path: dna.FieldPath, result: typing.Any
+    ) -> typing.Union[None, "BlendFileBlock"]:
         # If it's not an integer, we have no pointer to follow and this may
         # actually be a non-pointer property.
         if type(result) is not int:
@@ -744,22 +1516,9 @@ class BlendFileBlock:
         assert array.code == b"DATA", (
             "Array data block should have code DATA, is %r" % array.code.decode()
         )
-        file_offset = array.file_offset
-
-        endian = self.bfile.header.endian
-        ps = self.bfile.header.pointer_size
-
-        for i in range(array_size):
-            fileobj = self.bfile.fileobj
-            fileobj.seek(file_offset + ps * i, os.SEEK_SET)
-            address = endian.read_pointer(fileobj, ps)
-            if address == 0:
-                continue
-            dereferenced = self.bfile.dereference_pointer(address)
-            if dereferenced is None:
-                # This can happen when strict pointer mode is disabled.
-                continue
-            yield dereferenced
+        bfile = self.bfile
+        addresses = bfile.read_pointers_at(array.file_offset, array_size)
+        yield from bfile.dereference_pointers(addresses)
 
     def iter_fixed_array_of_pointers(
         self, path: dna.FieldPath
@@ -778,24 +1537,15 @@ class BlendFileBlock:
 
         dna_struct = self.dna_type
         ps = self.bfile.header.pointer_size
-        endian = self.bfile.header.endian
-        fileobj = self.bfile.fileobj
 
         field, offset_in_struct = dna_struct.field_from_path(ps, path)
         array_size = field.size // ps
+        array_offset = self.file_offset + offset_in_struct
 
-        for i in range(array_size):
-            fileobj.seek(self.file_offset + offset_in_struct + ps * i, os.SEEK_SET)
-            address = endian.read_pointer(fileobj, ps)
-            if not address:
-                # Fixed-size arrays contain 0-pointers.
-                continue
-
-            dereferenced = self.bfile.dereference_pointer(address)
-            if dereferenced is None:
-                # This can happen when strict pointer mode is disabled.
-                continue
-            yield dereferenced
+        # Fixed-size arrays contain 0-pointers, which are skipped.
+        bfile = self.bfile
+        addresses = bfile.read_pointers_at(array_offset, array_size)
+        yield from bfile.dereference_pointers(addresses)
 
     def __getitem__(self, path: dna.FieldPath):
         return self.get(path)
@@ -824,10 +1574,77 @@ class BlendFileBlock:
     def items_recursive(
         self,
     ) -> typing.Iterator[typing.Tuple[dna.FieldPath, typing.Any]]:
-        """Generator, yields (property path, property value) recursively for all properties."""
+        """Iterate over (property path, property value) of all properties.
+
+        Properties of nested structs are included, see decode(). When the
+        block is smaller than its DNA struct, the properties are read one by
+        one with get() instead.
+        """
+        records = self.decode_all(limit=1)
+        if records:
+            yield from records[0].items()
+            return
+
         for k in self.keys():
             yield from self.get_recursive_iter(k, as_str=False)
 
+    def decode(
+        self, as_str=False, null_terminated=True, numpy_min_items=None
+    ) -> typing.Dict[dna.FieldPath, typing.Any]:
+        """Decode all properties of the block at once.
+
+        Properties of nested structs are decoded recursively, see the record
+        module. This reads the block once, and is much faster than calling
+        get() for each property. When the block contains multiple structs,
+        only the first one is decoded; use decode_all() to decode them all.
+
+        :param numpy_min_items: return numeric arrays with at least this many
+            items as NumPy arrays, when NumPy is installed.
+        :returns: a {property path: value} dict. Arrays of pointers are
+            returned as lists, and properties of unsupported types as their
+            type name between pointy brackets.
+        """
+        records = self.decode_all(as_str, null_terminated, numpy_min_items, limit=1)
+        if not records:
+            raise ValueError(
+                "%r is too small for its DNA struct %s" % (self, self.dna_type_name)
+            )
+        return records[0]
+
+    def decode_all(
+        self, as_str=False, null_terminated=True, numpy_min_items=None, limit=None
+    ) -> typing.List[typing.Dict[dna.FieldPath, typing.Any]]:
+        """Decode all structs in the block, see decode().
+
+        :param limit: decode at most this many structs.
+        :returns: one dict per struct in the block. Structs that do not fit
+            in the block are skipped.
+        """
+        from . import record
+
+        bfile = self.bfile
+        dna_struct = bfile.structs[self.sdna_index]
+        decoder = record.decoder(dna_struct, bfile.header)
+        data = self.raw_data()
+
+        stride = dna_struct.size
+        count = self.count
+        if stride:
+            fitting = (len(data) - decoder.size) // stride + 1
+            count = max(min(count, fitting), 0)
+        if limit is not None:
+            count = min(count, limit)
+        return [
+            decoder.decode_dict(
+                data,
+                index * stride,
+                as_str=as_str,
+                null_terminated=null_terminated,
+                numpy_min_items=numpy_min_items,
+            )
+            for index in range(count)
+        ]
+
 
 def set_strict_pointer_mode(strict_pointers: bool) -> None:
     """Control behaviour when a pointer to unknown memory is dereferenced.
@@ -0,0 +1,100 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Pointer-independent hashing of blocks and blend files.
+
+Pointers are memory addresses from the Blender session that wrote the file, so
+they change every time a file is saved, even when nothing else changed. The
+hashes computed here ignore them: the pointer bytes of each block are zeroed,
+using a mask per DNA struct, before the block is hashed with BLAKE2.
+
+The mask is only applied to blocks that consist of whole DNA structs. Other
+blocks, such as DATA blocks containing raw arrays, are hashed as-is.
+"""
+import hashlib
+import typing
+
+from . import BlendFile, BlendFileBlock
+
+DIGEST_SIZE = 16
+
+
+def block_digest(block: BlendFileBlock) -> bytes:
+    """Return the pointer-independent digest of the block's data."""
+    if block._table_index < 0:
+        # The block is not in the block table of its file.
+        return _digest(block.bfile, block.raw_data(), block.sdna_index, block.count)
+    return _digest_at(block.bfile, block._table_index)
+
+
+def iter_digests(
+    bfile: BlendFile,
+) -> typing.Iterator[typing.Tuple[BlendFileBlock, bytes]]:
+    """Generator, yield (block, digest) for all blocks of the file, in disk order.
+
+    This can be used to find out which blocks changed between saves of a
+    blend file. As the digests do not depend on pointers, blocks have to be
+    matched by other means, for example by their code and ID name.
+    """
+    for index in range(len(bfile._table)):
+        yield bfile._block_at(index), _digest_at(bfile, index)
+
+
+def file_digest(bfile: BlendFile) -> bytes:
+    """Return a pointer-independent digest of the entire blend file.
+
+    Two saves of a blend file have the same digest when they contain the
+    same blocks with the same data, in the same order. The file header, which
+    includes the Blender version, is included as well.
+    """
+    table = bfile._table
+    hasher = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    file_header = bfile.header
+    hasher.update(
+        b"%d%s%d\0"
+        % (file_header.pointer_size, file_header.endian_str, file_header.version)
+    )
+    for index in range(len(table)):
+        size, count = table.sizes[index], table.counts[index]
+        hasher.update(b"%s\0%d\0%d\0" % (table.code(index), size, count))
+        hasher.update(_digest_at(bfile, index))
+    return hasher.digest()
+
+
+def _digest_at(bfile: BlendFile, index: int) -> bytes:
+    """Return the digest of the block at this index of the block table."""
+    table = bfile._table
+    data = bfile.read_at(table.offsets[index], table.sizes[index])
+    return _digest(bfile, data, table.sdna_indices[index], table.counts[index])
+
+
+def _digest(bfile: BlendFile, data: bytes, sdna_index: int, count: int) -> bytes:
+    """Return the digest of block data, with the pointers of its struct zeroed."""
+    size = len(data)
+    mask = None
+    if sdna_index < len(bfile.structs):
+        mask = bfile.structs[sdna_index].pointer_mask(bfile.header.pointer_size)
+    if mask is not None and len(mask) * count == size:
+        # Zero the pointers with a single AND of (very) big integers.
+        if count > 1:
+            mask *= count
+        masked = int.from_bytes(data, "little") & int.from_bytes(mask, "little")
+        data = masked.to_bytes(size, "little")
+
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
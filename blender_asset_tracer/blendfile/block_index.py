@@ -0,0 +1,277 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""On-disk cache of the block tables of blend files.
+
+Scanning the block headers of a large blend file takes time, and has to be
+done every time the file is opened. After a file has been scanned, its block
+table can be stored in an index file. Opening the same, unchanged, file again
+then loads the block table from the index instead of scanning the file.
+
+An index file is only used when the path, size, modification time, and inode
+number of the blend file are unchanged. Index files do not contain the decoded
+SDNA, only the keys of the sdna_cache catalogs; when those are no longer
+cached, the DNA1 block is decoded again. The arrays of the block table are
+stored as raw little-endian data, after a versioned header and JSON metadata.
+
+The total size of the index files is limited; when it is exceeded, the least
+recently used index files are removed. The cache is disabled by default; call
+set_disk_cache() to enable it.
+"""
+import array
+import collections
+import hashlib
+import json
+import logging
+import pathlib
+import struct
+import sys
+import typing
+
+from . import block_table, cache_dir
+
+CACHE_ROOT = pathlib.Path().home() / ".cache/blender-asset-tracer/block-index"
+DEFAULT_MAX_BYTES = 512 * 2**20
+
+# Increase this when the on-disk format changes, to ignore index files stored
+# by older versions of BAT. Version 1 index files were pickled BlockTables.
+FORMAT_VERSION = 2
+
+SUFFIX = ".blockindex"
+
+# An index file starts with this header: the magic bytes, the format version,
+# and the size of the JSON metadata that follows. After the metadata come the
+# _TABLE_ARRAYS, and then the indices of the blocks per code, all as
+# little-endian arrays.
+MAGIC = b"BATBLKIX"
+_HEADER = struct.Struct("<8sII")
+_TABLE_ARRAYS = (
+    ("codes", "H"),
+    ("sizes", "Q"),
+    ("addrs", "Q"),
+    ("sdna_indices", "I"),
+    ("counts", "I"),
+    ("offsets", "Q"),
+)
+_INDEX_TYPECODE = "I"
+
+log = logging.getLogger(__name__)
+
+Index = collections.namedtuple("Index", "table catalog_keys")
+"""Stored block index of a blend file.
+
+:ivar table: the block_table.BlockTable of the file.
+:ivar catalog_keys: sdna_cache keys of the DNA1 blocks, in disk order.
+"""
+
+FileKey = typing.Tuple[str, int, int, int]
+
+_cache_root = None  # type: typing.Optional[pathlib.Path]
+_max_bytes = DEFAULT_MAX_BYTES
+
+
+class _InvalidIndex(ValueError):
+    """Raised when the contents of an index file cannot be decoded."""
+
+
+def set_disk_cache(
+    root: typing.Optional[pathlib.Path], max_bytes: int = DEFAULT_MAX_BYTES
+) -> None:
+    """Store block indices in this directory, or disable with None.
+
+    Use CACHE_ROOT for the default location.
+
+    :param max_bytes: maximum total size of the index files. When this is
+        exceeded, the least recently used index files are removed.
+    """
+    global _cache_root, _max_bytes
+    _cache_root = root
+    _max_bytes = max_bytes
+
+
+def is_enabled() -> bool:
+    return _cache_root is not None
+
+
+def file_key(path: pathlib.Path) -> FileKey:
+    """Return the values that identify this version of the blend file."""
+    stat = path.stat()
+    return str(path.absolute()), stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+def load(key: FileKey) -> typing.Optional[Index]:
+    """Return the stored index of the blend file, or None if there is none."""
+    path = _index_path(key)
+    if path is None:
+        return None
+
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    except OSError as ex:
+        log.warning("Unable to read block index %s: %s", path, ex)
+        return None
+
+    try:
+        version, metadata, arrays_data = _split(data)
+    except _InvalidIndex as ex:
+        if data[:1] == b"\x80":
+            # Pickle protocol 2+, as written by format version 1.
+            log.debug("Ignoring outdated block index %s", path)
+        else:
+            log.warning("Unable to read block index %s: %s", path, ex)
+        return None
+    if version != FORMAT_VERSION:
+        log.debug("Ignoring outdated block index %s", path)
+        return None
+
+    try:
+        stored_key = tuple(metadata["key"])
+        if stored_key != key:
+            # The blend file was changed since the index was written.
+            log.debug("Ignoring stale block index %s", path)
+            return None
+        table = _decode_table(metadata, arrays_data)
+        catalog_keys = [str(catalog_key) for catalog_key in metadata["catalog_keys"]]
+    except (_InvalidIndex, KeyError, TypeError, ValueError) as ex:
+        log.warning("Unable to read block index %s: %s", path, ex)
+        return None
+
+    # Mark as recently used, for the eviction in save().
+    cache_dir.touch(path)
+
+    log.debug("Loaded block index of %s from %s", key[0], path)
+    return Index(table, catalog_keys)
+
+
+def save(key: FileKey, index: Index) -> None:
+    """Store the index of the blend file, replacing any previous index."""
+    path = _index_path(key)
+    if path is None:
+        return
+
+    table = index.table
+    metadata = {
+        "key": list(key),
+        "catalog_keys": list(index.catalog_keys),
+        "num_blocks": len(table),
+        "code_names": [code.hex() for code in table.code_names],
+        "code_counts": [len(table.by_code[code]) for code in table.code_names],
+        "itemsizes": _itemsizes(),
+    }
+    metadata_bytes = json.dumps(metadata).encode("utf8")
+    arrays = [getattr(table, name) for name, _ in _TABLE_ARRAYS]
+    arrays.extend(table.by_code[code] for code in table.code_names)
+
+    try:
+        with cache_dir.atomic_write(path) as outfile:
+            outfile.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(metadata_bytes)))
+            outfile.write(metadata_bytes)
+            for values in arrays:
+                outfile.write(_to_little_endian(values).tobytes())
+    except OSError as ex:
+        log.warning("Unable to write block index %s: %s", path, ex)
+        return
+    log.debug("Stored block index of %s in %s", key[0], path)
+
+    assert _cache_root is not None
+    cache_dir.evict(_cache_root, SUFFIX, _max_bytes)
+
+
+def clear() -> None:
+    """Remove all index files from the cache directory."""
+    if _cache_root is None:
+        return
+    for path, _ in cache_dir.files(_cache_root, SUFFIX):
+        cache_dir.remove(path)
+
+
+def _index_path(key: FileKey) -> typing.Optional[pathlib.Path]:
+    if _cache_root is None:
+        return None
+    digest = hashlib.blake2b(key[0].encode("utf8"), digest_size=20).hexdigest()
+    return _cache_root / (digest + SUFFIX)
+
+
+def _split(data: bytes) -> typing.Tuple[int, typing.Dict[str, typing.Any], memoryview]:
+    """Split the index file into its format version, metadata, and arrays."""
+    if len(data) < _HEADER.size:
+        raise _InvalidIndex("file is too short")
+    magic, version, metadata_size = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise _InvalidIndex("not a block index")
+
+    metadata_end = _HEADER.size + metadata_size
+    try:
+        metadata = json.loads(data[_HEADER.size : metadata_end].decode("utf8"))
+    except ValueError as ex:  # Also covers UnicodeDecodeError.
+        raise _InvalidIndex("invalid metadata: %s" % ex) from None
+    if not isinstance(metadata, dict):
+        raise _InvalidIndex("invalid metadata")
+    return version, metadata, memoryview(data)[metadata_end:]
+
+
+def _decode_table(
+    metadata: typing.Dict[str, typing.Any], arrays_data: memoryview
+) -> block_table.BlockTable:
+    if metadata["itemsizes"] != _itemsizes():
+        # Written on a platform with different C types.
+        raise _InvalidIndex("unsupported array item sizes")
+
+    num_blocks = int(metadata["num_blocks"])
+    code_names = [bytes.fromhex(code) for code in metadata["code_names"]]
+    code_counts = [int(count) for count in metadata["code_counts"]]
+    if len(code_names) != len(code_counts):
+        raise _InvalidIndex("mismatch between code names and counts")
+
+    offset = 0
+
+    def read_array(typecode: str, length: int) -> array.array:
+        nonlocal offset
+        values = array.array(typecode)
+        end = offset + length * values.itemsize
+        if length < 0 or end > len(arrays_data):
+            raise _InvalidIndex("file is too short")
+        values.frombytes(arrays_data[offset:end])
+        offset = end
+        return _to_little_endian(values)
+
+    arrays = [read_array(typecode, num_blocks) for _, typecode in _TABLE_ARRAYS]
+    by_code = {
+        code: read_array(_INDEX_TYPECODE, count)
+        for code, count in zip(code_names, code_counts)
+    }
+    if offset != len(arrays_data):
+        raise _InvalidIndex("unexpected data at end of file")
+    return block_table.BlockTable.from_arrays(code_names, *arrays, by_code=by_code)
+
+
+def _itemsizes() -> typing.Dict[str, int]:
+    typecodes = {typecode for _, typecode in _TABLE_ARRAYS} | {_INDEX_TYPECODE}
+    return {typecode: array.array(typecode).itemsize for typecode in sorted(typecodes)}
+
+
+def _to_little_endian(values: array.array) -> array.array:
+    """Return the array in little-endian byte order, or back to native order."""
+    if sys.byteorder == "little":
+        return values
+    swapped = array.array(values.typecode, values)
+    swapped.byteswap()
+    return swapped
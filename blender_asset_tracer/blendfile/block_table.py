@@ -0,0 +1,293 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Compact storage of the block headers of a blend file.
+
+Production files can contain hundreds of thousands of data blocks. Instead of
+keeping a BlendFileBlock object alive for each of them, the header values are
+stored in arrays. BlendFileBlock objects are only created when they are
+accessed, via the collection classes in this module.
+"""
+import array
+import bisect
+import collections.abc
+import typing
+
+_empty_indices = array.array("I")
+
+
+class BlockTable:
+    """Struct-of-arrays storage of block headers, in disk order.
+
+    Block codes are stored as an index into `code_names`, so that each distinct
+    code is stored only once.
+    """
+
+    def __init__(self) -> None:
+        self.code_names = []  # type: typing.List[bytes]
+        self._code_ids = {}  # type: typing.Dict[bytes, int]
+        self.codes = array.array("H")
+        self.sizes = array.array("Q")
+        self.addrs = array.array("Q")
+        self.sdna_indices = array.array("I")
+        self.counts = array.array("I")
+        self.offsets = array.array("Q")
+
+        self.by_code = {}  # type: typing.Dict[bytes, array.array]
+        """Mapping from block code to the indices of blocks with that code."""
+
+        # Addresses in sorted order, and the block index for each address.
+        # Built on the first address lookup.
+        self._sorted_addrs = None  # type: typing.Optional[array.array]
+        self._sorted_indices = None  # type: typing.Optional[array.array]
+
+    @classmethod
+    def from_arrays(
+        cls,
+        code_names: typing.List[bytes],
+        codes: array.array,
+        sizes: array.array,
+        addrs: array.array,
+        sdna_indices: array.array,
+        counts: array.array,
+        offsets: array.array,
+        by_code: typing.Dict[bytes, array.array],
+    ) -> "BlockTable":
+        """Construct a table from its arrays, for example as read from disk.
+
+        The arrays are used as-is; they must have the same type codes as
+        those of a new BlockTable.
+        """
+        table = cls()
+        table.code_names = list(code_names)
+        table._code_ids = {code: code_id for code_id, code in enumerate(code_names)}
+        table.codes = codes
+        table.sizes = sizes
+        table.addrs = addrs
+        table.sdna_indices = sdna_indices
+        table.counts = counts
+        table.offsets = offsets
+        table.by_code = by_code
+        return table
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def extend(self, headers: typing.Iterable[typing.Tuple]) -> None:
+        """Append blocks from their header values.
+
+        :param headers: (code, size, addr_old, sdna_index, count, file_offset)
+            tuples, as produced by BlendFile.iter_block_headers().
+        """
+
+        # Get some names in the local scope for faster access.
+        code_ids = self._code_ids
+        by_code = self.by_code
+        codes_append = self.codes.append
+        sizes_append = self.sizes.append
+        addrs_append = self.addrs.append
+        sdna_append = self.sdna_indices.append
+        counts_append = self.counts.append
+        offsets_append = self.offsets.append
+
+        index = len(self)
+        for code, size, addr_old, sdna_index, count, file_offset in headers:
+            try:
+                code_id = code_ids[code]
+            except KeyError:
+                code_id = code_ids[code] = len(self.code_names)
+                self.code_names.append(code)
+                by_code[code] = array.array("I")
+
+            codes_append(code_id)
+            sizes_append(size)
+            addrs_append(addr_old)
+            sdna_append(sdna_index)
+            counts_append(count)
+            offsets_append(file_offset)
+            by_code[code].append(index)
+            index += 1
+
+        self._sorted_addrs = None
+        self._sorted_indices = None
+
+    def code(self, index: int) -> bytes:
+        return self.code_names[self.codes[index]]
+
+    def indices_for_code(self, code: bytes) -> array.array:
+        return self.by_code.get(code, _empty_indices)
+
+    def find_address(self, address: int) -> typing.Optional[int]:
+        """Return the index of the block with this address, or None.
+
+        When multiple blocks share the same address, the last one in disk
+        order is returned.
+        """
+        if self._sorted_addrs is None:
+            self._build_address_index()
+        sorted_addrs = self._sorted_addrs
+        assert sorted_addrs is not None and self._sorted_indices is not None
+
+        pos = bisect.bisect_right(sorted_addrs, address) - 1
+        if pos < 0 or sorted_addrs[pos] != address:
+            return None
+        return self._sorted_indices[pos]
+
+    def iter_addresses(self) -> typing.Iterator[int]:
+        """Generator, yield each distinct block address in ascending order."""
+        if self._sorted_addrs is None:
+            self._build_address_index()
+        last = None
+        for address in self._sorted_addrs:  # type: ignore
+            if address != last:
+                yield address
+                last = address
+
+    def _build_address_index(self) -> None:
+        addrs = self.addrs
+        # sorted() is stable, so blocks with the same address stay in disk
+        # order; find_address() relies on this.
+        order = sorted(range(len(addrs)), key=addrs.__getitem__)
+        self._sorted_indices = array.array("I", order)
+        self._sorted_addrs = array.array("Q", (addrs[index] for index in order))
+
+
+class BlockSequence(collections.abc.Sequence):
+    """Read-only sequence of blocks, created when they are accessed.
+
+    :param bfile: the BlendFile that owns the blocks.
+    :param indices: indices into the block table, or None for all blocks.
+    """
+
+    __slots__ = ("_bfile", "_indices")
+
+    def __init__(self, bfile, indices: typing.Optional[array.array] = None) -> None:
+        self._bfile = bfile
+        self._indices = indices
+
+    def __len__(self) -> int:
+        if self._indices is None:
+            return len(self._bfile._table)
+        return len(self._indices)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[index] for index in range(*item.indices(len(self)))]
+        if item < 0:
+            item += len(self)
+            if item < 0:
+                raise IndexError("block index out of range")
+        if self._indices is None:
+            if item >= len(self._bfile._table):
+                raise IndexError("block index out of range")
+            return self._bfile._block_at(item)
+        return self._bfile._block_at(self._indices[item])
+
+    def __iter__(self):
+        block_at = self._bfile._block_at
+        if self._indices is None:
+            return (block_at(index) for index in range(len(self._bfile._table)))
+        return (block_at(index) for index in self._indices)
+
+    def __repr__(self) -> str:
+        return "<%s of %d blocks>" % (type(self).__qualname__, len(self))
+
+
+class CodeIndex(collections.abc.Mapping):
+    """Mapping from block code to the BlockSequence of blocks with that code.
+
+    Like a defaultdict(list), unknown codes map to an empty sequence.
+    """
+
+    __slots__ = ("_bfile",)
+
+    def __init__(self, bfile) -> None:
+        self._bfile = bfile
+
+    def __getitem__(self, code: bytes) -> BlockSequence:
+        return BlockSequence(self._bfile, self._bfile._table.indices_for_code(code))
+
+    def get(self, code, default=None):
+        if code not in self._bfile._table.by_code:
+            return default
+        return self[code]
+
+    def __contains__(self, code) -> bool:
+        return code in self._bfile._table.by_code
+
+    def __iter__(self) -> typing.Iterator[bytes]:
+        return iter(self._bfile._table.by_code)
+
+    def __len__(self) -> int:
+        return len(self._bfile._table.by_code)
+
+
+class AddressIndex(collections.abc.MutableMapping):
+    """Mapping from block address to block.
+
+    Lookups are done via the sorted address index of the block table.
+    Assignments and deletions are kept in an overlay, and do not change the
+    block table itself.
+    """
+
+    __slots__ = ("_bfile", "_overlay")
+
+    def __init__(self, bfile) -> None:
+        self._bfile = bfile
+        self._overlay = {}  # type: typing.Dict[int, typing.Any]
+
+    def __getitem__(self, address: int):
+        block = self._overlay.get(address, ...)
+        if block is ...:
+            index = self._bfile._table.find_address(address)
+            if index is None:
+                raise KeyError(address)
+            return self._bfile._block_at(index)
+
+        if block is None:
+            # The address was deleted.
+            raise KeyError(address)
+        return block
+
+    def __contains__(self, address) -> bool:
+        try:
+            block = self._overlay[address]
+        except KeyError:
+            return self._bfile._table.find_address(address) is not None
+        return block is not None
+
+    def __setitem__(self, address: int, block) -> None:
+        self._overlay[address] = block
+
+    def __delitem__(self, address: int) -> None:
+        if address not in self:
+            raise KeyError(address)
+        self._overlay[address] = None
+
+    def __iter__(self) -> typing.Iterator[int]:
+        overlay = self._overlay
+        for address in self._bfile._table.iter_addresses():
+            if overlay.get(address, ...) is not None:
+                yield address
+        for address, block in overlay.items():
+            if block is not None and self._bfile._table.find_address(address) is None:
+                yield address
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
@@ -0,0 +1,132 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Size-limited cache directories, shared between processes.
+
+Files in a cache directory are written atomically, by writing to a temporary
+file in the same directory and renaming it. Their modification time is used
+to track when they were last used, so that the least recently used files can
+be removed when the directory grows too large.
+"""
+import contextlib
+import logging
+import os
+import pathlib
+import tempfile
+import time
+import typing
+
+log = logging.getLogger(__name__)
+
+TMP_SUFFIX = ".tmp"
+
+# Temporary files older than this are assumed to be left behind by a crashed
+# process, and are removed on eviction.
+STALE_TMP_SECONDS = 24 * 3600
+
+
+def files(
+    root: pathlib.Path, suffix: str
+) -> typing.List[typing.Tuple[pathlib.Path, os.stat_result]]:
+    """Return the files with the given suffix, with their stat results."""
+    found = []
+    try:
+        with os.scandir(str(root)) as entries:
+            for entry in entries:
+                if not entry.name.endswith(suffix):
+                    continue
+                try:
+                    found.append((pathlib.Path(entry.path), entry.stat()))
+                except FileNotFoundError:
+                    # Removed by another process.
+                    continue
+    except FileNotFoundError:
+        pass
+    return found
+
+
+@contextlib.contextmanager
+def atomic_write(path: pathlib.Path) -> typing.Iterator[typing.IO[bytes]]:
+    """Context manager, write a file that appears at `path` when done.
+
+    The file is written to a temporary file in the same directory, which
+    replaces `path` only when the context exits without exception. Other
+    processes thus never see a partially written file. The directory is
+    created when necessary.
+
+    :raises OSError: when the file cannot be written.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmpname = tempfile.mkstemp(dir=str(path.parent), suffix=TMP_SUFFIX)
+    try:
+        with os.fdopen(fd, "wb") as outfile:
+            yield outfile
+        # Concurrent processes may do the same; as they write the same data,
+        # it doesn't matter which one wins.
+        os.replace(tmpname, str(path))
+    except BaseException:
+        remove(pathlib.Path(tmpname))
+        raise
+
+
+def touch(path: pathlib.Path) -> None:
+    """Mark the file as recently used."""
+    try:
+        os.utime(str(path))
+    except OSError:
+        pass
+
+
+def remove(path: pathlib.Path) -> bool:
+    """Remove the file, returning whether that succeeded.
+
+    Files can disappear because another process removed them, and on Windows
+    files that are still open cannot be removed; neither is an error.
+    """
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        return False
+    except OSError as ex:
+        log.debug("Unable to remove %s: %s", path, ex)
+        return False
+    return True
+
+
+def evict(root: pathlib.Path, suffix: str, max_bytes: int) -> None:
+    """Remove the least recently used files until they fit in max_bytes."""
+    cache_files = files(root, suffix)
+    total_bytes = sum(stat.st_size for _, stat in cache_files)
+
+    stale_before = time.time() - STALE_TMP_SECONDS
+    for path, stat in files(root, TMP_SUFFIX):
+        if stat.st_mtime < stale_before:
+            log.debug("Removing stale temporary file %s", path)
+            remove(path)
+
+    if total_bytes <= max_bytes:
+        return
+
+    cache_files.sort(key=lambda item: item[1].st_mtime_ns)
+    for path, stat in cache_files:
+        if total_bytes <= max_bytes:
+            break
+        log.debug("Evicting %s", path)
+        if remove(path):
+            total_bytes -= stat.st_size
@@ -0,0 +1,166 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""On-disk cache of decompressed blend files.
+
+Compressed blend files have to be decompressed every time they are opened.
+With this cache enabled, the decompressed file is kept on disk, and reused by
+later BAT invocations as long as the compressed file is unchanged. This is
+used by magic_compression.open() for files that are opened read-only.
+
+A cached file is identified by the path, size, and modification time of the
+compressed file, and a hash of its first HASH_PREFIX_SIZE bytes. The total
+size of the cache is limited; when it is exceeded, the least recently used
+files are removed. Files are written atomically, so the cache can be shared
+by concurrently running processes.
+
+The cache is disabled by default; call set_disk_cache() to enable it.
+"""
+import hashlib
+import logging
+import os
+import pathlib
+import tempfile
+import typing
+
+from . import cache_dir
+
+CACHE_ROOT = pathlib.Path().home() / ".cache/blender-asset-tracer/decompressed"
+DEFAULT_MAX_BYTES = 10 * 2**30
+HASH_PREFIX_SIZE = 2**20
+SUFFIX = ".blend"
+
+log = logging.getLogger(__name__)
+
+_cache_root = None  # type: typing.Optional[pathlib.Path]
+_max_bytes = DEFAULT_MAX_BYTES
+
+Decompressor = typing.Callable[[typing.IO[bytes]], None]
+"""Function that writes the decompressed file to the given file object."""
+
+
+def set_disk_cache(
+    root: typing.Optional[pathlib.Path], max_bytes: int = DEFAULT_MAX_BYTES
+) -> None:
+    """Store decompressed blend files in this directory, or disable with None.
+
+    Use CACHE_ROOT for the default location.
+
+    :param max_bytes: maximum total size of the cached files. When this is
+        exceeded, the least recently used files are removed.
+    """
+    global _cache_root, _max_bytes
+    _cache_root = root
+    _max_bytes = max_bytes
+
+
+def is_enabled() -> bool:
+    return _cache_root is not None
+
+
+def cache_key(path: pathlib.Path, compressed_file: typing.IO[bytes]) -> str:
+    """Compute the cache key of the compressed file.
+
+    :param compressed_file: the opened compressed file. Its file position is
+        changed.
+    """
+    stat = os.fstat(compressed_file.fileno())
+    compressed_file.seek(0, os.SEEK_SET)
+    prefix = compressed_file.read(HASH_PREFIX_SIZE)
+
+    hasher = hashlib.blake2b(digest_size=20)
+    identity = "%s\0%d\0%d\0" % (path.absolute(), stat.st_size, stat.st_mtime_ns)
+    hasher.update(identity.encode("utf8"))
+    hasher.update(prefix)
+    return hasher.hexdigest()
+
+
+def open_cached(
+    key: str, decompress: Decompressor, buffer_size: int
+) -> typing.Optional[typing.Tuple[pathlib.Path, typing.IO[bytes]]]:
+    """Open the cached decompressed file, storing it first if necessary.
+
+    :param key: the key returned by cache_key().
+    :param decompress: called to write the decompressed file on a cache miss.
+        Exceptions it raises are propagated, and nothing is cached.
+    :return: (path, fileobj) of the opened decompressed file, or None when
+        the cache is disabled or cannot be written.
+    """
+    if _cache_root is None:
+        return None
+    path = _cache_root / (key + SUFFIX)
+
+    try:
+        fileobj = path.open("rb", buffering=buffer_size)
+    except FileNotFoundError:
+        stored = _store(path, decompress, buffer_size)
+        if stored is None:
+            return None
+        return path, stored
+
+    log.debug("Using cached decompressed file %s", path)
+    cache_dir.touch(path)
+    return path, fileobj
+
+
+def clear() -> None:
+    """Remove all cached files."""
+    if _cache_root is None:
+        return
+    for path, _ in cache_dir.files(_cache_root, SUFFIX):
+        cache_dir.remove(path)
+
+
+def _store(
+    path: pathlib.Path, decompress: Decompressor, buffer_size: int
+) -> typing.Optional[typing.IO[bytes]]:
+    """Decompress into the cache, and open the result.
+
+    :return: the opened file, or None if it could not be stored.
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(
+            dir=str(path.parent), suffix=cache_dir.TMP_SUFFIX
+        )
+    except OSError as ex:
+        log.warning("Unable to write to decompressed file cache %s: %s", path, ex)
+        return None
+
+    try:
+        with os.fdopen(fd, "wb") as outfile:
+            decompress(outfile)
+        # Concurrent processes may do the same; as they write the same data,
+        # it doesn't matter which one wins.
+        os.replace(tmpname, str(path))
+        fileobj = path.open("rb", buffering=buffer_size)
+    except OSError as ex:
+        cache_dir.remove(pathlib.Path(tmpname))
+        log.warning("Unable to write to decompressed file cache %s: %s", path, ex)
+        return None
+    except BaseException:
+        cache_dir.remove(pathlib.Path(tmpname))
+        raise
+    log.debug("Stored decompressed file %s", path)
+
+    # Evict after opening, so that the file remains readable even when it is
+    # evicted itself.
+    assert _cache_root is not None
+    cache_dir.evict(_cache_root, SUFFIX, _max_bytes)
+    return fileobj
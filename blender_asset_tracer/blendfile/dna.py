@@ -19,8 +19,10 @@
 # (c) 2009, At Mind B.V. - Jeroen Bakker
 # (c) 2014, Blender Foundation - Campbell Barton
 # (c) 2018, Blender Foundation - Sybren A. Stüvel
+import collections
 import logging
 import os
+import struct
 import typing
 
 from . import header, exceptions
@@ -30,6 +32,35 @@ FieldPath = typing.Union[bytes, typing.Iterable[typing.Union[bytes, int]]]
 
 log = logging.getLogger(__name__)
 
+# Mapping from DNA type name to the name of the EndianIO struct that reads it.
+_simple_type_structs = {
+    b"int": "SINT",
+    b"short": "SSHORT",
+    b"uint64_t": "ULONG",
+    b"float": "FLOAT",
+}
+
+# Decoding modes of a FieldAccessor.
+_DECODE_VALUE = 0  # A single number or pointer.
+_DECODE_ARRAY = 1  # An array of numbers, as list.
+_DECODE_BYTES = 2  # A char array, as bytes or str.
+_DECODE_UNSUPPORTED = 3  # Any other type; raises NoReaderImplemented.
+
+FieldAccessor = collections.namedtuple(
+    "FieldAccessor", "field offset size mode typestruct length"
+)
+"""Precompiled description of how to read a field from a struct.
+
+:ivar field: the dna.Field being read.
+:ivar offset: offset of the value relative to the start of the struct,
+    taking array indices into account.
+:ivar size: number of bytes to read for the value.
+:ivar mode: one of the _DECODE_xxx constants.
+:ivar typestruct: struct.Struct for decoding the value, or None for char
+    arrays and unsupported types.
+:ivar length: number of items to read, i.e. the array size or 1.
+"""
+
 
 class Name:
     """dna.Name is a C-type name stored in the DNA as bytes."""
@@ -116,6 +147,11 @@ class Struct:
         self._fields = []  # type: typing.List[Field]
         self._fields_by_name = {}  # type: typing.Dict[bytes, Field]
 
+        # Caches for field_from_path() and field_accessor().
+        self._paths = {}  # type: typing.Dict[tuple, typing.Tuple[Field, int]]
+        self._accessors = {}  # type: typing.Dict[tuple, typing.Optional[FieldAccessor]]
+        self._pointer_masks = {}  # type: typing.Dict[int, typing.Optional[bytes]]
+
     def __repr__(self):
         return "%s(%r)" % (type(self).__qualname__, self.dna_type_id)
 
@@ -135,6 +171,9 @@ class Struct:
     def append_field(self, field: Field):
         self._fields.append(field)
         self._fields_by_name[field.name.name_only] = field
+        self._paths.clear()
+        self._accessors.clear()
+        self._pointer_masks.clear()
 
     @property
     def fields(self) -> typing.List[Field]:
@@ -147,6 +186,52 @@ class Struct:
     def has_field(self, field_name: bytes) -> bool:
         return field_name in self._fields_by_name
 
+    def pointer_ranges(
+        self, pointer_size: int
+    ) -> typing.Iterator[typing.Tuple[int, int]]:
+        """Generator, yield (offset, size) of all pointers in the struct.
+
+        This includes the pointers in nested structs and arrays of structs.
+        """
+        for field in self._fields:
+            dna_name = field.name
+            if dna_name.is_pointer or dna_name.is_method_pointer:
+                yield field.offset, field.size
+                continue
+
+            dna_type = field.dna_type
+            if not dna_type._fields:
+                # Simple type like int or float.
+                continue
+            nested = list(dna_type.pointer_ranges(pointer_size))
+            for item in range(dna_name.array_size):
+                item_offset = field.offset + item * dna_type.size
+                for offset, size in nested:
+                    yield item_offset + offset, size
+
+    def pointer_mask(self, pointer_size: int) -> typing.Optional[bytes]:
+        """Return a mask that is zero for pointer bytes, and 0xFF otherwise.
+
+        The mask is as long as the struct, and cached. Returns None if the
+        struct contains no pointers.
+        """
+        try:
+            return self._pointer_masks[pointer_size]
+        except KeyError:
+            pass
+
+        mask = None  # type: typing.Optional[bytes]
+        ranges = list(self.pointer_ranges(pointer_size))
+        if ranges:
+            struct_size = self.size
+            mask_array = bytearray(b"\xff" * struct_size)
+            for offset, size in ranges:
+                end = min(offset + size, struct_size)
+                mask_array[offset:end] = bytes(max(end - offset, 0))
+            mask = bytes(mask_array)
+        self._pointer_masks[pointer_size] = mask
+        return mask
+
     def field_from_path(
         self, pointer_size: int, path: FieldPath
     ) -> typing.Tuple[Field, int]:
@@ -161,6 +246,21 @@ class Struct:
             i.e. relative to the BlendFileBlock containing the data.
         :raises KeyError: if the field does not exist.
         """
+        key = (pointer_size, path)
+        try:
+            return self._paths[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable path; let _field_from_path() report the error.
+            return self._field_from_path(pointer_size, path)
+
+        result = self._paths[key] = self._field_from_path(pointer_size, path)
+        return result
+
+    def _field_from_path(
+        self, pointer_size: int, path: FieldPath
+    ) -> typing.Tuple[Field, int]:
         if isinstance(path, tuple):
             name = path[0]
             if len(path) >= 2 and not isinstance(path[1], bytes):
@@ -232,13 +332,14 @@ class Struct:
         :returns: The field instance and the value. If a default value was passed
             and the field was not found, (None, default) is returned.
         """
-        try:
-            field, offset = self.field_from_path(file_header.pointer_size, path)
-        except KeyError:
+        accessor = self.field_accessor(file_header, path)
+        if accessor is None:
             if default is ...:
-                raise
+                # Let field_from_path() raise a descriptive KeyError.
+                self.field_from_path(file_header.pointer_size, path)
             return None, default
 
+        field, offset = accessor.field, accessor.offset
         fileobj.seek(offset, os.SEEK_CUR)
 
         dna_type = field.dna_type
@@ -253,14 +354,8 @@ class Struct:
                 file_header, fileobj, field, null_terminated, as_str
             )
 
-        simple_readers = {
-            b"int": endian.read_int,
-            b"short": endian.read_short,
-            b"uint64_t": endian.read_ulong,
-            b"float": endian.read_float,
-        }
         try:
-            simple_reader = simple_readers[dna_type.dna_type_id]
+            typestruct = getattr(endian, _simple_type_structs[dna_type.dna_type_id])
         except KeyError:
             raise exceptions.NoReaderImplemented(
                 "%r exists but not simple type (%r), can't resolve field %r"
@@ -273,11 +368,152 @@ class Struct:
             # The caller wants to get a single item from an array. The offset we seeked to already
             # points to this item. In this case we do not want to look at dna_name.array_size,
             # because we want a single item from that array.
-            return field, simple_reader(fileobj)
+            return field, endian._read(fileobj, typestruct)
 
         if dna_name.array_size > 1:
-            return field, [simple_reader(fileobj) for _ in range(dna_name.array_size)]
-        return field, simple_reader(fileobj)
+            return field, [
+                endian._read(fileobj, typestruct) for _ in range(dna_name.array_size)
+            ]
+        return field, endian._read(fileobj, typestruct)
+
+    def field_accessor(
+        self, file_header: header.BlendFileHeader, path: FieldPath
+    ) -> typing.Optional[FieldAccessor]:
+        """Return a precompiled accessor for the field, or None if it does not exist.
+
+        The accessor is cached, so that repeated reads of the same field (for
+        example the same field of thousands of blocks) do not have to resolve
+        the path again.
+        """
+        key = (path, file_header.pointer_size, file_header.endian)
+        try:
+            return self._accessors[key]
+        except KeyError:
+            pass
+        except TypeError:
+            # Unhashable path; let field_from_path() report the error.
+            return self._compile_accessor(file_header, path)
+
+        accessor = self._accessors[key] = self._compile_accessor(file_header, path)
+        return accessor
+
+    def _compile_accessor(
+        self, file_header: header.BlendFileHeader, path: FieldPath
+    ) -> typing.Optional[FieldAccessor]:
+        pointer_size = file_header.pointer_size
+        try:
+            field, offset = self.field_from_path(pointer_size, path)
+        except KeyError:
+            return None
+
+        dna_type = field.dna_type
+        dna_name = field.name
+        endian = file_header.endian
+
+        if dna_name.is_pointer:
+            if pointer_size == 4:
+                typestruct = endian.UINT
+            elif pointer_size == 8:
+                typestruct = endian.ULONG
+            else:
+                raise ValueError("unsupported pointer size %d" % pointer_size)
+            return FieldAccessor(
+                field, offset, pointer_size, _DECODE_VALUE, typestruct, 1
+            )
+
+        if dna_type.dna_type_id == b"char":
+            if field.size == 1:
+                # Single char, see _field_get_char().
+                return FieldAccessor(field, offset, 1, _DECODE_VALUE, endian.UCHAR, 1)
+            return FieldAccessor(
+                field,
+                offset,
+                dna_name.array_size,
+                _DECODE_BYTES,
+                None,
+                dna_name.array_size,
+            )
+
+        try:
+            typestruct = getattr(endian, _simple_type_structs[dna_type.dna_type_id])
+        except KeyError:
+            return FieldAccessor(field, offset, 0, _DECODE_UNSUPPORTED, None, 0)
+
+        is_array_item = (
+            isinstance(path, tuple) and len(path) > 1 and isinstance(path[-1], int)
+        )
+        if dna_name.array_size > 1 and not is_array_item:
+            # Read the entire array with a single unpack_from() call.
+            fmt = typestruct.format
+            typestruct = struct.Struct(
+                "%s%d%s" % (fmt[0], dna_name.array_size, fmt[1:])
+            )
+            return FieldAccessor(
+                field,
+                offset,
+                typestruct.size,
+                _DECODE_ARRAY,
+                typestruct,
+                dna_name.array_size,
+            )
+        return FieldAccessor(
+            field, offset, typestruct.size, _DECODE_VALUE, typestruct, 1
+        )
+
+    def field_get_from_buffer(
+        self,
+        file_header: header.BlendFileHeader,
+        buffer: typing.Any,
+        struct_offset: int,
+        path: FieldPath,
+        default=...,
+        null_terminated=True,
+        as_str=True,
+    ) -> typing.Tuple[typing.Optional[Field], typing.Any]:
+        """Read the value of the field from an in-memory buffer.
+
+        This is the counterpart of field_get() for memory-mapped blend files.
+        Instead of seeking in a file object, the value is decoded from
+        `buffer` (anything supporting the buffer protocol and slicing).
+
+        :param struct_offset: offset of the start of the struct in the buffer,
+            e.g. the file offset of the BlendFileBlock containing the data.
+        :returns: The field instance and the value. If a default value was passed
+            and the field was not found, (None, default) is returned.
+        """
+        accessor = self.field_accessor(file_header, path)
+        if accessor is None:
+            if default is ...:
+                # Let field_from_path() raise a descriptive KeyError.
+                self.field_from_path(file_header.pointer_size, path)
+            return None, default
+
+        field, offset, _, mode, typestruct, length = accessor
+        offset += struct_offset
+        try:
+            if mode == _DECODE_VALUE:
+                return field, typestruct.unpack_from(buffer, offset)[0]
+            if mode == _DECODE_ARRAY:
+                return field, list(typestruct.unpack_from(buffer, offset))
+        except struct.error as ex:
+            raise struct.error("%s (at offset %d)" % (ex, offset)) from None
+
+        if mode == _DECODE_BYTES:
+            data = bytes(buffer[offset : offset + length])
+            if null_terminated or (null_terminated is None and as_str):
+                data = file_header.endian.read_data0(data)
+            if as_str:
+                return field, data.decode("utf8")
+            return field, data
+
+        dna_type = field.dna_type
+        dna_name = field.name
+        raise exceptions.NoReaderImplemented(
+            "%r exists but not simple type (%r), can't resolve field %r"
+            % (path, dna_type.dna_type_id.decode(), dna_name.name_only),
+            dna_name,
+            dna_type,
+        )
 
     def _field_get_char(
         self,
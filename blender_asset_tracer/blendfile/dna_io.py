@@ -21,10 +21,23 @@
 # (c) 2018, Blender Foundation - Sybren A. Stüvel
 """Read-write utility functions."""
 
+import array
 import struct
+import sys
 import typing
 
 
+def _array_typecode(itemsize: int) -> typing.Optional[str]:
+    """Return the typecode of unsigned array.array items of this size."""
+    for typecode in ("I", "L", "Q"):
+        if array.array(typecode).itemsize == itemsize:
+            return typecode
+    return None
+
+
+_POINTER_TYPECODES = {4: _array_typecode(4), 8: _array_typecode(8)}
+
+
 class EndianIO:
     # TODO(Sybren): note as UCHAR: struct.Struct = None and move actual structs to LittleEndianTypes
     UCHAR = struct.Struct(b"<B")
@@ -35,6 +48,7 @@ class EndianIO:
     SINT = struct.Struct(b"<i")
     FLOAT = struct.Struct(b"<f")
     ULONG = struct.Struct(b"<Q")
+    BYTE_ORDER = "little"
 
     @classmethod
     def _read(cls, fileobj: typing.IO[bytes], typestruct: struct.Struct):
@@ -44,6 +58,13 @@ class EndianIO:
         except struct.error as ex:
             raise struct.error("%s (read %d bytes)" % (ex, len(data))) from None
 
+    @classmethod
+    def _read_from(cls, buffer, offset: int, typestruct: struct.Struct):
+        try:
+            return typestruct.unpack_from(buffer, offset)[0]
+        except struct.error as ex:
+            raise struct.error("%s (at offset %d)" % (ex, offset)) from None
+
     @classmethod
     def _write(
         cls, fileobj: typing.IO[bytes], typestruct: struct.Struct, value: typing.Any
@@ -120,6 +141,41 @@ class EndianIO:
             return cls.read_ulong(fileobj)
         raise ValueError("unsupported pointer size %d" % pointer_size)
 
+    @classmethod
+    def read_pointer_from(cls, buffer, offset: int, pointer_size: int):
+        """Read a pointer from a buffer, such as a memory-mapped file."""
+
+        if pointer_size == 4:
+            return cls._read_from(buffer, offset, cls.UINT)
+        if pointer_size == 8:
+            return cls._read_from(buffer, offset, cls.ULONG)
+        raise ValueError("unsupported pointer size %d" % pointer_size)
+
+    @classmethod
+    def read_pointers_from(cls, buffer, pointer_size: int) -> typing.Sequence[int]:
+        """Read an array of pointers from a buffer.
+
+        The entire buffer is decoded at once; a trailing partial pointer is
+        ignored.
+        """
+        count = len(buffer) // pointer_size
+        typecode = _POINTER_TYPECODES.get(pointer_size)
+        if typecode is None:
+            if pointer_size not in _POINTER_TYPECODES:
+                raise ValueError("unsupported pointer size %d" % pointer_size)
+            # No array type of the right size on this platform.
+            typestruct = cls.UINT if pointer_size == 4 else cls.ULONG
+            return [
+                cls._read_from(buffer, index * pointer_size, typestruct)
+                for index in range(count)
+            ]
+
+        pointers = array.array(typecode)
+        pointers.frombytes(buffer[: count * pointer_size])
+        if cls.BYTE_ORDER != sys.byteorder:
+            pointers.byteswap()
+        return pointers
+
     @classmethod
     def write_pointer(cls, fileobj: typing.IO[bytes], pointer_size: int, value: int):
         """Write a pointer to a file."""
@@ -229,3 +285,4 @@ class BigEndianTypes(LittleEndianTypes):
     SINT = struct.Struct(b">i")
     FLOAT = struct.Struct(b">f")
     ULONG = struct.Struct(b">Q")
+    BYTE_ORDER = "big"
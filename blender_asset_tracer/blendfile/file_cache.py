@@ -0,0 +1,199 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Bounded cache of opened blend files, used by blendfile.open_cached()."""
+import collections
+import collections.abc
+import logging
+import pathlib
+import threading
+import typing
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_OPEN_FILES = 256
+
+
+class BlendFileCache(collections.abc.MutableMapping):
+    """Mapping from absolute path to BlendFile, with limits on open files.
+
+    When there are more than `max_open_files` files open, or their temporary
+    decompressed copies take more than `max_temp_bytes` bytes, the least
+    recently used files are evicted. Eviction only closes the file handles
+    and removes the decompressed copies; the BlendFile stays in the cache with its
+    blocks and SDNA, and reopens the file as soon as data is read from it.
+    Files that were modified are never evicted.
+
+    All methods are thread-safe. Files are opened via get_or_open(), which
+    makes sure that each file is only opened & parsed once, even when
+    multiple threads request it at the same time.
+
+    :param max_open_files: maximum number of files with open handles, or None
+        for no limit.
+    :param max_temp_bytes: maximum total size of decompressed copies of
+        compressed files, or None for no limit.
+    """
+
+    def __init__(
+        self,
+        max_open_files: typing.Optional[int] = DEFAULT_MAX_OPEN_FILES,
+        max_temp_bytes: typing.Optional[int] = None,
+    ) -> None:
+        self.max_open_files = max_open_files
+        self.max_temp_bytes = max_temp_bytes
+
+        # Least recently used file first.
+        self._files = (
+            collections.OrderedDict()
+        )  # type: collections.OrderedDict[pathlib.Path, typing.Any]
+        self._lock = threading.RLock()
+        self._path_locks = {}  # type: typing.Dict[pathlib.Path, threading.Lock]
+
+    def get_or_open(
+        self, path: pathlib.Path, opener: typing.Callable[[], typing.Any]
+    ) -> typing.Any:
+        """Return the cached file, or call opener() to open and cache it.
+
+        Only one thread calls opener() for any given path; other threads
+        requesting the same path wait for it. Different paths can be opened
+        concurrently.
+        """
+        with self._lock:
+            bfile = self._touch(path)
+            if bfile is not None:
+                return bfile
+            path_lock = self._path_locks.setdefault(path, threading.Lock())
+
+        with path_lock:
+            with self._lock:
+                bfile = self._touch(path)
+                if bfile is not None:
+                    return bfile
+
+            try:
+                bfile = opener()
+                with self._lock:
+                    self._files[path] = bfile
+            finally:
+                # Also when opening failed, so that the lock does not stay
+                # behind. Waiting threads then call their own opener().
+                with self._lock:
+                    if self._path_locks.get(path) is path_lock:
+                        del self._path_locks[path]
+
+        self.enforce_limits(keep=bfile)
+        return bfile
+
+    def _touch(self, path: pathlib.Path) -> typing.Any:
+        """Mark the file as most recently used, and return it (or None)."""
+        try:
+            self._files.move_to_end(path)
+        except KeyError:
+            return None
+        return self._files[path]
+
+    def file_reopened(self, bfile) -> None:
+        """Called by a BlendFile after it reopened its evicted file."""
+        with self._lock:
+            if self._files.get(bfile.filepath) is bfile:
+                self._files.move_to_end(bfile.filepath)
+        self.enforce_limits(keep=bfile)
+
+    def enforce_limits(self, keep=None) -> None:
+        """Evict least recently used files until the limits are met.
+
+        :param keep: BlendFile that should not be evicted, typically the one
+            that is about to be used.
+        """
+        max_files = self.max_open_files
+        max_bytes = self.max_temp_bytes
+        if max_files is None and max_bytes is None:
+            return
+
+        with self._lock:
+            open_files = [
+                bfile for bfile in self._files.values() if bfile.has_open_handles
+            ]
+        num_open = len(open_files)
+        temp_bytes = sum(bfile.temp_file_size for bfile in open_files)
+
+        # Evict outside of the cache lock, as evicting needs to lock the
+        # BlendFile, and a BlendFile that is reopening may be waiting on the
+        # cache lock.
+        for bfile in open_files:
+            files_ok = max_files is None or num_open <= max_files
+            bytes_ok = max_bytes is None or temp_bytes <= max_bytes
+            if files_ok and bytes_ok:
+                break
+            if bfile is keep:
+                continue
+            if not files_ok or bfile.temp_file_size:
+                temp_size = bfile.temp_file_size
+                if bfile.close_handles():
+                    num_open -= 1
+                    temp_bytes -= temp_size
+
+    def set_limits(
+        self,
+        max_open_files: typing.Optional[int],
+        max_temp_bytes: typing.Optional[int],
+    ) -> None:
+        self.max_open_files = max_open_files
+        self.max_temp_bytes = max_temp_bytes
+        self.enforce_limits()
+
+    def discard(self, path: pathlib.Path, bfile) -> None:
+        """Remove the file from the cache, if it is cached under this path.
+
+        Another BlendFile opened for the same path is left in the cache.
+        """
+        with self._lock:
+            if self._files.get(path) is bfile:
+                del self._files[path]
+
+    def __getitem__(self, path: pathlib.Path):
+        with self._lock:
+            return self._files[path]
+
+    def __setitem__(self, path: pathlib.Path, bfile) -> None:
+        with self._lock:
+            self._files[path] = bfile
+            self._files.move_to_end(path)
+
+    def __delitem__(self, path: pathlib.Path) -> None:
+        with self._lock:
+            del self._files[path]
+
+    def __contains__(self, path) -> bool:
+        with self._lock:
+            return path in self._files
+
+    def __iter__(self) -> typing.Iterator[pathlib.Path]:
+        with self._lock:
+            return iter(list(self._files))
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._files.clear()
+
+    def __repr__(self) -> str:
+        return "<%s of %d files>" % (type(self).__qualname__, len(self))
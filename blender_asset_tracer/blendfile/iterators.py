@@ -19,23 +19,80 @@
 # (c) 2009, At Mind B.V. - Jeroen Bakker
 # (c) 2014, Blender Foundation - Campbell Barton
 # (c) 2018, Blender Foundation - Sybren A. Stüvel
+import logging
 import typing
 
 from blender_asset_tracer import cdefs
-from . import BlendFileBlock
+from . import BlendFileBlock, header
 from .dna import FieldPath
 
+log = logging.getLogger(__name__)
+
 
 def listbase(
     block: typing.Optional[BlendFileBlock], next_path: FieldPath = b"next"
 ) -> typing.Iterator[BlendFileBlock]:
-    """Generator, yields all blocks in the ListBase linked list."""
+    """Generator, yields all blocks in the ListBase linked list.
+
+    The offset of the `next` pointer is only looked up once per DNA struct,
+    after which the pointer is read directly from the file. The blocks may be
+    refined to another DNA type while iterating, as sequencer_strips() does.
+
+    A list that links back to one of its earlier blocks can only occur in
+    corrupt files. This is logged as a warning, and ends the iteration.
+    """
+    if not block:
+        return
+
+    bfile = block.bfile
+    file_header = bfile.header
+    read_pointer_at = bfile.pointer_reader()
+    next_offsets = {}  # type: typing.Dict[int, int]
+    visited = {block.addr_old}
+
     while block:
         yield block
-        next_ptr = block[next_path]
+
+        sdna_index = block.sdna_index
+        try:
+            next_offset = next_offsets[sdna_index]
+        except KeyError:
+            next_offset = next_offsets[sdna_index] = _pointer_offset(
+                block, file_header, next_path
+            )
+
+        next_ptr = read_pointer_at(block.file_offset + next_offset)
         if next_ptr == 0:
             break
-        block = block.bfile.dereference_pointer(next_ptr)
+        if next_ptr in visited:
+            log.warning(
+                "ListBase in %s loops back from %r to address 0x%x, stopping",
+                bfile.filepath,
+                block,
+                next_ptr,
+            )
+            break
+        visited.add(next_ptr)
+        block = bfile.dereference_pointer(next_ptr)
+
+
+def _pointer_offset(
+    block: BlendFileBlock, file_header: header.BlendFileHeader, path: FieldPath
+) -> int:
+    """Return the offset of the pointer field in the block's DNA struct.
+
+    :raises KeyError: when the field does not exist.
+    :raises TypeError: when the field is not a pointer.
+    """
+    dna_struct = block.dna_type
+    accessor = dna_struct.field_accessor(file_header, path)
+    if accessor is None:
+        # Let field_from_path() raise a descriptive KeyError.
+        dna_struct.field_from_path(file_header.pointer_size, path)
+        raise KeyError(path)
+    if not accessor.field.name.is_pointer:
+        raise TypeError("%r of %r is not a pointer" % (path, dna_struct))
+    return accessor.offset
 
 
 def sequencer_strips(
@@ -18,13 +18,20 @@
 #
 # (c) 2021, Blender Foundation
 
+import bisect
 import collections
+import concurrent.futures
 import enum
 import gzip
+import io
+import itertools
 import logging
 import os
 import pathlib
+import shutil
+import struct
 import tempfile
+import threading
 import typing
 
 # Blender 3.0 replaces GZip with ZStandard compression.
@@ -37,7 +44,7 @@ try:
 except ImportError:
     has_zstandard = False
 
-from . import exceptions
+from . import decompressed_cache, exceptions
 
 # Magic numbers, see https://en.wikipedia.org/wiki/List_of_file_signatures
 BLENDFILE_MAGIC = b"BLENDER"
@@ -50,28 +57,198 @@ ZSTD_MAGIC = b"\x28\xB5\x2F\xFD"
 ZSTD_MAGIC_SKIPPABLE = b"\x50\x2A\x4D\x18"
 ZSTD_MAGIC_SKIPPABLE_MASK = b"\xF0\xFF\xFF\xFF"
 
+# The seek table of the Zstandard seekable format, as written by Blender. See
+# https://github.com/facebook/zstd/blob/dev/contrib/seekable_format/zstd_seekable_compression_format.md
+ZSTD_SEEKABLE_MAGIC = 0x8F92EAB1
+ZSTD_SEEK_TABLE_MAGIC = 0x184D2A5E
+_seek_table_footer = struct.Struct("<IBI")
+_skippable_header = struct.Struct("<II")
+
 log = logging.getLogger(__name__)
 
+DEFAULT_MEMORY_LIMIT = 64 * 2**20
+
+DEFAULT_FRAME_CACHE_SIZE = 16
+DEFAULT_ZSTD_LEVEL = 3
+ZSTD_FRAME_SIZE = 2**20
+
+_memory_limit = DEFAULT_MEMORY_LIMIT
+_spill_dir = None  # type: typing.Optional[pathlib.Path]
+_random_access = False
+_zstd_level = DEFAULT_ZSTD_LEVEL
+_zstd_threads = -1
+_memory_file_counter = itertools.count(1)
+
+
+class Compression(enum.Enum):
+    UNRECOGNISED = -1
+    NONE = 0
+    GZIP = 1
+    ZSTD = 2
+
 
 # @dataclasses.dataclass
 DecompressedFileInfo = collections.namedtuple(
-    "DecompressedFileInfo", "is_compressed path fileobj"
+    "DecompressedFileInfo",
+    "is_compressed path fileobj temp_size compression",
+    defaults=(0, Compression.NONE),
 )
 # is_compressed: bool
 # path: pathlib.Path
 # """The path of the decompressed file, or the input path if the file is not compressed."""
 # fileobj: BinaryIO
+# temp_size: int
+# """Size of the decompressed copy that is removed when fileobj is closed."""
+# compression: Compression
+# """How the file is compressed on disk, so that it can be recompressed the same way."""
+
+
+def set_decompression_policy(
+    memory_limit: int = DEFAULT_MEMORY_LIMIT,
+    spill_dir: typing.Optional[pathlib.Path] = None,
+    random_access: bool = False,
+) -> None:
+    """Determine where compressed blend files are decompressed to.
+
+    Files that are at most `memory_limit` bytes when decompressed are kept in
+    memory. On Linux this is an anonymous memory file (see memfd_create(2)),
+    which can be memory-mapped just like a file on disk. Larger files are
+    decompressed to a temporary file in `spill_dir`.
+
+    :param memory_limit: maximum decompressed size to keep in memory, or 0 to
+        always decompress to a temporary file.
+    :param spill_dir: directory for temporary files, or None to use the
+        default of the tempfile module.
+    :param random_access: read Zstandard files that have a seek table with
+        SeekableZstdFile, instead of decompressing them completely. This is
+        only done for files that are opened read-only. It is faster when
+        only a small part of the file is read, for example with a hit in
+        the block_index. Tracing reads blocks from all over the file, and
+        then repeatedly decompresses the same frames, so this is disabled
+        by default.
+    """
+    global _memory_limit, _spill_dir, _random_access
+    _memory_limit = memory_limit
+    _spill_dir = spill_dir
+    _random_access = random_access
+
+
+def set_compression_policy(
+    zstd_level: int = DEFAULT_ZSTD_LEVEL, zstd_threads: int = -1
+) -> None:
+    """Determine how modified blend files are compressed again.
+
+    :param zstd_level: Zstandard compression level.
+    :param zstd_threads: number of threads to compress with, or -1 to use
+        one thread per CPU core.
+    """
+    global _zstd_level, _zstd_threads
+    _zstd_level = zstd_level
+    _zstd_threads = zstd_threads
+
+
+def compress(
+    infile: typing.IO[bytes],
+    dest: pathlib.Path,
+    compression: Compression,
+    buffer_size: int,
+) -> None:
+    """Compress the data in infile, from its current position, to dest.
+
+    Zstandard-compressed files are written in the seekable format, like
+    Blender does, so that they can be read with SeekableZstdFile.
+    """
+    # Check before opening dest, to not truncate it when compression fails.
+    _check_can_compress(compression)
+    with dest.open("wb", buffering=buffer_size) as outfile:
+        compress_to(infile, outfile, compression, buffer_size)
+
+
+def compress_to(
+    infile: typing.IO[bytes],
+    outfile: typing.IO[bytes],
+    compression: Compression,
+    buffer_size: int,
+) -> None:
+    """Compress the data in infile, from its current position, into outfile.
+
+    Like compress(), but writes to an already opened file object.
+    """
+    _check_can_compress(compression)
+    if compression == Compression.GZIP:
+        with gzip.GzipFile(fileobj=outfile, mode="wb") as gzfile:
+            shutil.copyfileobj(infile, gzfile, buffer_size)
+    else:
+        _write_seekable_zstd(infile, outfile)
 
 
-class Compression(enum.Enum):
-    UNRECOGNISED = -1
-    NONE = 0
-    GZIP = 1
-    ZSTD = 2
+def _check_can_compress(compression: Compression) -> None:
+    if compression == Compression.GZIP:
+        return
+    if compression == Compression.ZSTD:
+        if not has_zstandard:
+            raise EnvironmentError(
+                "Cannot compress with ZStandard, install the `zstandard` module "
+                "to support this."
+            )
+        return
+    raise ValueError("Unsupported compression type: %s" % compression)
+
+
+def _write_seekable_zstd(infile: typing.IO[bytes], outfile: typing.IO[bytes]) -> None:
+    """Compress infile into independent frames, followed by a seek table.
+
+    The frames are compressed in parallel. zstandard releases the GIL while
+    compressing, so threads are enough to use multiple CPU cores.
+    """
+    num_threads = _zstd_threads if _zstd_threads > 0 else os.cpu_count() or 1
+    level = _zstd_level
+    local = threading.local()
+
+    def compress_frame(data: bytes) -> bytes:
+        # ZstdCompressor objects cannot be used by multiple threads at once.
+        try:
+            cctx = local.cctx
+        except AttributeError:
+            cctx = local.cctx = zstandard.ZstdCompressor(level=level)
+        return cctx.compress(data)
+
+    frame_sizes = []  # type: typing.List[typing.Tuple[int, int]]
+
+    def write_frame(future: concurrent.futures.Future, size: int) -> None:
+        compressed = future.result()
+        outfile.write(compressed)
+        frame_sizes.append((len(compressed), size))
+
+    with concurrent.futures.ThreadPoolExecutor(num_threads) as executor:
+        # Limit the number of frames in flight, to bound memory usage.
+        pending = collections.deque()  # type: typing.Deque
+        while True:
+            data = infile.read(ZSTD_FRAME_SIZE)
+            if not data:
+                break
+            pending.append((executor.submit(compress_frame, data), len(data)))
+            if len(pending) >= 2 * num_threads:
+                write_frame(*pending.popleft())
+        while pending:
+            write_frame(*pending.popleft())
+
+    entries = b"".join(struct.pack("<II", *sizes) for sizes in frame_sizes)
+    footer = _seek_table_footer.pack(len(frame_sizes), 0, ZSTD_SEEKABLE_MAGIC)
+    outfile.write(
+        _skippable_header.pack(ZSTD_SEEK_TABLE_MAGIC, len(entries) + len(footer))
+    )
+    outfile.write(entries)
+    outfile.write(footer)
 
 
 def open(path: pathlib.Path, mode: str, buffer_size: int) -> DecompressedFileInfo:
-    """Open the file, decompressing it into a temporary file if necesssary."""
+    """Open the file, decompressing it if necesssary.
+
+    Compressed files are decompressed into memory or into a temporary file,
+    see set_decompression_policy(). Either way, the decompressed data is gone
+    once the returned file object is closed.
+    """
     fileobj = path.open(mode, buffering=buffer_size)  # typing.IO[bytes]
     compression = find_compression_type(fileobj)
 
@@ -88,10 +265,33 @@ def open(path: pathlib.Path, mode: str, buffer_size: int) -> DecompressedFileInf
 
     log.debug("%s-compressed blendfile detected: %s", compression.name, path)
 
-    # Decompress to a temporary file.
-    tmpfile = tempfile.NamedTemporaryFile()
-    fileobj.seek(0, os.SEEK_SET)
+    if mode == "rb" and decompressed_cache.is_enabled():
+        key = decompressed_cache.cache_key(path, fileobj)
+
+        def decompress(outfile: typing.IO[bytes]) -> None:
+            _decompress_into(fileobj, compression, path, outfile, buffer_size)
 
+        cached = decompressed_cache.open_cached(key, decompress, buffer_size)
+        if cached is not None:
+            fileobj.close()
+            return DecompressedFileInfo(
+                is_compressed=True,
+                path=cached[0],
+                fileobj=cached[1],
+                compression=compression,
+            )
+
+    if compression == Compression.ZSTD and mode == "rb" and _random_access:
+        reader = _open_seekable_zstd(fileobj, path)
+        if reader is not None:
+            return DecompressedFileInfo(
+                is_compressed=True,
+                path=pathlib.Path(reader.name),
+                fileobj=reader,
+                compression=compression,
+            )
+
+    fileobj.seek(0, os.SEEK_SET)
     decompressor = _decompressor(fileobj, mode, compression)
 
     with decompressor as compressed_file:
@@ -99,18 +299,318 @@ def open(path: pathlib.Path, mode: str, buffer_size: int) -> DecompressedFileInf
         if magic != BLENDFILE_MAGIC:
             raise exceptions.BlendFileError("Compressed file is not a blend file", path)
 
-        data = magic
-        while data:
-            tmpfile.write(data)
-            data = compressed_file.read(buffer_size)
+        # Decompress into memory, until it becomes too large.
+        tmppath, tmpfile = _memory_file(path, buffer_size)
+        in_memory = tmpfile is not None
+        if not in_memory:
+            tmppath, tmpfile = _spill_file(None, buffer_size)
+
+        try:
+            written = 0
+            data = magic
+            while data:
+                written += len(data)
+                if in_memory and written > _memory_limit:
+                    log.debug("Decompressed %s is too large for memory", path)
+                    tmppath, tmpfile = _spill_file(tmpfile, buffer_size)
+                    in_memory = False
+                tmpfile.write(data)
+                data = compressed_file.read(buffer_size)
+        except BaseException:
+            tmpfile.close()
+            raise
 
     # Further interaction should be done with the uncompressed file.
     fileobj.close()
     return DecompressedFileInfo(
         is_compressed=True,
-        path=pathlib.Path(tmpfile.name),
+        path=tmppath,
         fileobj=tmpfile,
+        temp_size=written,
+        compression=compression,
+    )
+
+
+def _decompress_into(
+    fileobj: typing.IO[bytes],
+    compression: Compression,
+    path: pathlib.Path,
+    outfile: typing.IO[bytes],
+    buffer_size: int,
+) -> None:
+    """Decompress the entire file into outfile."""
+    fileobj.seek(0, os.SEEK_SET)
+    with _decompressor(fileobj, "rb", compression) as compressed_file:
+        magic = compressed_file.read(len(BLENDFILE_MAGIC))
+        if magic != BLENDFILE_MAGIC:
+            raise exceptions.BlendFileError("Compressed file is not a blend file", path)
+        outfile.write(magic)
+        shutil.copyfileobj(compressed_file, outfile, buffer_size)
+
+
+def _memory_file(
+    path: pathlib.Path, buffer_size: int
+) -> typing.Tuple[typing.Optional[pathlib.Path], typing.Optional[typing.IO[bytes]]]:
+    """Create an in-memory file to decompress into.
+
+    The returned path is only used to identify the file in log messages; it
+    does not exist on the filesystem.
+
+    :return: (path, fileobj) tuple, or (None, None) when decompressing into
+        memory is disabled.
+    """
+    if _memory_limit <= 0:
+        return None, None
+
+    name = "<memory-%d:%s>" % (next(_memory_file_counter), path.name)
+
+    memfd_create = getattr(os, "memfd_create", None)
+    if memfd_create is None:
+        # Without memfd_create(), fall back to a buffer that cannot be
+        # memory-mapped, but at least avoids the disk.
+        bytesio = io.BytesIO()
+        bytesio.name = name  # type: ignore
+        return pathlib.Path(name), bytesio
+
+    try:
+        fd = memfd_create("bat:%s" % path.name, os.MFD_CLOEXEC)
+    except OSError as ex:
+        log.debug("Unable to create in-memory file, using a temporary file: %s", ex)
+        return None, None
+
+    fileobj = io.open(fd, "w+b", buffering=buffer_size)
+    fileobj.raw.name = name  # type: ignore
+    return pathlib.Path(name), fileobj
+
+
+def _spill_file(
+    memory_file: typing.Optional[typing.IO[bytes]], buffer_size: int
+) -> typing.Tuple[pathlib.Path, typing.IO[bytes]]:
+    """Create a temporary file, and move the contents of memory_file into it.
+
+    :param memory_file: the in-memory file, which is closed after its contents
+        have been copied, or None to just create a temporary file.
+    """
+    tmpfile = tempfile.NamedTemporaryFile(
+        dir=None if _spill_dir is None else str(_spill_dir), buffering=buffer_size
+    )
+    if memory_file is not None:
+        try:
+            memory_file.seek(0, os.SEEK_SET)
+            shutil.copyfileobj(memory_file, tmpfile, buffer_size)
+        except BaseException:
+            tmpfile.close()
+            raise
+        finally:
+            memory_file.close()
+    return pathlib.Path(tmpfile.name), typing.cast(typing.IO[bytes], tmpfile)
+
+
+class SeekableZstdFile(io.RawIOBase):
+    """Read-only file object for Zstandard files in the seekable format.
+
+    Such files consist of independently compressed frames, followed by a
+    seek table with the compressed and decompressed size of each frame.
+    Only the frames that contain the requested data are decompressed. The
+    most recently used decompressed frames are kept in memory.
+
+    Reading is thread-safe via pread(); read() and seek() use the file
+    position, just like any other file object.
+
+    :param fileobj: the compressed file. It is closed when this file is
+        closed.
+    :param frame_sizes: (compressed size, decompressed size) of each frame,
+        as stored in the seek table.
+    :param cache_size: number of decompressed frames to keep in memory.
+    """
+
+    def __init__(
+        self,
+        fileobj: typing.IO[bytes],
+        frame_sizes: typing.Sequence[typing.Tuple[int, int]],
+        name: str,
+        cache_size: int = DEFAULT_FRAME_CACHE_SIZE,
+    ) -> None:
+        super().__init__()
+        self.name = name
+        self._fileobj = fileobj
+        self._cache_size = cache_size
+
+        # Start offsets of each frame, in the compressed and decompressed data.
+        self._compressed_offsets = [0]
+        self._offsets = [0]
+        for compressed_size, size in frame_sizes:
+            self._compressed_offsets.append(
+                self._compressed_offsets[-1] + compressed_size
+            )
+            self._offsets.append(self._offsets[-1] + size)
+        self._size = self._offsets[-1]
+        self._position = 0
+
+        self._frames = (
+            collections.OrderedDict()
+        )  # type: collections.OrderedDict[int, bytes]
+        self._lock = threading.Lock()
+        self.frames_decompressed = 0
+        """Number of times a frame was decompressed, for testing & profiling."""
+
+    @property
+    def size(self) -> int:
+        """Size of the decompressed data."""
+        return self._size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_SET:
+            position = offset
+        elif whence == os.SEEK_CUR:
+            position = self._position + offset
+        elif whence == os.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError("invalid whence (%r)" % whence)
+        if position < 0:
+            raise ValueError("negative seek position %d" % position)
+        self._position = position
+        return position
+
+    def readinto(self, buffer) -> int:
+        data = self.pread(self._position, len(buffer))
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def pread(self, offset: int, size: int) -> bytes:
+        """Return 'size' bytes starting at 'offset', without using the file position."""
+        if self.closed:
+            raise ValueError("I/O operation on closed file")
+        end = min(offset + size, self._size)
+        if offset >= end:
+            return b""
+
+        frame_index = bisect.bisect_right(self._offsets, offset) - 1
+        chunks = []
+        while offset < end:
+            frame_start = self._offsets[frame_index]
+            frame = self._frame(frame_index)
+            chunk_end = min(end, frame_start + len(frame))
+            chunks.append(frame[offset - frame_start : chunk_end - frame_start])
+            offset = chunk_end
+            frame_index += 1
+        if len(chunks) == 1:
+            return chunks[0]
+        return b"".join(chunks)
+
+    def _frame(self, frame_index: int) -> bytes:
+        """Return the decompressed frame, from the cache if possible."""
+        with self._lock:
+            try:
+                self._frames.move_to_end(frame_index)
+                return self._frames[frame_index]
+            except KeyError:
+                pass
+
+            compressed_start = self._compressed_offsets[frame_index]
+            compressed_end = self._compressed_offsets[frame_index + 1]
+            self._fileobj.seek(compressed_start, os.SEEK_SET)
+            compressed = self._fileobj.read(compressed_end - compressed_start)
+
+        # Decompress outside of the lock, so that multiple threads can
+        # decompress different frames at the same time.
+        size = self._offsets[frame_index + 1] - self._offsets[frame_index]
+        dctx = zstandard.ZstdDecompressor()
+        frame = dctx.decompress(compressed, max_output_size=size)
+        if len(frame) != size:
+            raise exceptions.BlendFileError(
+                "Zstandard frame %d has size %d, expected %d"
+                % (frame_index, len(frame), size),
+                pathlib.Path(self.name),
+            )
+
+        with self._lock:
+            self.frames_decompressed += 1
+            self._frames[frame_index] = frame
+            while len(self._frames) > self._cache_size:
+                self._frames.popitem(last=False)
+        return frame
+
+    def close(self) -> None:
+        if not self.closed:
+            self._fileobj.close()
+            self._frames.clear()
+        super().close()
+
+
+def read_zstd_seek_table(
+    fileobj: typing.IO[bytes],
+) -> typing.Optional[typing.List[typing.Tuple[int, int]]]:
+    """Read the seek table of a Zstandard file in the seekable format.
+
+    :return: (compressed size, decompressed size) of each frame, or None if
+        the file has no (valid) seek table.
+    """
+    file_size = fileobj.seek(0, os.SEEK_END)
+    if file_size < _seek_table_footer.size:
+        return None
+    fileobj.seek(file_size - _seek_table_footer.size, os.SEEK_SET)
+    num_frames, descriptor, magic = _seek_table_footer.unpack(
+        fileobj.read(_seek_table_footer.size)
     )
+    if magic != ZSTD_SEEKABLE_MAGIC or descriptor & 0x7C:
+        # No seek table, or one with reserved bits set.
+        return None
+
+    has_checksums = bool(descriptor & 0x80)
+    entry_size = 12 if has_checksums else 8
+    table_size = _skippable_header.size + num_frames * entry_size
+    table_size += _seek_table_footer.size
+    if table_size > file_size or num_frames == 0:
+        return None
+
+    fileobj.seek(file_size - table_size, os.SEEK_SET)
+    table = fileobj.read(table_size)
+    frame_magic, frame_size = _skippable_header.unpack_from(table)
+    if frame_magic != ZSTD_SEEK_TABLE_MAGIC or frame_size != table_size - 8:
+        return None
+
+    entry = struct.Struct("<II%s" % ("I" if has_checksums else ""))
+    frame_sizes = [
+        entry.unpack_from(table, _skippable_header.size + index * entry_size)[:2]
+        for index in range(num_frames)
+    ]
+    if sum(compressed for compressed, _ in frame_sizes) != file_size - table_size:
+        return None
+    return frame_sizes
+
+
+def _open_seekable_zstd(
+    fileobj: typing.IO[bytes], path: pathlib.Path
+) -> typing.Optional[SeekableZstdFile]:
+    """Return a SeekableZstdFile, or None if the file has no seek table."""
+    if not has_zstandard:
+        # Let _decompressor() raise the appropriate exception.
+        return None
+
+    frame_sizes = read_zstd_seek_table(fileobj)
+    if frame_sizes is None:
+        log.debug("No Zstandard seek table in %s", path)
+        return None
+
+    log.debug("Reading %s via its Zstandard seek table", path)
+    name = "<zstd-seekable-%d:%s>" % (next(_memory_file_counter), path.name)
+    reader = SeekableZstdFile(fileobj, frame_sizes, name)
+    if reader.pread(0, len(BLENDFILE_MAGIC)) != BLENDFILE_MAGIC:
+        reader.close()
+        raise exceptions.BlendFileError("Compressed file is not a blend file", path)
+    return reader
 
 
 def find_compression_type(fileobj: typing.IO[bytes]) -> Compression:
@@ -0,0 +1,178 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""NumPy views of blocks containing arrays of DNA structs.
+
+Blocks with `count > 1`, like the vertices or polygons of a mesh, contain an
+array of structs. struct_dtype() converts a DNA struct into a structured
+numpy.dtype, with the offsets, byte order, and pointer size of the blend
+file, and block_array() uses it to expose the block as a numpy.ndarray
+without copying the data.
+
+NumPy is optional. This module can always be imported; check `has_numpy`
+before calling struct_dtype() or block_array(), which raise EnvironmentError
+when NumPy is not installed. dtype_spec() does not require NumPy.
+"""
+import re
+import threading
+import typing
+import weakref
+
+from . import BlendFileBlock, dna, header
+
+try:
+    import numpy
+
+    has_numpy = True
+except ImportError:
+    has_numpy = False
+
+# NumPy type kind of simple DNA types. The size of the type is taken from the
+# DNA, so that for example `long` gets the size it had in the Blender that
+# wrote the file. `char` is unsigned, like in BlendFileBlock.get().
+_simple_type_kinds = {
+    b"char": "u",
+    b"uchar": "u",
+    b"short": "i",
+    b"ushort": "u",
+    b"int": "i",
+    b"uint": "u",
+    b"long": "i",
+    b"ulong": "u",
+    b"float": "f",
+    b"double": "f",
+    b"int8_t": "i",
+    b"uint8_t": "u",
+    b"int16_t": "i",
+    b"uint16_t": "u",
+    b"int32_t": "i",
+    b"uint32_t": "u",
+    b"int64_t": "i",
+    b"uint64_t": "u",
+}
+
+_array_dims = re.compile(rb"\[(\d+)\]")
+
+_dtypes = (
+    weakref.WeakKeyDictionary()
+)  # type: weakref.WeakKeyDictionary[dna.Struct, typing.Dict[tuple, typing.Any]]
+_dtypes_lock = threading.Lock()
+
+
+def dtype_spec(
+    dna_struct: dna.Struct, file_header: header.BlendFileHeader
+) -> typing.Dict[str, typing.Any]:
+    """Return the numpy.dtype() argument describing the DNA struct.
+
+    The result is a dict with 'names', 'formats', 'offsets', and 'itemsize'.
+    Nested structs have a nested dict as format, and arrays a
+    (format, shape) tuple. Pointers are unsigned integers of the pointer
+    size, and char arrays are byte strings. Fields of other types are
+    included as raw bytes.
+    """
+    endian = file_header.endian_str.decode()
+    pointer_format = "%su%d" % (endian, file_header.pointer_size)
+
+    names = []  # type: typing.List[str]
+    formats = []  # type: typing.List[typing.Any]
+    offsets = []  # type: typing.List[int]
+    for field in dna_struct.fields:
+        if not field.size:
+            continue
+        dna_name = field.name
+        dna_type = field.dna_type
+        shape = tuple(int(dim) for dim in _array_dims.findall(dna_name.name_full))
+
+        if dna_name.is_pointer or dna_name.is_method_pointer:
+            item_format = pointer_format  # type: typing.Any
+        elif dna_type.dna_type_id == b"char" and shape:
+            # Char arrays are strings. The last dimension is the string length.
+            item_format = "S%d" % shape[-1]
+            shape = shape[:-1]
+        elif dna_type.fields:
+            item_format = dtype_spec(dna_type, file_header)
+        else:
+            kind = _simple_type_kinds.get(dna_type.dna_type_id)
+            item_size = field.size // dna_name.array_size
+            if kind is None:
+                item_format = "V%d" % item_size
+            else:
+                item_format = "%s%s%d" % (endian, kind, item_size)
+
+        names.append(dna_name.name_only.decode("ascii"))
+        formats.append((item_format, shape) if shape else item_format)
+        offsets.append(field.offset)
+
+    return {
+        "names": names,
+        "formats": formats,
+        "offsets": offsets,
+        "itemsize": dna_struct.size,
+    }
+
+
+def struct_dtype(
+    dna_struct: dna.Struct, file_header: header.BlendFileHeader
+) -> "numpy.dtype":
+    """Return the structured numpy.dtype of the DNA struct.
+
+    :raises EnvironmentError: when NumPy is not installed.
+    """
+    _check_numpy()
+    key = (file_header.pointer_size, file_header.endian_str)
+    try:
+        return _dtypes[dna_struct][key]
+    except KeyError:
+        pass
+
+    dtype = numpy.dtype(dtype_spec(dna_struct, file_header))
+    with _dtypes_lock:
+        _dtypes.setdefault(dna_struct, {})[key] = dtype
+    return dtype
+
+
+def block_array(block: BlendFileBlock) -> "numpy.ndarray":
+    """Return the structs in the block as a read-only structured array.
+
+    The array has one item per struct in the block, `block.count` of them
+    unless the block is too small to hold them all. When the blend file is
+    memory-mapped, the array refers to the mapped memory directly, and keeps
+    it mapped for as long as the array exists. Otherwise the array refers to
+    the block data, which is read from the file once.
+
+    :raises EnvironmentError: when NumPy is not installed.
+    """
+    _check_numpy()
+    bfile = block.bfile
+    dtype = struct_dtype(bfile.structs[block.sdna_index], bfile.header)
+    count = min(block.count, block.size // dtype.itemsize) if dtype.itemsize else 0
+
+    mapped = bfile._mmap
+    if mapped is not None and bfile._patches is None:
+        return numpy.frombuffer(
+            mapped, dtype=dtype, count=count, offset=block.file_offset
+        )
+    return numpy.frombuffer(block.raw_data(), dtype=dtype, count=count)
+
+
+def _check_numpy() -> None:
+    if not has_numpy:
+        raise EnvironmentError(
+            "Cannot create NumPy arrays, install the `numpy` module to support this."
+        )
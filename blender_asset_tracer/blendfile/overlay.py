@@ -0,0 +1,165 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""In-memory modifications of blend files.
+
+Blend files that are opened read-only are never written to. Instead, the
+changes made with BlendFileBlock.set() are recorded in a PatchOverlay, keyed
+by file offset. Reads from the BlendFile see the patched data, and
+BlendFile.write_to() writes the original file with the patches applied.
+"""
+import bisect
+import io
+import os
+import typing
+
+
+class PatchOverlay:
+    """Patched byte ranges of a file.
+
+    Overlapping and adjacent patches are merged, so every byte of the file is
+    covered by at most one patch.
+
+    This also acts as a write-only file object, so that it can be passed to
+    dna.Struct.field_set() in place of the file itself.
+    """
+
+    def __init__(self) -> None:
+        self._starts = []  # type: typing.List[int]
+        self._patches = {}  # type: typing.Dict[int, bytes]
+        self._position = 0
+
+    def __len__(self) -> int:
+        """Return the number of patched byte ranges."""
+        return len(self._starts)
+
+    def __iter__(self) -> typing.Iterator[typing.Tuple[int, bytes]]:
+        """Yield (offset, data) tuples of the patches, in file order."""
+        patches = self._patches
+        for start in self._starts:
+            yield start, patches[start]
+
+    @property
+    def size(self) -> int:
+        """Total number of patched bytes."""
+        return sum(len(data) for data in self._patches.values())
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_SET:
+            self._position = offset
+        elif whence == os.SEEK_CUR:
+            self._position += offset
+        else:
+            raise io.UnsupportedOperation("Can only seek relative to the start")
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+    def write(self, data: bytes) -> int:
+        self.patch(self._position, bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def patch(self, offset: int, data: bytes) -> None:
+        """Replace the bytes at offset with data."""
+        if not data:
+            return
+        starts = self._starts
+        patches = self._patches
+        end = offset + len(data)
+
+        # Find the patches that overlap with or adjoin the new one.
+        first = bisect.bisect_left(starts, offset)
+        if first > 0:
+            prev_start = starts[first - 1]
+            if prev_start + len(patches[prev_start]) >= offset:
+                first -= 1
+        last = first
+        while last < len(starts) and starts[last] <= end:
+            last += 1
+
+        if first == last:
+            starts.insert(first, offset)
+            patches[offset] = data
+            return
+
+        merged_start = min(starts[first], offset)
+        last_start = starts[last - 1]
+        merged_end = max(last_start + len(patches[last_start]), end)
+        merged = bytearray(merged_end - merged_start)
+        for start in starts[first:last]:
+            existing = patches.pop(start)
+            merged[start - merged_start : start - merged_start + len(existing)] = (
+                existing
+            )
+        merged[offset - merged_start : end - merged_start] = data
+
+        starts[first:last] = [merged_start]
+        patches[merged_start] = bytes(merged)
+
+    def apply(self, offset: int, data: bytes) -> bytes:
+        """Return the data read from the file at offset, with patches applied."""
+        starts = self._starts
+        patches = self._patches
+        end = offset + len(data)
+
+        index = max(bisect.bisect_right(starts, offset) - 1, 0)
+        patched = None  # type: typing.Optional[bytearray]
+        while index < len(starts):
+            start = starts[index]
+            if start >= end:
+                break
+            index += 1
+            patch = patches[start]
+            low = max(start, offset)
+            high = min(start + len(patch), end)
+            if low >= high:
+                continue
+            if patched is None:
+                patched = bytearray(data)
+            patched[low - offset : high - offset] = patch[low - start : high - start]
+
+        if patched is None:
+            return data
+        return bytes(patched)
+
+
+class PatchedReader(io.RawIOBase):
+    """Read-only file object that reads a file with an overlay applied.
+
+    :param read_at: function (offset, size) -> bytes that reads from the
+        original file, with the patches applied. It should return fewer bytes
+        than requested only at the end of the file.
+    """
+
+    def __init__(self, read_at: typing.Callable[[int, int], bytes]) -> None:
+        super().__init__()
+        self._read_at = read_at
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        data = self._read_at(self._position, len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        self._position += size
+        return size
@@ -0,0 +1,320 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Decoding of all fields of a DNA struct at once.
+
+BlendFileBlock.get() resolves and decodes a single field. To decode all the
+fields of a block, for example to dump it, each DNA struct is compiled once
+into a flat list of leaves: its fields of simple types, with the fields of
+nested structs expanded. A StructDecoder then decodes all leaves from a
+single buffer, with a single struct.unpack_from() call.
+
+Numeric arrays can optionally be returned as NumPy arrays, when NumPy is
+installed.
+"""
+import collections
+import enum
+import operator
+import struct
+import threading
+import typing
+import weakref
+
+from . import dna, header
+
+try:
+    import numpy
+
+    has_numpy = True
+except ImportError:
+    has_numpy = False
+
+
+class Kind(enum.Enum):
+    NUMBER = 1
+    """A single number, decoded as int or float."""
+    ARRAY = 2
+    """An array of numbers, decoded as list."""
+    CHARS = 3
+    """A char array, decoded as bytes or str."""
+    POINTER = 4
+    """A pointer, or an array of pointers, decoded as int or list of ints."""
+    UNSUPPORTED = 5
+    """A field of unsupported type, decoded as its type name in pointy brackets."""
+
+
+Leaf = collections.namedtuple("Leaf", "path offset kind count dna_type_id")
+"""Field of simple type in a compiled DNA struct.
+
+:ivar path: the path of the field, as accepted by BlendFileBlock.get().
+    Fields of nested structs have a tuple path; elements of arrays of
+    structs have their index in the path, like (b'array', 2, b'field').
+:ivar offset: offset of the field, relative to the start of the struct.
+:ivar kind: how the field is decoded, see Kind.
+:ivar count: the number of items in the field, i.e. its array size.
+:ivar dna_type_id: the name of the type of the field, like b'float'.
+"""
+
+# struct module format characters of the supported numeric types. These are
+# the same types as BlendFileBlock.get() can read.
+_number_formats = {
+    b"int": "i",
+    b"short": "h",
+    b"uint64_t": "Q",
+    b"float": "f",
+}
+
+_decoders = (
+    weakref.WeakKeyDictionary()
+)  # type: weakref.WeakKeyDictionary[dna.Struct, typing.Dict[tuple, StructDecoder]]
+_decoders_lock = threading.Lock()
+
+
+def decoder(
+    dna_struct: dna.Struct, file_header: header.BlendFileHeader
+) -> "StructDecoder":
+    """Return the decoder for the struct, compiling it on first use."""
+    key = (file_header.pointer_size, file_header.endian_str)
+    try:
+        return _decoders[dna_struct][key]
+    except KeyError:
+        pass
+
+    compiled = StructDecoder(dna_struct, file_header)
+    with _decoders_lock:
+        _decoders.setdefault(dna_struct, {})[key] = compiled
+    return compiled
+
+
+def compile_leaves(dna_struct: dna.Struct, pointer_size: int) -> typing.List[Leaf]:
+    """Return the leaves of the struct, in the order of their offsets."""
+    leaves = []  # type: typing.List[Leaf]
+    _append_leaves(leaves, dna_struct, pointer_size, (), 0)
+    return leaves
+
+
+def _append_leaves(
+    leaves: typing.List[Leaf],
+    dna_struct: dna.Struct,
+    pointer_size: int,
+    path_prefix: tuple,
+    base_offset: int,
+) -> None:
+    for field in dna_struct.fields:
+        dna_name = field.name
+        dna_type = field.dna_type
+        type_id = dna_type.dna_type_id
+        offset = base_offset + field.offset
+        count = dna_name.array_size
+        if path_prefix:
+            path = path_prefix + (dna_name.name_only,)  # type: dna.FieldPath
+        else:
+            path = dna_name.name_only
+
+        if dna_name.is_pointer or dna_name.is_method_pointer:
+            leaves.append(Leaf(path, offset, Kind.POINTER, count, type_id))
+        elif type_id == b"char":
+            kind = Kind.NUMBER if field.size == 1 else Kind.CHARS
+            leaves.append(Leaf(path, offset, kind, count, type_id))
+        elif type_id in _number_formats:
+            kind = Kind.NUMBER if count == 1 else Kind.ARRAY
+            leaves.append(Leaf(path, offset, kind, count, type_id))
+        elif dna_type.fields:
+            # Nested struct, so recurse into its fields.
+            nested_prefix = path_prefix + (dna_name.name_only,)
+            if count == 1:
+                _append_leaves(leaves, dna_type, pointer_size, nested_prefix, offset)
+                continue
+            for index in range(count):
+                _append_leaves(
+                    leaves,
+                    dna_type,
+                    pointer_size,
+                    nested_prefix + (index,),
+                    offset + index * dna_type.size,
+                )
+        else:
+            leaves.append(Leaf(path, offset, Kind.UNSUPPORTED, count, type_id))
+
+
+def _picker(
+    indices: typing.List[int],
+) -> typing.Callable[[tuple], typing.List[typing.Any]]:
+    """Return a function that picks the items at these indices from a tuple."""
+    if not indices:
+        return lambda values: []
+    if len(indices) == 1:
+        index = indices[0]
+        return lambda values: [values[index]]
+    getter = operator.itemgetter(*indices)
+    return lambda values: list(getter(values))
+
+
+class StructDecoder:
+    """Decodes all leaves of a DNA struct from a buffer.
+
+    Use decoder() to obtain a cached instance.
+
+    :ivar leaves: the leaves of the struct, see compile_leaves().
+    :ivar paths: the paths of the leaves, in the same order.
+    """
+
+    def __init__(
+        self, dna_struct: dna.Struct, file_header: header.BlendFileHeader
+    ) -> None:
+        pointer_size = file_header.pointer_size
+        if pointer_size == 4:
+            pointer_format = "I"
+        elif pointer_size == 8:
+            pointer_format = "Q"
+        else:
+            raise ValueError("unsupported pointer size %d" % pointer_size)
+
+        self.dna_struct = dna_struct
+        self.leaves = compile_leaves(dna_struct, pointer_size)
+        self.paths = tuple(leaf.path for leaf in self.leaves)
+        self._read_data0 = file_header.endian.read_data0
+        self._endian_str = file_header.endian_str.decode()
+
+        # All leaves are decoded with one struct.Struct. After unpacking, the
+        # value of each leaf is picked from the unpacked tuple by index, and
+        # arrays, char arrays, and unsupported fields are fixed up afterwards.
+        formats = [self._endian_str]
+        first_indices = []  # type: typing.List[int]
+        # (leaf position, first value index, end value index, is numeric array)
+        self._arrays = []  # type: typing.List[typing.Tuple[int, int, int, bool]]
+        self._chars = []  # type: typing.List[int]
+        self._unsupported = []  # type: typing.List[typing.Tuple[int, str]]
+        self._item_formats = {}  # type: typing.Dict[int, str]
+
+        value_index = 0
+        end = 0
+        for position, leaf in enumerate(self.leaves):
+            kind = leaf.kind
+            if kind is Kind.UNSUPPORTED:
+                type_name = leaf.dna_type_id.decode("ascii")
+                self._unsupported.append((position, "<%s>" % type_name))
+                first_indices.append(0)
+                continue
+
+            if kind is Kind.CHARS:
+                leaf_format = "%ds" % leaf.count
+                num_values = 1
+                self._chars.append(position)
+            else:
+                if kind is Kind.POINTER:
+                    item_format = pointer_format
+                elif leaf.dna_type_id == b"char":
+                    item_format = "B"
+                else:
+                    item_format = _number_formats[leaf.dna_type_id]
+                leaf_format = "%d%s" % (leaf.count, item_format)
+                num_values = leaf.count
+                if num_values > 1:
+                    is_numeric = kind is Kind.ARRAY
+                    self._arrays.append(
+                        (position, value_index, value_index + num_values, is_numeric)
+                    )
+                    self._item_formats[position] = item_format
+
+            if leaf.offset < end:
+                raise ValueError(
+                    "%r overlaps the previous field of %r" % (leaf.path, dna_struct)
+                )
+            if leaf.offset > end:
+                formats.append("%dx" % (leaf.offset - end))
+            formats.append(leaf_format)
+            end = leaf.offset + struct.calcsize("<" + leaf_format)
+
+            first_indices.append(value_index)
+            value_index += num_values
+
+        self._struct = struct.Struct("".join(formats))
+        # Without values to unpack, there are only unsupported fields (if any).
+        self._unsupported_only = value_index == 0
+        self._pick = _picker([] if self._unsupported_only else first_indices)
+
+    @property
+    def size(self) -> int:
+        """The number of bytes read by decode(), which is at most the struct size."""
+        return self._struct.size
+
+    def decode(
+        self,
+        buffer: typing.Any,
+        offset: int = 0,
+        as_str=False,
+        null_terminated=True,
+        numpy_min_items: typing.Optional[int] = None,
+    ) -> typing.List[typing.Any]:
+        """Decode all leaves, returning their values in the order of self.leaves.
+
+        :param buffer: anything supporting the buffer protocol.
+        :param offset: offset of the start of the struct in the buffer.
+        :param as_str: decode char arrays to str instead of bytes.
+        :param null_terminated: strip char arrays at the first null byte.
+        :param numpy_min_items: return numeric arrays with at least this many
+            items as NumPy arrays, which share memory with `buffer`.
+            Ignored when NumPy is not installed, in which case lists are
+            returned as usual.
+        """
+        try:
+            unpacked = self._struct.unpack_from(buffer, offset)
+        except struct.error as ex:
+            raise struct.error("%s (at offset %d)" % (ex, offset)) from None
+
+        if self._unsupported_only:
+            values = [None] * len(self.leaves)  # type: typing.List[typing.Any]
+        else:
+            values = self._pick(unpacked)
+
+        if self._arrays:
+            use_numpy = has_numpy and numpy_min_items is not None
+            for position, start, stop, is_numeric in self._arrays:
+                if is_numeric and use_numpy and stop - start >= numpy_min_items:
+                    values[position] = numpy.frombuffer(
+                        buffer,
+                        dtype=self._endian_str + self._item_formats[position],
+                        count=stop - start,
+                        offset=offset + self.leaves[position].offset,
+                    )
+                else:
+                    values[position] = list(unpacked[start:stop])
+
+        if self._chars:
+            strip = null_terminated or (null_terminated is None and as_str)
+            read_data0 = self._read_data0
+            for position in self._chars:
+                data = values[position]
+                if strip:
+                    data = read_data0(data)
+                values[position] = data.decode("utf8") if as_str else data
+
+        for position, type_name in self._unsupported:
+            values[position] = type_name
+        return values
+
+    def decode_dict(
+        self, buffer: typing.Any, offset: int = 0, **kwargs
+    ) -> typing.Dict[dna.FieldPath, typing.Any]:
+        """Decode all leaves, returning a {path: value} dict.
+
+        Takes the same parameters as decode().
+        """
+        return dict(zip(self.paths, self.decode(buffer, offset, **kwargs)))
@@ -0,0 +1,305 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Process-wide cache of decoded SDNA catalogs.
+
+All blend files written by the same Blender build contain the same DNA1 block.
+Decoding it is only done once per process, and the result is shared between
+all BlendFile instances that have the same DNA1 block, pointer size, and
+endianness. The decoded catalog is never modified after it has been created;
+refining the type of a block only changes which struct the block uses.
+
+The catalog can also be stored on disk, so that new processes (like each
+invocation of the BAT CLI) can skip decoding as well. It is stored as JSON,
+with bytes decoded as Latin-1. The total size of the stored catalogs is
+limited; when it is exceeded, the least recently used ones are removed. This
+is disabled by default; call set_disk_cache() to enable it.
+"""
+import collections
+import hashlib
+import json
+import logging
+import threading
+import typing
+from pathlib import Path
+
+from . import cache_dir, dna, header
+
+CACHE_ROOT = Path().home() / ".cache/blender-asset-tracer/sdna"
+DEFAULT_MAX_BYTES = 64 * 2**20
+
+# Increase this when the on-disk format or the attributes of dna.Name change,
+# to ignore catalogs stored on disk by older versions of BAT. Version 1 was
+# stored as pickle files, which are not read any more.
+FORMAT_VERSION = 2
+
+SUFFIX = ".sdna.json"
+
+log = logging.getLogger(__name__)
+
+Catalog = collections.namedtuple("Catalog", "structs sdna_index_from_id")
+"""Decoded DNA1 block.
+
+:ivar structs: list of dna.Struct, indexed by SDNA index.
+:ivar sdna_index_from_id: mapping from struct name to SDNA index.
+"""
+
+_catalogs = {}  # type: typing.Dict[str, Catalog]
+_lock = threading.Lock()
+_disk_cache_root = None  # type: typing.Optional[Path]
+_max_bytes = DEFAULT_MAX_BYTES
+
+
+def set_disk_cache(
+    root: typing.Optional[Path], max_bytes: int = DEFAULT_MAX_BYTES
+) -> None:
+    """Store decoded catalogs in this directory, or disable with None.
+
+    Use CACHE_ROOT for the default location.
+
+    :param max_bytes: maximum total size of the stored catalogs. When this is
+        exceeded, the least recently used catalogs are removed.
+    """
+    global _disk_cache_root, _max_bytes
+    _disk_cache_root = root
+    _max_bytes = max_bytes
+
+
+def cache_key(dna1_data: bytes, file_header: header.BlendFileHeader) -> str:
+    """Compute the cache key for the DNA1 block of a blend file."""
+    digest = hashlib.blake2b(dna1_data, digest_size=20).hexdigest()
+    endian = "le" if file_header.endian_str == b"<" else "be"
+    return "%s-%d%s" % (digest, file_header.pointer_size * 8, endian)
+
+
+def get(key: str) -> typing.Optional[Catalog]:
+    """Return the cached catalog, or None if it is not cached."""
+    try:
+        return _catalogs[key]
+    except KeyError:
+        pass
+
+    catalog = _load(key)
+    if catalog is None:
+        return None
+
+    with _lock:
+        # Another thread may have beaten us to it; make sure everybody shares
+        # the same catalog.
+        return _catalogs.setdefault(key, catalog)
+
+
+def put(key: str, catalog: Catalog) -> Catalog:
+    """Store the catalog in the cache.
+
+    :return: the cached catalog, which is a different one than the given
+        catalog if another thread stored one first.
+    """
+    with _lock:
+        if key in _catalogs:
+            return _catalogs[key]
+        _catalogs[key] = catalog
+
+    _save(key, catalog)
+    return catalog
+
+
+def clear() -> None:
+    """Forget all catalogs cached in memory."""
+    with _lock:
+        _catalogs.clear()
+
+
+def _disk_path(key: str) -> typing.Optional[Path]:
+    if _disk_cache_root is None:
+        return None
+    return _disk_cache_root / (key + SUFFIX)
+
+
+def _load(key: str) -> typing.Optional[Catalog]:
+    path = _disk_path(key)
+    if path is None:
+        return None
+
+    try:
+        with path.open("rb") as infile:
+            payload = json.load(infile)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as ex:
+        # ValueError also covers JSON and Unicode decoding errors.
+        log.warning("Unable to read SDNA cache file %s: %s", path, ex)
+        return None
+
+    try:
+        version = payload["format_version"]
+        stored_key = payload["key"]
+    except (TypeError, KeyError):
+        version = stored_key = None
+    if version != FORMAT_VERSION or stored_key != key:
+        log.debug("Ignoring outdated SDNA cache file %s", path)
+        return None
+
+    try:
+        catalog = _unflatten(payload["catalog"])
+    except (KeyError, TypeError, ValueError, IndexError) as ex:
+        log.warning("Invalid SDNA cache file %s: %s", path, ex)
+        return None
+
+    # Mark as recently used, for the eviction in _save().
+    cache_dir.touch(path)
+
+    log.debug("Loaded DNA catalog from %s", path)
+    return catalog
+
+
+def _save(key: str, catalog: Catalog) -> None:
+    path = _disk_path(key)
+    if path is None:
+        return
+
+    payload = {
+        "format_version": FORMAT_VERSION,
+        "key": key,
+        "catalog": _flatten(catalog),
+    }
+    try:
+        with cache_dir.atomic_write(path) as outfile:
+            outfile.write(json.dumps(payload, separators=(",", ":")).encode("ascii"))
+    except OSError as ex:
+        log.warning("Unable to write SDNA cache file %s: %s", path, ex)
+        return
+    log.debug("Stored DNA catalog in %s", path)
+
+    assert _disk_cache_root is not None
+    cache_dir.evict(_disk_cache_root, SUFFIX, _max_bytes)
+    # Remove the files of format version 1, which are no longer read.
+    for old_path, _ in cache_dir.files(_disk_cache_root, ".pickle"):
+        cache_dir.remove(old_path)
+
+
+def _flatten(catalog: Catalog) -> typing.Dict[str, list]:
+    """Convert the catalog to lists of JSON-compatible values.
+
+    Storing the dna.Struct objects themselves results in files that take
+    longer to load than decoding the DNA1 block does, so only the values
+    needed to reconstruct them are stored. Bytes are stored as Latin-1
+    strings, which maps each byte to one character.
+    """
+    name_indices = {}  # type: typing.Dict[int, int]
+    names = []  # type: typing.List[list]
+    type_indices = {}  # type: typing.Dict[int, int]
+    types = []  # type: typing.List[list]
+
+    def type_index(dna_struct: dna.Struct) -> int:
+        try:
+            return type_indices[id(dna_struct)]
+        except KeyError:
+            pass
+        index = type_indices[id(dna_struct)] = len(types)
+        types.append([_str(dna_struct.dna_type_id), dna_struct._size])
+        return index
+
+    def name_index(name: dna.Name) -> int:
+        try:
+            return name_indices[id(name)]
+        except KeyError:
+            pass
+        index = name_indices[id(name)] = len(names)
+        names.append(
+            [
+                _str(name.name_full),
+                _str(name.name_only),
+                name.is_pointer,
+                name.is_method_pointer,
+                name.array_size,
+            ]
+        )
+        return index
+
+    structs = [
+        [
+            type_index(dna_struct),
+            [
+                [type_index(f.dna_type), name_index(f.name), f.size, f.offset]
+                for f in dna_struct.fields
+            ],
+        ]
+        for dna_struct in catalog.structs
+    ]
+    sdna_index_from_id = [
+        [_str(dna_type_id), sdna_index]
+        for dna_type_id, sdna_index in catalog.sdna_index_from_id.items()
+    ]
+    return {
+        "names": names,
+        "types": types,
+        "structs": structs,
+        "sdna_index_from_id": sdna_index_from_id,
+    }
+
+
+def _unflatten(flat_catalog: typing.Dict[str, list]) -> Catalog:
+    """Reconstruct the catalog from the output of _flatten().
+
+    :raises ValueError: when the values are not what _flatten() produces.
+        Only the structure and the strings are checked; numbers of the wrong
+        type result in errors when the catalog is used.
+    """
+    flat_names = flat_catalog["names"]
+    names = []
+    for name_full, name_only, is_pointer, is_method_pointer, array_size in flat_names:
+        # Skip dna.Name.__init__(), as the parsed values are already known.
+        name = dna.Name.__new__(dna.Name)
+        name.name_full = _bytes(name_full)
+        name.name_only = _bytes(name_only)
+        name.is_pointer = is_pointer
+        name.is_method_pointer = is_method_pointer
+        name.array_size = array_size
+        names.append(name)
+
+    types = [
+        dna.Struct(_bytes(dna_type_id), size)
+        for dna_type_id, size in flat_catalog["types"]
+    ]
+
+    structs = []
+    for type_index, fields in flat_catalog["structs"]:
+        dna_struct = types[type_index]
+        for field_type_index, name_index, size, offset in fields:
+            field = dna.Field(types[field_type_index], names[name_index], size, offset)
+            dna_struct.append_field(field)
+        structs.append(dna_struct)
+
+    sdna_index_from_id = {
+        _bytes(dna_type_id): sdna_index
+        for dna_type_id, sdna_index in flat_catalog["sdna_index_from_id"]
+    }
+    return Catalog(structs, sdna_index_from_id)
+
+
+def _str(value: bytes) -> str:
+    return value.decode("latin-1")
+
+
+def _bytes(value: str) -> bytes:
+    try:
+        return value.encode("latin-1")
+    except AttributeError:
+        raise ValueError("expected a string, not %r" % (value,)) from None
@@ -22,6 +22,7 @@
 import argparse
 import datetime
 import logging
+import sys
 import time
 
 from . import blocks, common, pack, list_deps, version
@@ -69,6 +70,46 @@ def cli_main():
         action="store_true",
         help="Crash on pointers to missing data; otherwise the missing data is just ignored.",
     )
+    parser.add_argument(
+        "--no-block-index",
+        default=False,
+        action="store_true",
+        help="Do not use the index of previously scanned blend files; always "
+        "scan blend files completely.",
+    )
+    parser.add_argument(
+        "--clear-block-index",
+        default=False,
+        action="store_true",
+        help="Remove the index of previously scanned blend files before running.",
+    )
+    parser.add_argument(
+        "--trace-cache",
+        default=False,
+        action="store_true",
+        help="Store the results of tracing libraries, and reuse them in later "
+        "runs for libraries that did not change. Experimental.",
+    )
+    parser.add_argument(
+        "--clear-trace-cache",
+        default=False,
+        action="store_true",
+        help="Remove the stored results of tracing libraries before running.",
+    )
+    parser.add_argument(
+        "--decompressed-cache",
+        default=False,
+        action="store_true",
+        help="Keep decompressed copies of compressed blend files on disk, so that "
+        "later runs do not have to decompress them again.",
+    )
+    parser.add_argument(
+        "--decompressed-cache-size",
+        type=float,
+        default=10.0,
+        metavar="GB",
+        help="Maximum size of the decompressed copies, in GiB. Default: %(default)s",
+    )
 
     subparsers = parser.add_subparsers(
         help="Choose a subcommand to actually make BAT do something. "
@@ -98,6 +139,7 @@ def cli_main():
         parser.error("No subcommand was given")
 
     set_strict_pointer_mode(args.strict_pointers)
+    enable_disk_caches(args)
 
     start_time = time.time()
     if args.profile:
@@ -105,9 +147,9 @@ def cli_main():
 
         prof_fname = "bam.prof"
         log.info("Running profiler")
-        cProfile.runctx(
-            "args.func(args)", globals=globals(), locals=locals(), filename=prof_fname
-        )
+        profiler = cProfile.Profile()
+        retval = profiler.runcall(args.func, args)
+        profiler.dump_stats(prof_fname)
         log.info("Profiler exported data to %s", prof_fname)
         log.info(
             'Run "pyprof2calltree -i %r -k" to convert and open in KCacheGrind',
@@ -118,6 +160,10 @@ def cli_main():
     duration = datetime.timedelta(seconds=time.time() - start_time)
     log.info("Command took %s to complete", duration)
 
+    # Subcommands return a non-zero exit status on failure.
+    if retval:
+        sys.exit(retval)
+
 
 def config_logging(args):
     """Configures the logging system based on CLI arguments."""
@@ -135,3 +181,31 @@ def set_strict_pointer_mode(strict_pointers: bool) -> None:
     from blender_asset_tracer import blendfile
 
     blendfile.set_strict_pointer_mode(strict_pointers)
+
+
+def enable_disk_caches(args) -> None:
+    """Keep decoded data on disk, so that the next BAT invocation can reuse it."""
+    from blender_asset_tracer.blendfile import (
+        block_index,
+        decompressed_cache,
+        sdna_cache,
+    )
+    from blender_asset_tracer.trace import library_cache
+
+    sdna_cache.set_disk_cache(sdna_cache.CACHE_ROOT)
+
+    block_index.set_disk_cache(block_index.CACHE_ROOT)
+    if args.clear_block_index:
+        block_index.clear()
+    if args.no_block_index:
+        block_index.set_disk_cache(None)
+
+    library_cache.set_disk_cache(library_cache.CACHE_ROOT)
+    if args.clear_trace_cache:
+        library_cache.clear()
+    if not args.trace_cache:
+        library_cache.set_disk_cache(None)
+
+    if args.decompressed_cache:
+        max_bytes = int(args.decompressed_cache_size * 2**30)
+        decompressed_cache.set_disk_cache(decompressed_cache.CACHE_ROOT, max_bytes)
@@ -23,6 +23,7 @@ import logging
 import pathlib
 
 from blender_asset_tracer import blendfile
+from blender_asset_tracer.blendfile import record
 from . import common
 
 log = logging.getLogger(__name__)
@@ -124,10 +125,20 @@ def cli_blocks(args):
     addr_to_find = biggest_block.addr_old
     found_pointer = False
     for block in bfile.blocks:
-        for prop_path, prop_value in block.items_recursive():
-            if not isinstance(prop_value, int) or prop_value != addr_to_find:
+        decoder = record.decoder(block.dna_type, bfile.header)
+        data = block.raw_data()
+        if len(data) < decoder.size:
+            # Raw data, not the DNA struct of the block.
+            continue
+        values = decoder.decode(data)
+        for leaf, prop_value in zip(decoder.leaves, values):
+            if leaf.kind is not record.Kind.POINTER:
+                continue
+            if prop_value != addr_to_find and (
+                not isinstance(prop_value, list) or addr_to_find not in prop_value
+            ):
                 continue
-            print("    ", block, prop_path)
+            print("    ", block, leaf.path)
             found_pointer = True
 
     if not found_pointer:
@@ -135,8 +146,7 @@ def cli_blocks(args):
 
     if args.dump:
         print("Hexdump:")
-        bfile.fileobj.seek(biggest_block.file_offset)
-        data = bfile.fileobj.read(biggest_block.size)
+        data = biggest_block.raw_data()
         line_len_bytes = 32
         import codecs
 
@@ -18,6 +18,7 @@
 #
 # (c) 2018, Blender Foundation - Sybren A. Stüvel
 """List dependencies of a blend file."""
+import collections
 import functools
 import hashlib
 import json
@@ -28,6 +29,7 @@ import time
 import typing
 
 from blender_asset_tracer import trace, bpathlib
+from blender_asset_tracer.trace import batch
 from . import common
 
 log = logging.getLogger(__name__)
@@ -38,7 +40,14 @@ def add_parser(subparsers):
 
     parser = subparsers.add_parser("list", help=__doc__)
     parser.set_defaults(func=cli_list)
-    parser.add_argument("blendfile", type=pathlib.Path)
+    parser.add_argument(
+        "blendfile",
+        type=pathlib.Path,
+        nargs="+",
+        help="Blend file to list the dependencies of. When more than one blend "
+        "file or a directory is given, all blend files are traced as one batch, "
+        "and libraries shared between them are only traced once.",
+    )
     common.add_flag(
         parser, "json", help="Output as JSON instead of human-readable text"
     )
@@ -49,22 +58,46 @@ def add_parser(subparsers):
         "SHA256sums in a BAT-pack when paths are rewritten.",
     )
     common.add_flag(parser, "timing", help="Include timing information in the output")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of processes used to trace linked libraries in parallel",
+    )
 
 
 def cli_list(args):
-    bpath = args.blendfile
-    if not bpath.exists():
-        log.fatal("File %s does not exist", args.blendfile)
-        return 3
-
     if args.json:
         if args.sha256:
             log.fatal("--sha256 can currently not be used in combination with --json")
         if args.timing:
             log.fatal("--timing can currently not be used in combination with --json")
-        report_json(bpath)
+
+    paths = args.blendfile
+    if len(paths) > 1 or paths[0].is_dir():
+        if args.json:
+            return report_batch_json(paths, jobs=args.jobs)
+        return report_batch_text(
+            paths,
+            include_sha256=args.sha256,
+            show_timing=args.timing,
+            jobs=args.jobs,
+        )
+
+    bpath = paths[0]
+    if not bpath.exists():
+        log.fatal("File %s does not exist", bpath)
+        return 3
+
+    if args.json:
+        report_json(bpath, jobs=args.jobs)
     else:
-        report_text(bpath, include_sha256=args.sha256, show_timing=args.timing)
+        report_text(
+            bpath,
+            include_sha256=args.sha256,
+            show_timing=args.timing,
+            jobs=args.jobs,
+        )
 
 
 def calc_sha_sum(filepath: pathlib.Path) -> typing.Tuple[str, float]:
@@ -90,23 +123,67 @@ def calc_sha_sum(filepath: pathlib.Path) -> typing.Tuple[str, float]:
     return digest, duration
 
 
-def report_text(bpath, *, include_sha256: bool, show_timing: bool):
+def report_text(bpath, *, include_sha256: bool, show_timing: bool, jobs: int = 1):
+    start_time = time.time()
+    usages = trace.deps(bpath, jobs=jobs)
+    time_spent_on_shasums = print_usages(usages, include_sha256=include_sha256)
+    if show_timing:
+        print_timing(time.time() - start_time, include_sha256, time_spent_on_shasums)
+
+
+def report_batch_text(
+    paths: typing.List[pathlib.Path],
+    *,
+    include_sha256: bool,
+    show_timing: bool,
+    jobs: int = 1
+) -> int:
+    """Report the dependencies of each blend file, indented under its path."""
+    shorten = functools.partial(common.shorten, pathlib.Path.cwd())
+    start_time = time.time()
+    time_spent_on_shasums = 0.0
+    failed = []  # type: typing.List[pathlib.Path]
+
+    for root_result in batch.deps(paths, jobs=jobs):
+        print("%s:" % shorten(root_result.root))
+        time_spent_on_shasums += print_usages(
+            root_result.graph.usages, include_sha256=include_sha256, indent="    "
+        )
+        if root_result.error is not None:
+            print("    FAILED: %s" % root_result.error)
+            failed.append(root_result.root)
+
+    if show_timing:
+        print_timing(time.time() - start_time, include_sha256, time_spent_on_shasums)
+    return _report_failures(failed)
+
+
+def print_usages(
+    usages: typing.Iterable[trace.result.BlockUsage],
+    *,
+    include_sha256: bool,
+    indent: str = ""
+) -> float:
+    """Print the blend files and their assets.
+
+    :return: the time spent on calculating SHA256sums, in seconds.
+    """
     reported_assets = set()  # type: typing.Set[pathlib.Path]
     last_reported_bfile = None
     shorten = functools.partial(common.shorten, pathlib.Path.cwd())
+    asset_indent = indent + "   "
 
     time_spent_on_shasums = 0.0
-    start_time = time.time()
 
-    for usage in trace.deps(bpath):
-        filepath = usage.block.bfile.filepath.absolute()
+    for usage in usages:
+        filepath = usage.bfile_path.absolute()
         if filepath != last_reported_bfile:
             if include_sha256:
                 shasum, time_spent = calc_sha_sum(filepath)
                 time_spent_on_shasums += time_spent
-                print(shorten(filepath), shasum)
+                print(indent + str(shorten(filepath)), shasum)
             else:
-                print(shorten(filepath))
+                print(indent + str(shorten(filepath)))
 
         last_reported_bfile = filepath
 
@@ -119,18 +196,22 @@ def report_text(bpath, *, include_sha256: bool, show_timing: bool):
             if include_sha256:
                 shasum, time_spent = calc_sha_sum(assetpath)
                 time_spent_on_shasums += time_spent
-                print("   ", shorten(assetpath), shasum)
+                print(asset_indent, shorten(assetpath), shasum)
             else:
-                print("   ", shorten(assetpath))
+                print(asset_indent, shorten(assetpath))
             reported_assets.add(assetpath)
 
-    if show_timing:
-        duration = time.time() - start_time
-        print("Spent %.2f seconds on producing this listing" % duration)
-        if include_sha256:
-            print("Spent %.2f seconds on calculating SHA sums" % time_spent_on_shasums)
-            percentage = time_spent_on_shasums / duration * 100
-            print("  (that is %d%% of the total time" % percentage)
+    return time_spent_on_shasums
+
+
+def print_timing(
+    duration: float, include_sha256: bool, time_spent_on_shasums: float
+) -> None:
+    print("Spent %.2f seconds on producing this listing" % duration)
+    if include_sha256:
+        print("Spent %.2f seconds on calculating SHA sums" % time_spent_on_shasums)
+        percentage = time_spent_on_shasums / duration * 100
+        print("  (that is %d%% of the total time" % percentage)
 
 
 class JSONSerialiser(json.JSONEncoder):
@@ -142,16 +223,47 @@ class JSONSerialiser(json.JSONEncoder):
         return super().default(o)
 
 
-def report_json(bpath):
-    import collections
+def report_json(bpath, *, jobs: int = 1):
+    report = json_report(trace.deps(bpath, jobs=jobs))
+    json.dump(report, sys.stdout, cls=JSONSerialiser, indent=4)
+
+
+def report_batch_json(paths: typing.List[pathlib.Path], *, jobs: int = 1) -> int:
+    """Report the dependencies per blend file, as mapping from its path.
 
-    # Mapping from blend file to its dependencies.
-    report = collections.defaultdict(set)
+    Blend files that could not be traced are reported with the dependencies
+    found before the failure, and logged as error.
+    """
+    report = {}  # type: typing.Dict[str, typing.Dict[str, typing.Set[pathlib.Path]]]
+    failed = []  # type: typing.List[pathlib.Path]
+    for root_result in batch.deps(paths, jobs=jobs):
+        root = bpathlib.make_absolute(root_result.root)
+        report[str(root)] = json_report(root_result.graph.usages)
+        if root_result.error is not None:
+            failed.append(root_result.root)
+
+    json.dump(report, sys.stdout, cls=JSONSerialiser, indent=4)
+    return _report_failures(failed)
 
-    for usage in trace.deps(bpath):
-        filepath = usage.block.bfile.filepath.absolute()
+
+def json_report(
+    usages: typing.Iterable[trace.result.BlockUsage],
+) -> typing.Dict[str, typing.Set[pathlib.Path]]:
+    """Return the mapping from blend file to its dependencies."""
+    report = collections.defaultdict(set)  # type: typing.DefaultDict[str, typing.Set[pathlib.Path]]
+
+    for usage in usages:
+        filepath = usage.bfile_path.absolute()
         for assetpath in usage.files():
             assetpath = assetpath.resolve()
             report[str(filepath)].add(assetpath)
+    return report
 
-    json.dump(report, sys.stdout, cls=JSONSerialiser, indent=4)
+
+def _report_failures(failed: typing.List[pathlib.Path]) -> int:
+    if not failed:
+        return 0
+    log.error("Unable to trace %d blend files:", len(failed))
+    for path in failed:
+        log.error("    %s", path)
+    return 1
@@ -27,7 +27,7 @@ import threading
 import typing
 
 from blender_asset_tracer import trace, bpathlib, blendfile
-from blender_asset_tracer.trace import file_sequence, result
+from blender_asset_tracer.trace import depgraph, file_sequence, result
 
 from . import filesystem, transfer, progress
 
@@ -122,6 +122,11 @@ class Packer:
 
         self._exclude_globs = set()  # type: typing.Set[str]
 
+        # Set this to the dependency graph of the blend file, as returned by
+        # trace.dependency_graph(), before calling strategise() to reuse that
+        # trace. Otherwise it is set by strategise().
+        self.graph = None  # type: typing.Optional[depgraph.DependencyGraph]
+
         self._shorten = functools.partial(shorten_path, self.project)
 
         if noop:
@@ -254,7 +259,7 @@ class Packer:
 
         self._check_aborted()
         self._new_location_paths = set()
-        for usage in trace.deps(self.blendfile, self._progress_cb):
+        for usage in self._usages(bfile_path):
             self._check_aborted()
             asset_path = usage.abspath
             if any(asset_path.match(glob) for glob in self._exclude_globs):
@@ -273,6 +278,22 @@ class Packer:
         self._find_new_paths()
         self._group_rewrites()
 
+    def _usages(self, bfile_path: pathlib.Path) -> typing.Iterator[result.BlockUsage]:
+        """Return the block usages of the blend file, tracing it if necessary."""
+        graph = self.graph
+        if graph is None:
+            self.graph = depgraph.DependencyGraph(bfile_path)
+            return self.graph.add_usages(trace.deps(self.blendfile, self._progress_cb))
+
+        if graph.paths[graph.root] != bfile_path:
+            raise ValueError(
+                "Dependency graph is of %s, not of %s"
+                % (graph.paths[graph.root], bfile_path)
+            )
+        if len(graph.usages) != len(graph.edges):
+            raise ValueError("Dependency graph has no BlockUsages, it cannot be packed")
+        return iter(graph.usages)
+
     def _visit_sequence(self, asset_path: pathlib.Path, usage: result.BlockUsage):
         assert usage.is_sequence
 
@@ -311,7 +332,9 @@ class Packer:
             self._progress_cb.missing_file(asset_path)
             return
 
-        bfile_path = usage.block.bfile.filepath.absolute()
+        # Use bfile_path instead of the block, as that doesn't open the blend file
+        # of usages loaded from the trace.library_cache.
+        bfile_path = usage.bfile_path.absolute()
         self._progress_cb.trace_asset(asset_path)
 
         # Needing rewriting is not a per-asset thing, but a per-asset-per-
@@ -366,7 +389,7 @@ class Packer:
                 continue
 
             for usage in action.usages:
-                bfile_path = bpathlib.make_absolute(usage.block.bfile.filepath)
+                bfile_path = bpathlib.make_absolute(usage.bfile_path)
                 insert_new_action = bfile_path not in self._actions
 
                 self._actions[bfile_path].rewrites.append(usage)
@@ -477,80 +500,113 @@ class Packer:
             bfile_pp = action.new_path
             assert bfile_pp is not None, \
                 f"Action {action.path_action.name} on {bfile_path} has no final path set, unable to process"
+            log.info("Rewriting %s", bfile_path)
+
+            # The original blend file will usually have been cached, so we can
+            # use it to avoid re-parsing all data blocks in the to-be-rewritten
+            # file. Libraries whose trace result came from the
+            # trace.library_cache are only opened here. The file is opened
+            # read-only, so the changes are kept in memory until they are
+            # written to a temporary file below.
+            bfile = blendfile.open_cached(bfile_path)
+            if bfile.is_writable:
+                # Opened for writing elsewhere in this process; leave that
+                # file alone, and open it again read-only.
+                log.debug("%s is opened for writing, reopening it", bfile_path)
+                bfile = blendfile.BlendFile(bfile_path)
+
+            try:
+                with bfile.patch_mode():
+                    bfile_tp = self._rewrite_blendfile(
+                        bfile_path, bfile_pp, bfile, action
+                    )
+            finally:
+                # Closing also discards the changes, which are kept in memory.
+                bfile.close()
+            if bfile_tp is not None:
+                action.read_from = bfile_tp
 
-            # Use tempfile to create a unique name in our temporary directoy.
-            # The file should be deleted when self.close() is called, and not
-            # when the bfile_tp object is GC'd.
-            bfile_tmp = tempfile.NamedTemporaryFile(
-                dir=str(self._rewrite_in),
-                prefix="bat-",
-                suffix="-" + bfile_path.name,
-                delete=False,
-            )
-            bfile_tp = pathlib.Path(bfile_tmp.name)
-            action.read_from = bfile_tp
-            log.info("Rewriting %s to %s", bfile_path, bfile_tp)
-
-            # The original blend file will have been cached, so we can use it
-            # to avoid re-parsing all data blocks in the to-be-rewritten file.
-            bfile = blendfile.open_cached(bfile_path, assert_cached=True)
-            bfile.copy_and_rebind(bfile_tp, mode="rb+")
+    def _rewrite_blendfile(
+        self,
+        bfile_path: pathlib.Path,
+        bfile_pp: pathlib.Path,
+        bfile: blendfile.BlendFile,
+        action: AssetAction,
+    ) -> typing.Optional[pathlib.Path]:
+        """Rewrite the paths in one blend file.
+
+        :returns: the temporary file the rewritten blend file was written to,
+            or None if no paths had to be changed.
+        """
+        for usage in action.rewrites:
+            self._check_aborted()
+            assert isinstance(usage, result.BlockUsage)
+            asset_pp = self._actions[usage.abspath].new_path
+            assert isinstance(asset_pp, pathlib.Path)
+
+            log.debug("   - %s is packed at %s", usage.asset_path, asset_pp)
+            relpath = bpathlib.BlendPath.mkrelative(asset_pp, bfile_pp)
+            if relpath == usage.asset_path:
+                log.info("   - %s remained at %s", usage.asset_path, relpath)
+                continue
 
-            for usage in action.rewrites:
-                self._check_aborted()
-                assert isinstance(usage, result.BlockUsage)
-                asset_pp = self._actions[usage.abspath].new_path
-                assert isinstance(asset_pp, pathlib.Path)
-
-                log.debug("   - %s is packed at %s", usage.asset_path, asset_pp)
-                relpath = bpathlib.BlendPath.mkrelative(asset_pp, bfile_pp)
-                if relpath == usage.asset_path:
-                    log.info("   - %s remained at %s", usage.asset_path, relpath)
-                    continue
-
-                log.info("   - %s moved to %s", usage.asset_path, relpath)
-
-                # Find the same block in the newly copied file.
-                block = bfile.dereference_pointer(usage.block.addr_old)
-
-                # Pointers can point to a non-existing data block, in which case
-                # either a SegmentationFault exception is thrown, or None is
-                # returned, based on the strict pointer mode set on the
-                # BlendFile class. Since this block was already meant to be
-                # rewritten, it was found before.
-                assert block is not None
-
-                if usage.path_full_field is None:
-                    dir_field = usage.path_dir_field
-                    assert dir_field is not None
-                    log.debug(
-                        "   - updating field %s of block %s",
-                        dir_field.name.name_only,
-                        block,
-                    )
-                    reldir = bpathlib.BlendPath.mkrelative(asset_pp.parent, bfile_pp)
-                    written = block.set(dir_field.name.name_only, reldir)
-                    log.debug("   - written %d bytes", written)
-
-                    # BIG FAT ASSUMPTION that the filename (e.g. basename
-                    # without path) does not change. This makes things much
-                    # easier, as in the sequence editor the directory and
-                    # filename fields are in different blocks. See the
-                    # blocks2assets.scene() function for the implementation.
-                else:
-                    log.debug(
-                        "   - updating field %s of block %s",
-                        usage.path_full_field.name.name_only,
-                        block,
-                    )
-                    written = block.set(usage.path_full_field.name.name_only, relpath)
-                    log.debug("   - written %d bytes", written)
-
-            # Make sure we close the file, otherwise changes may not be
-            # flushed before it gets copied.
-            if bfile.is_modified:
-                self._progress_cb.rewrite_blendfile(bfile_path)
-            bfile.close()
+            log.info("   - %s moved to %s", usage.asset_path, relpath)
+
+            # Find the same block in the cached file.
+            block = bfile.dereference_pointer(usage.block.addr_old)
+
+            # Pointers can point to a non-existing data block, in which case
+            # either a SegmentationFault exception is thrown, or None is
+            # returned, based on the strict pointer mode set on the
+            # BlendFile class. Since this block was already meant to be
+            # rewritten, it was found before.
+            assert block is not None
+
+            if usage.path_full_field is None:
+                dir_field = usage.path_dir_field
+                assert dir_field is not None
+                log.debug(
+                    "   - updating field %s of block %s",
+                    dir_field.name.name_only,
+                    block,
+                )
+                reldir = bpathlib.BlendPath.mkrelative(asset_pp.parent, bfile_pp)
+                written = block.set(dir_field.name.name_only, reldir)
+                log.debug("   - written %d bytes", written)
+
+                # BIG FAT ASSUMPTION that the filename (e.g. basename
+                # without path) does not change. This makes things much
+                # easier, as in the sequence editor the directory and
+                # filename fields are in different blocks. See the
+                # blocks2assets.scene() function for the implementation.
+            else:
+                log.debug(
+                    "   - updating field %s of block %s",
+                    usage.path_full_field.name.name_only,
+                    block,
+                )
+                written = block.set(usage.path_full_field.name.name_only, relpath)
+                log.debug("   - written %d bytes", written)
+
+        if not bfile.is_modified:
+            # Nothing changed, so the original file can be copied as-is.
+            return None
+
+        # Use tempfile to create a unique name in our temporary directoy.
+        # The file should be deleted when self.close() is called, and not
+        # when the bfile_tp object is GC'd.
+        bfile_tmp = tempfile.NamedTemporaryFile(
+            dir=str(self._rewrite_in),
+            prefix="bat-",
+            suffix="-" + bfile_path.name,
+            delete=False,
+        )
+        bfile_tp = pathlib.Path(bfile_tmp.name)
+        log.info("Writing rewritten %s to %s", bfile_path, bfile_tp)
+        self._progress_cb.rewrite_blendfile(bfile_path)
+        with bfile_tmp:
+            bfile.write_to(bfile_tmp, bfile.compression)
+        return bfile_tp
 
     def _copy_asset_and_deps(self, asset_path: pathlib.Path, action: AssetAction):
         # Copy the asset itself, but only if it's not a sequence (sequences are
@@ -22,7 +22,7 @@ import pathlib
 import typing
 
 from blender_asset_tracer import blendfile
-from . import result, blocks2assets, file2blocks, progress
+from . import result, blocks2assets, depgraph, file2blocks, library_cache, progress
 
 log = logging.getLogger(__name__)
 
@@ -41,30 +41,72 @@ codes_to_skip = {
 
 
 def deps(
-    bfilepath: pathlib.Path, progress_cb: typing.Optional[progress.Callback] = None
+    bfilepath: pathlib.Path,
+    progress_cb: typing.Optional[progress.Callback] = None,
+    jobs: int = 1,
 ) -> typing.Iterator[result.BlockUsage]:
     """Open the blend file and report its dependencies.
 
     :param bfilepath: File to open.
     :param progress_cb: Progress callback object.
+    :param jobs: Number of worker processes that trace the linked libraries.
+        With more than one job, libraries are traced in parallel; the result
+        is identical to tracing them one by one. See the `parallel` module.
+        This is also used when the `library_cache` is enabled.
     """
 
-    bi = file2blocks.BlockIterator()
-    if progress_cb:
-        bi.progress_cb = progress_cb
-    bfile = bi.open_blendfile(bfilepath)
+    if jobs > 1 or library_cache.is_enabled():
+        from . import parallel
+
+        usages = parallel.iter_usages(bfilepath, progress_cb, jobs)
+    else:
+        usages = _iter_usages(bfilepath, progress_cb)
+
+    yield from _unique_usages(usages)
+
+
+def _unique_usages(
+    usages: typing.Iterable[result.BlockUsage],
+) -> typing.Iterator[result.BlockUsage]:
+    """Generator, skip the block usages that were reported already."""
 
     # Remember which block usages we've reported already, without keeping the
     # blocks themselves in memory.
     seen_hashes = set()  # type: typing.Set[int]
 
+    for block_usage in usages:
+        usage_hash = hash(block_usage)
+        if usage_hash in seen_hashes:
+            continue
+        seen_hashes.add(usage_hash)
+        yield block_usage
+
+
+def dependency_graph(
+    bfilepath: pathlib.Path,
+    progress_cb: typing.Optional[progress.Callback] = None,
+    jobs: int = 1,
+) -> depgraph.DependencyGraph:
+    """Trace the blend file into a graph of blend files and assets.
+
+    The parameters are the same as for deps().
+    """
+    graph = depgraph.DependencyGraph(bfilepath)
+    for _ in graph.add_usages(deps(bfilepath, progress_cb, jobs)):
+        pass
+    return graph
+
+
+def _iter_usages(
+    bfilepath: pathlib.Path, progress_cb: typing.Optional[progress.Callback]
+) -> typing.Iterator[result.BlockUsage]:
+    bi = file2blocks.BlockIterator()
+    if progress_cb:
+        bi.progress_cb = progress_cb
+    bfile = bi.open_blendfile(bfilepath)
+
     for block in asset_holding_blocks(bi.iter_blocks(bfile)):
-        for block_usage in blocks2assets.iter_assets(block):
-            usage_hash = hash(block_usage)
-            if usage_hash in seen_hashes:
-                continue
-            seen_hashes.add(usage_hash)
-            yield block_usage
+        yield from blocks2assets.iter_assets(block)
 
 
 def asset_holding_blocks(
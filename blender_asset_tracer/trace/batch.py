@@ -0,0 +1,111 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Trace many blend files that share libraries.
+
+Calling trace.deps() for each of many blend files, like all the shots of a
+production, traces the shared libraries again for every file. Batch tracing
+traces all blend files with one parallel.ParallelTracer, which keeps the
+traced graphs of the libraries and reuses them for the next blend files. The
+opened blend files are shared as well, via blendfile.open_cached().
+
+The dependencies are reported per blend file, as a depgraph.DependencyGraph,
+and are the same as reported by trace.deps() for that file. A failure to
+trace one blend file is reported, and does not stop the batch.
+"""
+import collections
+import logging
+import pathlib
+import typing
+
+from blender_asset_tracer import bpathlib
+from . import _unique_usages, depgraph, parallel, progress
+
+log = logging.getLogger(__name__)
+
+RootResult = collections.namedtuple("RootResult", "root graph error")
+"""Result of tracing one blend file of a batch.
+
+:ivar root: path of the blend file.
+:ivar graph: depgraph.DependencyGraph of the blend file. When tracing failed,
+    it contains the dependencies found before the failure.
+:ivar error: the exception that made tracing fail, or None.
+"""
+
+
+def find_blendfiles(paths: typing.Iterable[pathlib.Path]) -> typing.List[pathlib.Path]:
+    """Return the blend files, with directories replaced by their blend files.
+
+    Directories are searched recursively, and their blend files are returned
+    in sorted order. Other paths are returned as-is, also when they do not
+    exist, so that they are reported as failures. Duplicates are removed.
+    """
+    found = {}  # type: typing.Dict[pathlib.Path, pathlib.Path]
+    for path in paths:
+        if path.is_dir():
+            candidates = sorted(path.rglob("*.blend"))
+        else:
+            candidates = [path]
+        for candidate in candidates:
+            found.setdefault(bpathlib.make_absolute(candidate), candidate)
+    return list(found.values())
+
+
+def deps(
+    paths: typing.Iterable[pathlib.Path],
+    progress_cb: typing.Optional[progress.Callback] = None,
+    jobs: int = 1,
+) -> typing.Iterator[RootResult]:
+    """Generator, trace each blend file and yield its dependencies.
+
+    :param paths: blend files and directories containing blend files, see
+        find_blendfiles().
+    :param progress_cb: Progress callback object. It receives
+        trace_root_start() and trace_root_done() or trace_root_failed() for
+        each blend file, and trace_blendfile() for the files opened in between.
+    :param jobs: Number of worker processes that trace the linked libraries.
+    """
+    if progress_cb is None:
+        progress_cb = progress.Callback()
+
+    with parallel.ParallelTracer(jobs, progress_cb) as tracer:
+        for root in find_blendfiles(paths):
+            yield trace_root(tracer, root, progress_cb)
+
+
+def trace_root(
+    tracer: parallel.ParallelTracer,
+    root: pathlib.Path,
+    progress_cb: progress.Callback,
+) -> RootResult:
+    """Trace one blend file, reusing the libraries traced earlier by the tracer."""
+    progress_cb.trace_root_start(root)
+    log.info("Tracing %s", root)
+
+    graph = depgraph.DependencyGraph(root)
+    try:
+        for _ in graph.add_usages(_unique_usages(tracer.usages(root))):
+            pass
+    except Exception as ex:
+        log.error("Unable to trace %s: %s", root, ex)
+        progress_cb.trace_root_failed(root, ex)
+        return RootResult(root, graph, ex)
+
+    progress_cb.trace_root_done(root)
+    return RootResult(root, graph, None)
@@ -121,9 +121,14 @@ def library(block: blendfile.BlendFileBlock) -> typing.Iterator[result.BlockUsag
 @dna_code("ME")
 def mesh(block: blendfile.BlendFileBlock) -> typing.Iterator[result.BlockUsage]:
     """Mesh data blocks."""
-    block_external = block.get_pointer((b"ldata", b"external"), None)
+    ldata_external, fdata_external = block.get_many(
+        ((b"ldata", b"external"), (b"fdata", b"external")),
+        default=None,
+        dereference=True,
+    )
+    block_external = ldata_external
     if block_external is None:
-        block_external = block.get_pointer((b"fdata", b"external"), None)
+        block_external = fdata_external
     if block_external is None:
         return
 
@@ -179,11 +184,12 @@ def scene(block: blendfile.BlendFileBlock) -> typing.Iterator[result.BlockUsage]
         seq_strip = seq.get_pointer(b"strip")
         if seq_strip is None:
             continue
-        seq_stripdata = seq_strip.get_pointer(b"stripdata")
+        (seq_stripdata, _), (dirname, dn_field) = seq_strip.get_many(
+            (b"stripdata", b"dir"), return_field=True, dereference=True
+        )
         if seq_stripdata is None:
             continue
 
-        dirname, dn_field = seq_strip.get(b"dir", return_field=True)
         basename, bn_field = seq_stripdata.get(b"name", return_field=True)
         asset_path = bpathlib.BlendPath(dirname) / basename
 
@@ -0,0 +1,339 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Dependency graph of a blend file, its libraries, and their assets.
+
+The graph has a node for each blend file and each asset. For every reported
+BlockUsage there is an edge from the blend file containing the block to the
+used asset; usages by Library blocks are edges to other blend files. Edges are
+annotated with the name of the block and the field holding the path.
+
+Use trace.dependency_graph() to trace a blend file into a DependencyGraph. The
+graph keeps the BlockUsage objects, so that the Packer can reuse the trace.
+Graphs can be stored as JSON; graphs loaded from JSON have no BlockUsages.
+"""
+import collections
+import json
+import pathlib
+import typing
+
+from blender_asset_tracer import bpathlib
+from . import result
+
+FORMAT_VERSION = 1
+
+BLENDFILE = "blendfile"
+ASSET = "asset"
+
+Edge = collections.namedtuple(
+    "Edge", "source target block_name field_name is_sequence"
+)
+"""Usage of an asset or library by a blend file.
+
+:ivar source: node ID of the blend file containing the block.
+:ivar target: node ID of the used asset or library.
+:ivar block_name: name of the block, like b"IMtexture.png".
+:ivar field_name: name of the field holding the path, see BlockUsage.field_name.
+:ivar is_sequence: see BlockUsage.is_sequence.
+"""
+
+
+class DependencyGraph:
+    """Graph of blend files and assets, with edges from users to used files.
+
+    Nodes are identified by an integer node ID, in the order in which they
+    were added. The root blend file always has node ID 0.
+
+    :ivar usages: the BlockUsage objects the graph was built from, in trace
+        order. Empty for graphs loaded from JSON.
+    """
+
+    def __init__(self, root: pathlib.Path) -> None:
+        self.paths = []  # type: typing.List[pathlib.Path]
+        self.kinds = []  # type: typing.List[str]
+        self.edges = []  # type: typing.List[Edge]
+        self.usages = []  # type: typing.List[result.BlockUsage]
+
+        self._node_ids = {}  # type: typing.Dict[pathlib.Path, int]
+        # Per node, the indices of its outgoing edges.
+        self._outgoing = []  # type: typing.List[typing.List[int]]
+
+        self.root = self.node(bpathlib.make_absolute(root), BLENDFILE)
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __repr__(self) -> str:
+        return "<%s %s: %d nodes, %d edges>" % (
+            type(self).__qualname__,
+            self.paths[self.root],
+            len(self.paths),
+            len(self.edges),
+        )
+
+    def node(self, path: pathlib.Path, kind: str = ASSET) -> int:
+        """Return the node ID of the path, adding the node if necessary.
+
+        A node that was added as asset becomes a blend file node when it is
+        added again as BLENDFILE.
+        """
+        try:
+            node_id = self._node_ids[path]
+        except KeyError:
+            node_id = self._node_ids[path] = len(self.paths)
+            self.paths.append(path)
+            self.kinds.append(kind)
+            self._outgoing.append([])
+            return node_id
+
+        if kind == BLENDFILE:
+            self.kinds[node_id] = BLENDFILE
+        return node_id
+
+    def node_id(self, path: pathlib.Path) -> int:
+        """Return the node ID of the path.
+
+        :raises KeyError: if the path is not in the graph.
+        """
+        return self._node_ids[bpathlib.make_absolute(path)]
+
+    def add_usage(self, usage: result.BlockUsage) -> Edge:
+        """Add the edge for this block usage, and the nodes it connects."""
+        source = self.node(bpathlib.make_absolute(usage.bfile_path), BLENDFILE)
+        kind = BLENDFILE if usage.block_code == b"LI" else ASSET
+        target = self.node(usage.abspath, kind)
+        edge = Edge(
+            source, target, usage.block_name, usage.field_name, usage.is_sequence
+        )
+        self.add_edge(edge)
+        self.usages.append(usage)
+        return edge
+
+    def add_usages(
+        self, usages: typing.Iterable[result.BlockUsage]
+    ) -> typing.Iterator[result.BlockUsage]:
+        """Generator, add the block usages to the graph and yield them.
+
+        This allows building the graph while processing the usages.
+        """
+        for usage in usages:
+            self.add_usage(usage)
+            yield usage
+
+    def add_edge(self, edge: Edge) -> None:
+        """Add an edge between existing nodes."""
+        self._outgoing[edge.source].append(len(self.edges))
+        self.edges.append(edge)
+
+    def blendfiles(self) -> typing.List[pathlib.Path]:
+        """Return the paths of all blend files, the root file first."""
+        return [path for path, kind in zip(self.paths, self.kinds) if kind == BLENDFILE]
+
+    def assets(self) -> typing.List[pathlib.Path]:
+        """Return the paths of all assets that are not blend files."""
+        return [path for path, kind in zip(self.paths, self.kinds) if kind == ASSET]
+
+    def outgoing(self, node_id: int) -> typing.List[Edge]:
+        """Return the edges from this node, in trace order."""
+        edges = self.edges
+        return [edges[index] for index in self._outgoing[node_id]]
+
+    def libraries(self, path: pathlib.Path) -> typing.List[pathlib.Path]:
+        """Return the libraries linked directly from this blend file."""
+        return self._targets(self.node_id(path), BLENDFILE)
+
+    def direct_assets(self, path: pathlib.Path) -> typing.List[pathlib.Path]:
+        """Return the assets used directly by blocks in this blend file."""
+        return self._targets(self.node_id(path), ASSET)
+
+    def _targets(self, node_id: int, kind: str) -> typing.List[pathlib.Path]:
+        targets = {}  # type: typing.Dict[int, None]
+        for edge in self.outgoing(node_id):
+            if self.kinds[edge.target] == kind:
+                targets[edge.target] = None
+        return [self.paths[target] for target in targets]
+
+    def reachable(self, path: pathlib.Path) -> typing.Set[int]:
+        """Return the node IDs reachable from this node, excluding itself.
+
+        Unless the node is part of a cycle, in which case it is included.
+        """
+        seen = set()  # type: typing.Set[int]
+        to_visit = [self.node_id(path)]
+        outgoing = self._outgoing
+        edges = self.edges
+        while to_visit:
+            node_id = to_visit.pop()
+            for index in outgoing[node_id]:
+                target = edges[index].target
+                if target not in seen:
+                    seen.add(target)
+                    to_visit.append(target)
+        return seen
+
+    def reachable_assets(self, path: pathlib.Path) -> typing.Set[pathlib.Path]:
+        """Return all assets used by this blend file and its libraries."""
+        return {
+            self.paths[node_id]
+            for node_id in self.reachable(path)
+            if self.kinds[node_id] == ASSET
+        }
+
+    def reachable_blendfiles(self, path: pathlib.Path) -> typing.Set[pathlib.Path]:
+        """Return all libraries of this blend file, including nested ones."""
+        return {
+            self.paths[node_id]
+            for node_id in self.reachable(path)
+            if self.kinds[node_id] == BLENDFILE
+        }
+
+    def strongly_connected(self) -> typing.List[typing.List[int]]:
+        """Return the strongly connected components of the blend files.
+
+        Components are returned in topological order of the library links:
+        every component comes after the components of its libraries. Within
+        a component, the node IDs are in ascending order.
+        """
+        # Tarjan's algorithm, without recursion so that deeply nested
+        # libraries cannot hit the recursion limit.
+        kinds = self.kinds
+        edges = self.edges
+        successors = [
+            [
+                edges[index].target
+                for index in self._outgoing[node_id]
+                if kinds[edges[index].target] == BLENDFILE
+            ]
+            for node_id in range(len(self.paths))
+        ]
+
+        index_of = {}  # type: typing.Dict[int, int]
+        lowlink = {}  # type: typing.Dict[int, int]
+        stack = []  # type: typing.List[int]
+        on_stack = set()  # type: typing.Set[int]
+        components = []  # type: typing.List[typing.List[int]]
+
+        for start in range(len(self.paths)):
+            if kinds[start] != BLENDFILE or start in index_of:
+                continue
+            work = [(start, 0)]
+            while work:
+                node_id, next_succ = work.pop()
+                if next_succ == 0:
+                    index_of[node_id] = lowlink[node_id] = len(index_of)
+                    stack.append(node_id)
+                    on_stack.add(node_id)
+
+                node_succs = successors[node_id]
+                while next_succ < len(node_succs):
+                    succ = node_succs[next_succ]
+                    next_succ += 1
+                    if succ not in index_of:
+                        work.append((node_id, next_succ))
+                        work.append((succ, 0))
+                        break
+                    if succ in on_stack:
+                        lowlink[node_id] = min(lowlink[node_id], index_of[succ])
+                else:
+                    if lowlink[node_id] == index_of[node_id]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == node_id:
+                                break
+                        components.append(sorted(component))
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[node_id])
+        return components
+
+    def topological_order(self) -> typing.List[pathlib.Path]:
+        """Return the blend files, each one after all of its libraries.
+
+        Blend files that link to each other in a cycle cannot be ordered like
+        this; they are returned next to each other, see cycles().
+        """
+        return [
+            self.paths[node_id]
+            for component in self.strongly_connected()
+            for node_id in component
+        ]
+
+    def cycles(self) -> typing.List[typing.List[pathlib.Path]]:
+        """Return the groups of blend files that link to each other in a cycle.
+
+        A blend file that links to itself is a cycle of one file.
+        """
+        cycles = []
+        for component in self.strongly_connected():
+            if len(component) == 1:
+                node_id = component[0]
+                targets = (edge.target for edge in self.outgoing(node_id))
+                if node_id not in targets:
+                    continue
+            cycles.append([self.paths[node_id] for node_id in component])
+        return cycles
+
+    def to_json(self) -> str:
+        """Return the graph as compact JSON, without the BlockUsage objects."""
+        data = {
+            "format": FORMAT_VERSION,
+            "root": self.root,
+            "nodes": [[kind, str(path)] for kind, path in zip(self.kinds, self.paths)],
+            "edges": [
+                [
+                    edge.source,
+                    edge.target,
+                    edge.block_name.decode("utf8", "surrogateescape"),
+                    edge.field_name,
+                    int(edge.is_sequence),
+                ]
+                for edge in self.edges
+            ],
+        }
+        return json.dumps(data, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text: str) -> "DependencyGraph":
+        """Load a graph stored with to_json().
+
+        :raises ValueError: if the JSON was not produced by to_json().
+        """
+        data = json.loads(text)
+        if not isinstance(data, dict) or data.get("format") != FORMAT_VERSION:
+            raise ValueError("unsupported dependency graph format")
+
+        graph = cls.__new__(cls)
+        graph.paths = []
+        graph.kinds = []
+        graph.edges = []
+        graph.usages = []
+        graph._node_ids = {}
+        graph._outgoing = []
+        for kind, path in data["nodes"]:
+            graph.node(pathlib.Path(path), kind)
+        graph.root = data["root"]
+        for source, target, block_name, field_name, is_sequence in data["edges"]:
+            block_name = block_name.encode("utf8", "surrogateescape")
+            graph.add_edge(
+                Edge(source, target, block_name, field_name, bool(is_sequence))
+            )
+        return graph
@@ -85,8 +85,7 @@ def _expand_generic_mtex(block: blendfile.BlendFileBlock):
         return
 
     for mtex in block.iter_fixed_array_of_pointers(b"mtex"):
-        yield mtex.get_pointer(b"tex")
-        yield mtex.get_pointer(b"object")
+        yield from mtex.get_many((b"tex", b"object"), dereference=True)
 
 
 def _expand_generic_nodetree(block: blendfile.BlendFileBlock):
@@ -167,16 +166,18 @@ def _expand_curve(block: blendfile.BlendFileBlock):
     yield from _expand_generic_animdata(block)
     yield from _expand_generic_material(block)
 
-    for fieldname in (
-        b"vfont",
-        b"vfontb",
-        b"vfonti",
-        b"vfontbi",
-        b"bevobj",
-        b"taperobj",
-        b"textoncurve",
-    ):
-        yield block.get_pointer(fieldname)
+    yield from block.get_many(
+        (
+            b"vfont",
+            b"vfontb",
+            b"vfonti",
+            b"vfontbi",
+            b"bevobj",
+            b"taperobj",
+            b"textoncurve",
+        ),
+        dereference=True,
+    )
 
 
 @dna_code("GR")
@@ -262,16 +263,26 @@ def _expand_object(block: blendfile.BlendFileBlock):
     yield from _expand_generic_animdata(block)
     yield from _expand_generic_material(block)
 
-    yield block.get_pointer(b"data")
-
-    if block[b"transflag"] & cdefs.OB_DUPLIGROUP:
+    transflag, data, proxy, proxy_group, block_pose, psystems = block.get_many(
+        (
+            b"transflag",
+            b"data",
+            b"proxy",
+            b"proxy_group",
+            b"pose",
+            (b"particlesystem", b"first"),
+        ),
+        dereference=True,
+    )
+    yield data
+
+    if transflag & cdefs.OB_DUPLIGROUP:
         yield block.get_pointer(b"dup_group")
 
-    yield block.get_pointer(b"proxy")
-    yield block.get_pointer(b"proxy_group")
+    yield proxy
+    yield proxy_group
 
     # 'ob->pose->chanbase[...].custom'
-    block_pose = block.get_pointer(b"pose")
     if block_pose:
         assert block_pose.dna_type.dna_type_id == b"bPose"
         # sdna_index_bPoseChannel = block_pose.file.sdna_index_from_id[b'bPoseChannel']
@@ -282,7 +293,6 @@ def _expand_object(block: blendfile.BlendFileBlock):
     # Expand the objects 'ParticleSettings' via 'ob->particlesystem[...].part'
     # sdna_index_ParticleSystem = block.file.sdna_index_from_id.get(b'ParticleSystem')
     # if sdna_index_ParticleSystem is not None:
-    psystems = block.get_pointer((b"particlesystem", b"first"))
     for psystem in iterators.listbase(psystems):
         yield psystem.get_pointer(b"part")
 
@@ -312,20 +322,20 @@ def _expand_particle_settings(block: blendfile.BlendFileBlock):
 def _expand_scene(block: blendfile.BlendFileBlock):
     yield from _expand_generic_animdata(block)
     yield from _expand_generic_nodetree_id(block)
-    yield block.get_pointer(b"camera")
-    yield block.get_pointer(b"world")
-    yield block.get_pointer(b"set", default=None)
-    yield block.get_pointer(b"clip", default=None)
+    camera, world, bases, block_ed = block.get_many(
+        (b"camera", b"world", (b"base", b"first"), b"ed"), dereference=True
+    )
+    yield camera
+    yield world
+    yield from block.get_many((b"set", b"clip"), default=None, dereference=True)
 
     # sdna_index_Base = block.file.sdna_index_from_id[b'Base']
     # for item in bf_utils.iter_ListBase(block.get_pointer((b'base', b'first'))):
     #     yield item.get_pointer(b'object', sdna_index_refine=sdna_index_Base)
-    bases = block.get_pointer((b"base", b"first"))
     for base in iterators.listbase(bases):
         yield base.get_pointer(b"object")
 
     # Sequence Editor
-    block_ed = block.get_pointer(b"ed")
     if not block_ed:
         return
 
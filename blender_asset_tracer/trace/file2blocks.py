@@ -25,9 +25,9 @@ initial blend file, and all *actually linked-to* data blocks in linked
 blend files.
 """
 import collections
+import heapq
 import logging
 import pathlib
-import queue
 import typing
 
 from blender_asset_tracer import blendfile, bpathlib
@@ -37,16 +37,93 @@ _funcs_for_code = {}  # type: typing.Dict[bytes, typing.Callable]
 log = logging.getLogger(__name__)
 
 
-# noinspection PyProtectedMember
-class BlockQueue(queue.PriorityQueue):
-    """PriorityQueue that sorts by filepath and file offset"""
+class BlockQueue:
+    """Queue of blocks to visit, sorted by blend file and file offset.
 
-    def _put(self, item: blendfile.BlendFileBlock):
-        super()._put((item.bfile.filepath, item.file_offset, item))
+    Each blend file has its own heap of the file offsets of its queued
+    blocks. Blend files are numbered in the order in which they are first
+    queued, and blocks are returned from the lowest-numbered blend file that
+    has any queued blocks. As the heaps only contain integers, no `Path` or
+    `BlendFileBlock` objects are compared.
 
-    def _get(self) -> blendfile.BlendFileBlock:
-        _, _, item = super()._get()
-        return item
+    Of the blocks with the same address in the same blend file, only the one
+    with the lowest file offset is queued, as a blend file can contain more
+    than one block with the same address. Unlike queue.PriorityQueue, this
+    class is not thread-safe.
+    """
+
+    def __init__(self) -> None:
+        self._file_ids = {}  # type: typing.Dict[pathlib.Path, int]
+        # Heap of the IDs of the blend files that have queued blocks.
+        self._queued_files = []  # type: typing.List[int]
+        # Per blend file ID, heap of the offsets of its queued blocks. Offsets
+        # of blocks that were replaced by a block with the same address stay
+        # in the heap until they are popped, but never at its top.
+        self._offsets = []  # type: typing.List[typing.List[int]]
+        # Per blend file ID, mapping from file offset to queued block.
+        self._blocks = []  # type: typing.List[typing.Dict[int, blendfile.BlendFileBlock]]
+        # Per blend file ID, mapping from address to offset of the queued block.
+        self._addresses = []  # type: typing.List[typing.Dict[int, int]]
+
+    def put(self, block: blendfile.BlendFileBlock) -> bool:
+        """Queue the block.
+
+        :return: False if a block with the same address and a lower or equal
+            file offset was already queued.
+        """
+        file_id = self._file_id(block.bfile.filepath)
+        addresses = self._addresses[file_id]
+        blocks = self._blocks[file_id]
+        queued_offset = addresses.get(block.addr_old)
+        if queued_offset is not None:
+            if queued_offset <= block.file_offset:
+                return False
+            # Its offset is removed from the heap when it is popped.
+            del blocks[queued_offset]
+        addresses[block.addr_old] = block.file_offset
+
+        offsets = self._offsets[file_id]
+        if not offsets:
+            heapq.heappush(self._queued_files, file_id)
+        heapq.heappush(offsets, block.file_offset)
+        blocks[block.file_offset] = block
+        return True
+
+    def get(self) -> blendfile.BlendFileBlock:
+        """Remove and return the first block.
+
+        :raises IndexError: when the queue is empty.
+        """
+        file_id = self._queued_files[0]
+        offsets = self._offsets[file_id]
+        blocks = self._blocks[file_id]
+        block = blocks.pop(heapq.heappop(offsets))
+        del self._addresses[file_id][block.addr_old]
+
+        # Skip the offsets of replaced blocks, so that the top of the heap
+        # is always a queued block.
+        while offsets and offsets[0] not in blocks:
+            heapq.heappop(offsets)
+        if not offsets:
+            heapq.heappop(self._queued_files)
+        return block
+
+    def empty(self) -> bool:
+        return not self._queued_files
+
+    def __len__(self) -> int:
+        return sum(len(blocks) for blocks in self._blocks)
+
+    def _file_id(self, filepath: pathlib.Path) -> int:
+        try:
+            return self._file_ids[filepath]
+        except KeyError:
+            pass
+        file_id = self._file_ids[filepath] = len(self._offsets)
+        self._offsets.append([])
+        self._blocks.append({})
+        self._addresses.append({})
+        return file_id
 
 
 class BlockIterator:
@@ -80,27 +157,25 @@ class BlockIterator:
         """Expand blocks with dependencies from other libraries."""
 
         log.info("inspecting: %s", bfile.filepath)
+        bpath = bpathlib.make_absolute(bfile.filepath)
         if limit_to:
-            self._queue_named_blocks(bfile, limit_to)
+            self._queue_named_blocks(bfile, bpath, limit_to)
         else:
-            self._queue_all_blocks(bfile)
+            self._queue_all_blocks(bfile, bpath)
 
-        blocks_per_lib = yield from self._visit_blocks(bfile, limit_to)
+        blocks_per_lib = yield from self._visit_blocks(bfile, bpath)
         yield from self._visit_linked_blocks(blocks_per_lib)
 
-    def _visit_blocks(self, bfile, limit_to):
-        bpath = bpathlib.make_absolute(bfile.filepath)
+    def _visit_blocks(self, bfile, bpath):
         root_dir = bpathlib.BlendPath(bpath.parent)
 
         # Mapping from library path to data blocks to expand.
         blocks_per_lib = collections.defaultdict(set)
 
+        # Blocks are only queued when they have not been yielded yet, and at
+        # most once at a time, so they do not have to be checked here.
         while not self.to_visit.empty():
             block = self.to_visit.get()
-            assert isinstance(block, blendfile.BlendFileBlock)
-            if (bpath, block.addr_old) in self.blocks_yielded:
-                continue
-
             if block.code == b"ID":
                 # ID blocks represent linked-in assets. Those are the ones that
                 # should be loaded from their own blend file and "expanded" to
@@ -113,11 +188,11 @@ class BlockIterator:
 
                 # The library block itself should also be reported, because it
                 # represents a blend file that is a dependency as well.
-                self.to_visit.put(lib)
+                self._queue(bpath, lib)
                 continue
 
-            self._queue_dependencies(block)
             self.blocks_yielded.add((bpath, block.addr_old))
+            self._queue_dependencies(bpath, block)
             yield block
 
         return blocks_per_lib
@@ -136,21 +211,30 @@ class BlockIterator:
             libfile = self.open_blendfile(lib_path)
             yield from self.iter_blocks(libfile, idblocks)
 
-    def _queue_all_blocks(self, bfile: blendfile.BlendFile):
+    def _queue(self, bpath: pathlib.Path, block: blendfile.BlendFileBlock) -> None:
+        if (bpath, block.addr_old) in self.blocks_yielded:
+            return
+        self.to_visit.put(block)
+
+    def _queue_all_blocks(self, bfile: blendfile.BlendFile, bpath: pathlib.Path):
         log.debug("Queueing all blocks from file %s", bfile.filepath)
         for block in bfile.blocks:
             # Don't bother visiting DATA blocks, as we won't know what
             # to do with them anyway.
             if block.code == b"DATA":
                 continue
-            self.to_visit.put(block)
+            self._queue(bpath, block)
 
     def _queue_named_blocks(
-        self, bfile: blendfile.BlendFile, limit_to: typing.Set[blendfile.BlendFileBlock]
+        self,
+        bfile: blendfile.BlendFile,
+        bpath: pathlib.Path,
+        limit_to: typing.Set[blendfile.BlendFileBlock],
     ):
         """Queue only the blocks referred to in limit_to.
 
         :param bfile:
+        :param bpath: absolute path of the blend file.
         :param limit_to: set of ID blocks that name the blocks to queue.
             The queued blocks are loaded from the actual blend file, and
             selected by name.
@@ -161,16 +245,16 @@ class BlockIterator:
             name_to_find = to_find[b"name"]
             code = name_to_find[:2]
             log.debug("Finding block %r with code %r", name_to_find, code)
-            same_code = bfile.find_blocks_from_code(code)
-            for block in same_code:
-                if block.id_name == name_to_find:
-                    log.debug("Queueing %r from file %s", block, bfile.filepath)
-                    self.to_visit.put(block)
+            for block in bfile.find_blocks_from_id_name(code, name_to_find):
+                log.debug("Queueing %r from file %s", block, bfile.filepath)
+                self._queue(bpath, block)
 
-    def _queue_dependencies(self, block: blendfile.BlendFileBlock):
+    def _queue_dependencies(
+        self, bpath: pathlib.Path, block: blendfile.BlendFileBlock
+    ) -> None:
         for block in expanders.expand_block(block):
             assert isinstance(block, blendfile.BlendFileBlock), "unexpected %r" % block
-            self.to_visit.put(block)
+            self._queue(bpath, block)
 
 
 def iter_blocks(
@@ -0,0 +1,376 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""On-disk cache of the trace results of libraries.
+
+Most libraries do not change between BAT runs, but tracing a blend file
+traces all its linked libraries again. With this cache enabled, the result of
+tracing a library for a set of linked-in ID names is stored on disk, and
+reused by later BAT runs. Such a result is a parallel.LibraryGraph, which
+holds the asset usages of the library and its references to other libraries.
+Using it does not require opening the library at all.
+
+A stored result is only used when the size, modification time, and inode
+number of the library are unchanged, and it was stored by the same version of
+BAT, with the same strict pointer mode and the same expanders. The same is
+checked for all libraries that the library links to, directly or indirectly,
+so that a change to a nested library invalidates the results of all
+libraries that depend on it.
+
+The total size of the cache is limited; when it is exceeded, the least
+recently used results are removed. The cache is disabled by default; call
+set_disk_cache() to enable it. trace.deps() traces via the parallel module
+when the cache is enabled.
+"""
+import hashlib
+import json
+import logging
+import pathlib
+import typing
+
+from blender_asset_tracer import __version__, blendfile
+from blender_asset_tracer.blendfile import block_index, cache_dir
+from . import blocks2assets, expanders
+
+CACHE_ROOT = pathlib.Path().home() / ".cache/blender-asset-tracer/trace-results"
+DEFAULT_MAX_BYTES = 512 * 2**20
+
+# Increase this when the on-disk format or the LibraryGraph changes, to ignore
+# results stored by older versions of BAT. Version 1 was stored as pickle
+# files, which are not read any more.
+FORMAT_VERSION = 2
+
+# Increase this when the expanders or blocks2assets modules change what they
+# find, to ignore results stored by development versions of BAT that have the
+# same version number.
+TRACE_VERSION = 1
+
+SUFFIX = ".traceresult.json"
+
+log = logging.getLogger(__name__)
+
+FileKey = typing.Optional[block_index.FileKey]
+"""Identifies the version of a file, or None if the file does not exist."""
+
+_cache_root = None  # type: typing.Optional[pathlib.Path]
+_max_bytes = DEFAULT_MAX_BYTES
+
+
+def set_disk_cache(
+    root: typing.Optional[pathlib.Path], max_bytes: int = DEFAULT_MAX_BYTES
+) -> None:
+    """Store trace results in this directory, or disable with None.
+
+    Use CACHE_ROOT for the default location.
+
+    :param max_bytes: maximum total size of the stored results. When this is
+        exceeded, the least recently used results are removed.
+    """
+    global _cache_root, _max_bytes
+    _cache_root = root
+    _max_bytes = max_bytes
+
+
+def is_enabled() -> bool:
+    return _cache_root is not None
+
+
+def file_key(path: pathlib.Path) -> FileKey:
+    try:
+        return block_index.file_key(path)
+    except FileNotFoundError:
+        return None
+
+
+def load(lib_path: pathlib.Path, id_names: typing.AbstractSet[bytes]):
+    """Return the stored trace result, or None if there is none.
+
+    :param lib_path: absolute path of the library.
+    :param id_names: the ID names the library was traced for.
+    :return: the parallel.LibraryGraph, or None.
+    """
+    path = _result_path(lib_path, id_names)
+    if path is None:
+        return None
+
+    try:
+        with path.open("rb") as infile:
+            payload = json.load(infile)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as ex:
+        # ValueError also covers JSON and Unicode decoding errors.
+        log.warning("Unable to read trace result %s: %s", path, ex)
+        return None
+
+    try:
+        version = payload["format_version"]
+        bat_version = payload["bat_version"]
+    except (TypeError, KeyError):
+        version = bat_version = None
+    if version != FORMAT_VERSION or bat_version != __version__:
+        log.debug("Ignoring outdated trace result %s", path)
+        return None
+
+    try:
+        key = _file_key(payload["key"])
+        stored_names = [_bytes(id_name) for id_name in payload["id_names"]]
+        dependencies = [
+            (pathlib.Path(dep_path), _file_key(dep_key))
+            for dep_path, dep_key in payload["dependencies"]
+        ]
+        graph = _unflatten(payload["graph"])
+    except (KeyError, TypeError, ValueError, IndexError) as ex:
+        log.warning("Invalid trace result %s: %s", path, ex)
+        return None
+
+    if stored_names != sorted(id_names) or key != file_key(lib_path):
+        log.debug("Ignoring stale trace result %s of %s", path, lib_path)
+        return None
+    for dep_path, dep_key in dependencies:
+        if file_key(dep_path) != dep_key:
+            log.debug(
+                "Ignoring trace result of %s, library %s changed", lib_path, dep_path
+            )
+            return None
+
+    # Mark as recently used, for the eviction in save().
+    cache_dir.touch(path)
+
+    log.debug("Loaded trace result of %s from %s", lib_path, path)
+    return graph
+
+
+def save(
+    lib_path: pathlib.Path,
+    id_names: typing.AbstractSet[bytes],
+    graph,
+    dependencies: typing.Iterable[pathlib.Path],
+) -> None:
+    """Store the trace result, replacing any previous result.
+
+    :param graph: the parallel.LibraryGraph of the library.
+    :param dependencies: absolute paths of all libraries linked from this
+        library, directly or indirectly.
+    """
+    path = _result_path(lib_path, id_names)
+    if path is None:
+        return
+
+    payload = {
+        "format_version": FORMAT_VERSION,
+        "bat_version": __version__,
+        "key": file_key(lib_path),
+        "id_names": [_str(id_name) for id_name in sorted(id_names)],
+        "dependencies": [
+            [str(dep_path), file_key(dep_path)] for dep_path in dependencies
+        ],
+        "graph": _flatten(graph),
+    }
+    try:
+        with cache_dir.atomic_write(path) as outfile:
+            outfile.write(json.dumps(payload, separators=(",", ":")).encode("ascii"))
+    except OSError as ex:
+        log.warning("Unable to write trace result %s: %s", path, ex)
+        return
+    log.debug("Stored trace result of %s in %s", lib_path, path)
+
+    assert _cache_root is not None
+    cache_dir.evict(_cache_root, SUFFIX, _max_bytes)
+    # Remove the files of format version 1, which are no longer read.
+    for old_path, _ in cache_dir.files(_cache_root, ".traceresult"):
+        cache_dir.remove(old_path)
+
+
+def clear() -> None:
+    """Remove all stored trace results."""
+    if _cache_root is None:
+        return
+    for path, _ in cache_dir.files(_cache_root, SUFFIX):
+        cache_dir.remove(path)
+
+
+def _result_path(
+    lib_path: pathlib.Path, id_names: typing.AbstractSet[bytes]
+) -> typing.Optional[pathlib.Path]:
+    if _cache_root is None:
+        return None
+    hasher = hashlib.blake2b(digest_size=20)
+    hasher.update(_trace_settings())
+    hasher.update(str(lib_path).encode("utf8"))
+    for id_name in sorted(id_names):
+        hasher.update(b"\0" + id_name)
+    return _cache_root / (hasher.hexdigest() + SUFFIX)
+
+
+def _trace_settings() -> bytes:
+    """Return the settings that affect the trace result of a library.
+
+    Results traced with different settings are stored in different files.
+    The registered expanders and blocks2assets handlers are included, so that
+    handlers registered by other code also invalidate the results.
+    """
+    settings = [
+        "format=%d" % FORMAT_VERSION,
+        "trace=%d" % TRACE_VERSION,
+        "strict=%d" % blendfile.BlendFile.strict_pointer_mode,
+    ]
+    for kind, funcs_for_code in (
+        ("expander", expanders._funcs_for_code),
+        ("assets", blocks2assets._funcs_for_code),
+    ):
+        for code, func in sorted(funcs_for_code.items()):
+            settings.append(
+                "%s=%r:%s.%s" % (kind, code, func.__module__, func.__qualname__)
+            )
+    return "\0".join(settings).encode("utf8") + b"\0"
+
+def _flatten(graph) -> typing.Dict[str, list]:
+    """Convert the parallel.LibraryGraph to lists of JSON-compatible values.
+
+    Bytes are stored as Latin-1 strings, which maps each byte to one
+    character.
+    """
+    nodes = [
+        [
+            index,
+            node.addr_old,
+            list(node.deps),
+            _optional_str(node.id_name),
+            _optional_str(node.lib_path),
+            [_flatten_usage(usage) for usage in node.usages],
+        ]
+        for index, node in graph.nodes.items()
+    ]
+    seeds = [[_str(id_name), indices] for id_name, indices in graph.seeds.items()]
+    return {"nodes": nodes, "seeds": seeds}
+
+
+def _flatten_usage(usage) -> list:
+    return [
+        usage.block_index,
+        _str(usage.code),
+        usage.addr_old,
+        usage.sdna_index,
+        usage.dna_type_name,
+        _str(usage.block_name),
+        _str(usage.asset_path),
+        usage.is_sequence,
+        usage.field_name,
+        _flatten_field_path(usage.path_full_field),
+        _flatten_field_path(usage.path_dir_field),
+        _flatten_field_path(usage.path_base_field),
+    ]
+
+
+def _flatten_field_path(field_path) -> typing.Optional[typing.List[str]]:
+    if field_path is None:
+        return None
+    return [_str(name) for name in field_path]
+
+
+def _unflatten(flat_graph: typing.Dict[str, list]):
+    """Reconstruct the parallel.LibraryGraph from the output of _flatten().
+
+    :raises ValueError: when the values are not what _flatten() produces.
+        Only the structure and the strings are checked, just like in
+        blendfile.sdna_cache.
+    """
+    # Imported here, as the parallel module imports this one.
+    from . import parallel
+
+    nodes = {}
+    for index, addr_old, deps, id_name, lib_path, usages in flat_graph["nodes"]:
+        nodes[index] = parallel.Node(
+            addr_old,
+            tuple(deps),
+            _optional_bytes(id_name),
+            _optional_bytes(lib_path),
+            tuple(_unflatten_usage(usage) for usage in usages),
+        )
+    seeds = {_bytes(id_name): indices for id_name, indices in flat_graph["seeds"]}
+    return parallel.LibraryGraph(nodes, seeds)
+
+
+def _unflatten_usage(flat_usage: list):
+    from . import parallel
+
+    (
+        block_index_,
+        code,
+        addr_old,
+        sdna_index,
+        dna_type_name,
+        block_name,
+        asset_path,
+        is_sequence,
+        field_name,
+        path_full_field,
+        path_dir_field,
+        path_base_field,
+    ) = flat_usage
+    return parallel.UsageDescriptor(
+        block_index_,
+        _bytes(code),
+        addr_old,
+        sdna_index,
+        dna_type_name,
+        _bytes(block_name),
+        _bytes(asset_path),
+        is_sequence,
+        field_name,
+        _unflatten_field_path(path_full_field),
+        _unflatten_field_path(path_dir_field),
+        _unflatten_field_path(path_base_field),
+    )
+
+
+def _unflatten_field_path(
+    flat_path: typing.Optional[typing.List[str]],
+) -> typing.Optional[typing.Tuple[bytes, ...]]:
+    if flat_path is None:
+        return None
+    return tuple(_bytes(name) for name in flat_path)
+
+
+def _file_key(value: typing.Optional[list]) -> FileKey:
+    """Convert a file key that was stored as JSON list back to a tuple."""
+    if value is None:
+        return None
+    path, size, mtime_ns, inode = value
+    return path, size, mtime_ns, inode
+
+
+def _str(value: bytes) -> str:
+    return value.decode("latin-1")
+
+
+def _optional_str(value: typing.Optional[bytes]) -> typing.Optional[str]:
+    return None if value is None else _str(value)
+
+
+def _bytes(value: str) -> bytes:
+    try:
+        return value.encode("latin-1")
+    except AttributeError:
+        raise ValueError("expected a string, not %r" % (value,)) from None
+
+
+def _optional_bytes(value: typing.Optional[str]) -> typing.Optional[bytes]:
+    return None if value is None else _bytes(value)
@@ -75,16 +75,17 @@ def modifier_mesh_sequence_cache(
     if cache_file is None:
         return
 
-    is_sequence = bool(cache_file[b"is_sequence"])
+    (is_sequence, _), (path, field) = cache_file.get_many(
+        (b"is_sequence", b"filepath"), return_field=True
+    )
     cache_block_name = cache_file.id_name
     assert cache_block_name is not None
 
-    path, field = cache_file.get(b"filepath", return_field=True)
     yield result.BlockUsage(
         cache_file,
         path,
         path_full_field=field,
-        is_sequence=is_sequence,
+        is_sequence=bool(is_sequence),
         block_name=cache_block_name,
     )
 
@@ -93,10 +94,12 @@ def modifier_mesh_sequence_cache(
 def modifier_ocean(
     ctx: ModifierContext, modifier: blendfile.BlendFileBlock, block_name: bytes
 ) -> typing.Iterator[result.BlockUsage]:
-    if not modifier[b"cached"]:
+    (cached, _), (path, field) = modifier.get_many(
+        (b"cached", b"cachepath"), return_field=True
+    )
+    if not cached:
         return
 
-    path, field = modifier.get(b"cachepath", return_field=True)
     # The path indicates the directory containing the cached files.
     yield result.BlockUsage(
         modifier, path, is_sequence=True, path_full_field=field, block_name=block_name
@@ -174,21 +177,21 @@ def _walk_point_cache(
     pointcache: blendfile.BlendFileBlock,
     extension: bytes,
 ):
-    flag = pointcache[b"flag"]
+    (flag, _), (path, path_field), (name, name_field) = pointcache.get_many(
+        (b"flag", b"path", b"name"), return_field=True
+    )
     if flag & cdefs.PTCACHE_EXTERNAL:
-        path, field = pointcache.get(b"path", return_field=True)
         log.info("    external cache at %s", path)
         bpath = bpathlib.BlendPath(path)
         yield result.BlockUsage(
             pointcache,
             bpath,
-            path_full_field=field,
+            path_full_field=path_field,
             is_sequence=True,
             block_name=block_name,
         )
     elif flag & cdefs.PTCACHE_DISK_CACHE:
         # See ptcache_path() in pointcache.c
-        name, field = pointcache.get(b"name", return_field=True)
         if not name:
             # See ptcache_filename() in pointcache.c
             idname = ctx.owner[b"id", b"name"]
@@ -204,7 +207,7 @@ def _walk_point_cache(
         yield result.BlockUsage(
             pointcache,
             bpath,
-            path_full_field=field,
+            path_full_field=name_field,
             is_sequence=True,
             block_name=block_name,
         )
@@ -264,11 +267,12 @@ def modifier_smoke_sim(
         )
         return
 
-    pointcache = domain.get_pointer(b"point_cache")
+    pointcache, format = domain.get_many(
+        (b"point_cache", b"cache_file_format"), dereference=True
+    )
     if pointcache is None:
         return
 
-    format = domain.get(b"cache_file_format")
     extensions = {
         cdefs.PTCACHE_FILE_PTCACHE: cdefs.PTCACHE_EXT,
         cdefs.PTCACHE_FILE_OPENVDB: cdefs.PTCACHE_EXT_VDB,
@@ -292,7 +296,6 @@ def modifier_fluid(
         return
 
     # See fluid_bake_startjob() in physics_fluid.c
-    path = domain[b"cache_directory"]
     path, field = domain.get(b"cache_directory", return_field=True)
 
     log.info("   fluid cache at %s", path)
@@ -0,0 +1,604 @@
+# ***** BEGIN GPL LICENSE BLOCK *****
+#
+# This program is free software; you can redistribute it and/or
+# modify it under the terms of the GNU General Public License
+# as published by the Free Software Foundation; either version 2
+# of the License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program; if not, write to the Free Software Foundation,
+# Inc., 59 Temple Place - Suite 330, Boston, MA  02111-1307, USA.
+#
+# ***** END GPL LICENCE BLOCK *****
+#
+# (c) 2026, Blender Foundation
+"""Trace linked libraries in parallel, in a pool of worker processes.
+
+Each library is traced by a worker process, starting at the linked-in ID
+blocks. The worker follows all the pointers from there, without knowing which
+blocks were already visited by the main process or by other workers, and
+returns a LibraryGraph: the visited blocks, the blocks they depend on, and
+compact descriptors of their asset usages.
+
+The main process then walks these graphs in the same order as the serial
+file2blocks.BlockIterator walks the blend files, skipping the blocks that
+were already visited. The usages are yielded as DescribedBlockUsage objects,
+which only open their blend file when their block is accessed. The result is
+identical to that of serial tracing.
+
+Libraries are dispatched to the workers as soon as they are known to be
+linked, so that nested libraries are traced while the main process is still
+waiting for their parents.
+"""
+import collections
+import concurrent.futures
+import heapq
+import multiprocessing.context
+import logging
+import pathlib
+import typing
+
+from blender_asset_tracer import blendfile, bpathlib
+from blender_asset_tracer.blendfile import (
+    block_index,
+    decompressed_cache,
+    dna,
+    magic_compression,
+    sdna_cache,
+)
+from . import asset_holding_blocks, blocks2assets, expanders, file2blocks, progress
+from . import library_cache, result
+
+log = logging.getLogger(__name__)
+
+UsageDescriptor = collections.namedtuple(
+    "UsageDescriptor",
+    "block_index code addr_old sdna_index dna_type_name block_name asset_path "
+    "is_sequence field_name path_full_field path_dir_field path_base_field",
+)
+"""Picklable description of a result.BlockUsage.
+
+:ivar block_index: index of the block in the block table of its blend file.
+:ivar sdna_index: SDNA index of the block, as refined while tracing.
+:ivar field_name: the BlockUsage.field_name, for display.
+:ivar path_full_field: path of the field in the DNA struct of the block,
+    as accepted by dna.Struct.field_from_path(), or None.
+"""
+
+Node = collections.namedtuple("Node", "addr_old deps id_name lib_path usages")
+"""Block visited by a worker.
+
+:ivar deps: block table indices of the blocks this block depends on.
+:ivar id_name: for ID blocks the name of the linked-in block, otherwise None.
+:ivar lib_path: for ID blocks the absolute path of the library, otherwise None.
+:ivar usages: tuple of UsageDescriptor of the assets used by this block.
+"""
+
+LibraryGraph = collections.namedtuple("LibraryGraph", "nodes seeds")
+"""Blocks of one blend file, as visited by a worker.
+
+:ivar nodes: mapping from block table index to Node.
+:ivar seeds: mapping from linked-in ID name to the block table indices of the
+    blocks with that name.
+"""
+
+WorkerSettings = collections.namedtuple(
+    "WorkerSettings",
+    "strict_pointer_mode use_mmap max_open_files max_temp_bytes "
+    "block_index sdna_cache decompressed_cache decompression_policy",
+)
+"""Process-global settings that affect trace_library().
+
+Worker processes that are started with the "spawn" method (the default on
+Windows and macOS) do not inherit these from the main process.
+
+:ivar block_index: (cache root, max bytes) of the block_index module, and
+    likewise for sdna_cache and decompressed_cache.
+:ivar decompression_policy: (memory limit, spill dir, random access) of the
+    magic_compression module.
+"""
+
+FieldPath = typing.Tuple[bytes, ...]
+
+
+def worker_settings() -> WorkerSettings:
+    """Return the settings of this process, to pass to init_worker()."""
+    file_cache = blendfile._cached_bfiles
+    return WorkerSettings(
+        blendfile.BlendFile.strict_pointer_mode,
+        blendfile.BlendFile.use_mmap,
+        file_cache.max_open_files,
+        file_cache.max_temp_bytes,
+        (block_index._cache_root, block_index._max_bytes),
+        (sdna_cache._disk_cache_root, sdna_cache._max_bytes),
+        (decompressed_cache._cache_root, decompressed_cache._max_bytes),
+        (
+            magic_compression._memory_limit,
+            magic_compression._spill_dir,
+            magic_compression._random_access,
+        ),
+    )
+
+
+def init_worker(settings: WorkerSettings) -> None:
+    """Apply the settings of the main process to a worker process."""
+    blendfile.set_strict_pointer_mode(settings.strict_pointer_mode)
+    blendfile.BlendFile.use_mmap = settings.use_mmap
+    blendfile.set_cache_limits(settings.max_open_files, settings.max_temp_bytes)
+    block_index.set_disk_cache(*settings.block_index)
+    sdna_cache.set_disk_cache(*settings.sdna_cache)
+    decompressed_cache.set_disk_cache(*settings.decompressed_cache)
+    magic_compression.set_decompression_policy(*settings.decompression_policy)
+
+
+def trace_library(
+    lib_path: pathlib.Path, id_names: typing.Iterable[bytes]
+) -> LibraryGraph:
+    """Visit all blocks required by the named blocks of the blend file.
+
+    This runs in the worker processes.
+
+    :param lib_path: absolute path of the blend file.
+    :param id_names: ID names of the blocks to start at.
+    """
+    bfile = blendfile.open_cached(lib_path)
+    root_dir = bpathlib.BlendPath(bpathlib.make_absolute(bfile.filepath).parent)
+
+    nodes = {}  # type: typing.Dict[int, Node]
+    seeds = {}  # type: typing.Dict[bytes, typing.List[int]]
+    to_visit = []  # type: typing.List[int]
+    for id_name in id_names:
+        found = bfile.find_blocks_from_id_name(id_name[:2], id_name)
+        seeds[id_name] = [_table_index(block) for block in found]
+        to_visit.extend(seeds[id_name])
+    heapq.heapify(to_visit)
+
+    # Visit the blocks in disk order, just like file2blocks.BlockIterator does,
+    # so that blocks are refined by the expanders in the same order.
+    while to_visit:
+        index = heapq.heappop(to_visit)
+        if index in nodes:
+            continue
+        block = bfile.blocks[index]
+
+        if block.code == b"ID":
+            lib = block.get_pointer(b"lib")
+            lib_bpath = bpathlib.BlendPath(lib[b"name"]).absolute(root_dir)
+            lib_index = _table_index(lib)
+            nodes[index] = Node(
+                block.addr_old, (lib_index,), block[b"name"], bytes(lib_bpath), ()
+            )
+            heapq.heappush(to_visit, lib_index)
+            continue
+
+        deps = tuple(_table_index(dep) for dep in expanders.expand_block(block))
+        usages = tuple(
+            describe(usage)
+            for asset_block in asset_holding_blocks([block])
+            for usage in blocks2assets.iter_assets(asset_block)
+        )
+        nodes[index] = Node(block.addr_old, deps, None, None, usages)
+        for dep in deps:
+            heapq.heappush(to_visit, dep)
+
+    return LibraryGraph(nodes, seeds)
+
+
+def describe(usage: result.BlockUsage) -> UsageDescriptor:
+    """Return the picklable descriptor of the block usage."""
+    dna_type = usage.block.dna_type
+
+    def field_path(field: typing.Optional[dna.Field]) -> typing.Optional[FieldPath]:
+        if field is None:
+            return None
+        path = _find_field(dna_type, field)
+        if path is None:
+            raise ValueError("%r is not a field of %r" % (field, dna_type))
+        return path
+
+    return UsageDescriptor(
+        _table_index(usage.block),
+        usage.block.code,
+        usage.block.addr_old,
+        usage.block.sdna_index,
+        usage.block.dna_type_name,
+        usage.block_name,
+        bytes(usage.asset_path),
+        usage.is_sequence,
+        usage.field_name,
+        field_path(usage.path_full_field),
+        field_path(usage.path_dir_field),
+        field_path(usage.path_base_field),
+    )
+
+
+def resolve(
+    bfile: blendfile.BlendFile, descriptor: UsageDescriptor
+) -> result.BlockUsage:
+    """Rebuild the block usage from its descriptor."""
+    block = bfile.blocks[descriptor.block_index]
+    if block.sdna_index != descriptor.sdna_index:
+        block.refine_type_from_index(descriptor.sdna_index)
+
+    dna_type = block.dna_type
+    pointer_size = bfile.header.pointer_size
+
+    def field(path: typing.Optional[FieldPath]) -> typing.Optional[dna.Field]:
+        if path is None:
+            return None
+        return dna_type.field_from_path(pointer_size, path)[0]
+
+    return result.BlockUsage(
+        block,
+        descriptor.asset_path,
+        descriptor.is_sequence,
+        path_full_field=field(descriptor.path_full_field),
+        path_dir_field=field(descriptor.path_dir_field),
+        path_base_field=field(descriptor.path_base_field),
+        block_name=descriptor.block_name,
+    )
+
+
+class DescribedBlockUsage(result.BlockUsage):
+    """Block usage that only opens its blend file when the block is accessed.
+
+    The asset path and the identity of the block are known from the
+    descriptor, so listing assets, comparing and hashing these usages does not
+    require opening the blend file. The block and the fields are resolved via
+    blendfile.open_cached() on first access.
+    """
+
+    def __init__(self, bfile_path: pathlib.Path, descriptor: UsageDescriptor) -> None:
+        # The base class __init__() would require the block.
+        self.block_name = descriptor.block_name
+        self.asset_path = bpathlib.BlendPath(descriptor.asset_path)
+        self.is_sequence = bool(descriptor.is_sequence)
+        self._abspath = None  # type: typing.Optional[pathlib.Path]
+
+        self._bfile_path = bfile_path
+        self._descriptor = descriptor
+        self._resolved = None  # type: typing.Optional[result.BlockUsage]
+
+    def _resolve(self) -> result.BlockUsage:
+        if self._resolved is None:
+            bfile = blendfile.open_cached(self._bfile_path)
+            self._resolved = resolve(bfile, self._descriptor)
+        return self._resolved
+
+    @property
+    def block(self) -> blendfile.BlendFileBlock:  # type: ignore
+        return self._resolve().block
+
+    @property
+    def path_full_field(self) -> typing.Optional[dna.Field]:  # type: ignore
+        return self._resolve().path_full_field
+
+    @property
+    def path_dir_field(self) -> typing.Optional[dna.Field]:  # type: ignore
+        return self._resolve().path_dir_field
+
+    @property
+    def path_base_field(self) -> typing.Optional[dna.Field]:  # type: ignore
+        return self._resolve().path_base_field
+
+    @property
+    def bfile_path(self) -> pathlib.Path:
+        return self._bfile_path
+
+    @property
+    def field_name(self) -> str:
+        return self._descriptor.field_name
+
+    def _block_key(self) -> typing.Tuple[bytes, int, pathlib.Path]:
+        return self._descriptor.code, self._descriptor.addr_old, self._bfile_path
+
+    def _dna_type_name(self) -> str:
+        return self._descriptor.dna_type_name
+
+
+def _find_field(struct: dna.Struct, field: dna.Field) -> typing.Optional[FieldPath]:
+    for candidate in struct.fields:
+        if candidate is field:
+            return (candidate.name.name_only,)
+        if candidate.name.is_pointer or not candidate.dna_type.fields:
+            continue
+        sub_path = _find_field(candidate.dna_type, field)
+        if sub_path is not None:
+            return (candidate.name.name_only,) + sub_path
+    return None
+
+
+def _table_index(block: blendfile.BlendFileBlock) -> int:
+    index = block._table_index
+    assert index >= 0, "%r is not in the block table of its file" % block
+    return index
+
+
+class _RootBlockIterator(file2blocks.BlockIterator):
+    """BlockIterator that only visits the blocks of the first blend file.
+
+    The ID blocks that refer to libraries are kept in blocks_per_lib.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.blocks_per_lib = {}  # type: typing.Mapping[bpathlib.BlendPath, typing.Set[blendfile.BlendFileBlock]]
+
+    def _visit_linked_blocks(self, blocks_per_lib):
+        self.blocks_per_lib = blocks_per_lib
+        return iter(())
+
+
+def iter_usages(
+    bfilepath: pathlib.Path,
+    progress_cb: typing.Optional[progress.Callback],
+    jobs: int,
+) -> typing.Iterator[result.BlockUsage]:
+    """Generator, yield the block usages of one blend file, see ParallelTracer."""
+    with ParallelTracer(jobs, progress_cb) as tracer:
+        yield from tracer.usages(bfilepath)
+
+
+class ParallelTracer:
+    """Trace blend files, with their libraries traced by worker processes.
+
+    With only one job the libraries are traced in this process, one at a
+    time, when they are visited. This is used for the library_cache, which
+    stores the LibraryGraph of each traced library.
+
+    The graphs of the libraries are kept, so that tracing more blend files
+    with the same tracer, as the batch module does, reuses them. Call close()
+    when done, or use the tracer as context manager.
+
+    The worker processes get the settings of this process at the moment they
+    are started, see worker_settings().
+
+    :param jobs: the maximum number of worker processes.
+    :param progress_cb: receives the progress of tracing; can be changed
+        between blend files.
+    :param mp_context: multiprocessing context to start the workers with, or
+        None for the default.
+    """
+
+    def __init__(
+        self,
+        jobs: int,
+        progress_cb: typing.Optional[progress.Callback] = None,
+        mp_context: typing.Optional[multiprocessing.context.BaseContext] = None,
+    ) -> None:
+        self.jobs = jobs
+        self.mp_context = mp_context
+        self.progress_cb = progress_cb or progress.Callback()
+        self.bi = _RootBlockIterator()
+
+        self._executor = None  # type: typing.Optional[concurrent.futures.Executor]
+        self._pending = {}  # type: typing.Dict[concurrent.futures.Future, typing.Tuple[pathlib.Path, typing.FrozenSet[bytes]]]
+        # Per library, the ID names that were traced or are being traced.
+        self._requested = collections.defaultdict(set)  # type: typing.DefaultDict[pathlib.Path, typing.Set[bytes]]
+        self._graphs = {}  # type: typing.Dict[pathlib.Path, LibraryGraph]
+        self._errors = {}  # type: typing.Dict[pathlib.Path, BaseException]
+
+        # The libraries referenced by each library, for the library_cache.
+        self._lib_refs = collections.defaultdict(set)  # type: typing.DefaultDict[pathlib.Path, typing.Set[pathlib.Path]]
+        # Graphs that were traced, not loaded from the library_cache.
+        self._traced = {}  # type: typing.Dict[typing.Tuple[pathlib.Path, typing.FrozenSet[bytes]], LibraryGraph]
+
+        # The block usages yielded per graph node, shared by all blend files.
+        self._usages = {}  # type: typing.Dict[typing.Tuple[pathlib.Path, int], typing.List[DescribedBlockUsage]]
+
+        # Blend file paths as they are known by blendfile.open_cached().
+        self._bfile_paths = {}  # type: typing.Dict[pathlib.Path, pathlib.Path]
+
+    def usages(self, bfilepath: pathlib.Path) -> typing.Iterator[result.BlockUsage]:
+        """Generator, yield the block usages in the same order as serial tracing.
+
+        Usages are not de-duplicated; that is left to the caller, just like
+        with serial tracing. Usages in libraries are DescribedBlockUsage
+        objects, so libraries are only opened by this process when tracing
+        them in-process, or when the blocks of the usages are accessed.
+        """
+        self.bi = _RootBlockIterator()
+        self.bi.progress_cb = self.progress_cb
+
+        bfile = self.bi.open_blendfile(bfilepath)
+        self._bfile_paths[bpathlib.make_absolute(bfile.filepath)] = bfile.filepath
+        blocks = self.bi.iter_blocks(bfile)
+        for block in asset_holding_blocks(blocks):
+            yield from blocks2assets.iter_assets(block)
+
+        blocks_per_lib = {
+            lib_bpath: {idblock[b"name"] for idblock in idblocks}
+            for lib_bpath, idblocks in self.bi.blocks_per_lib.items()
+        }
+        if self.jobs > 1:
+            self._prefetch(blocks_per_lib)
+        yield from self._visit_linked_graphs(blocks_per_lib)
+        self._save_traced()
+
+    def close(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is None:
+            return
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown()
+        self._executor = None
+
+    def __enter__(self) -> "ParallelTracer":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def _visit_linked_graphs(self, blocks_per_lib):
+        for lib_bpath, id_names in blocks_per_lib.items():
+            lib_path = bpathlib.make_absolute(lib_bpath.to_path())
+
+            if not lib_path.exists():
+                log.warning("Library %s does not exist", lib_path)
+                continue
+
+            log.debug("Expanding %d blocks in %s", len(id_names), lib_path)
+            self.bi.progress_cb.trace_blendfile(lib_path)
+            log.info("inspecting: %s", lib_path)
+            graph = self._graph(lib_path, id_names)
+            nested = yield from self._visit_graph(lib_path, graph, id_names)
+            yield from self._visit_linked_graphs(nested)
+
+    def _visit_graph(self, lib_path, graph, id_names):
+        """Mirror of BlockIterator._visit_blocks(), on the graph of a library."""
+        bfile_path = self._bfile_paths.get(lib_path, lib_path)
+        blocks_yielded = self.bi.blocks_yielded
+
+        # Mapping from library path to the names of the blocks to expand.
+        blocks_per_lib = collections.defaultdict(set)
+
+        to_visit = [index for id_name in id_names for index in graph.seeds[id_name]]
+        heapq.heapify(to_visit)
+        while to_visit:
+            index = heapq.heappop(to_visit)
+            node = graph.nodes[index]
+            if (lib_path, node.addr_old) in blocks_yielded:
+                continue
+
+            if node.id_name is not None:
+                blocks_per_lib[bpathlib.BlendPath(node.lib_path)].add(node.id_name)
+                heapq.heappush(to_visit, node.deps[0])
+                continue
+
+            for dep in node.deps:
+                heapq.heappush(to_visit, dep)
+            blocks_yielded.add((lib_path, node.addr_old))
+            if not node.usages:
+                continue
+            # Reuse the usages of earlier blend files, with their resolved paths.
+            try:
+                usages = self._usages[lib_path, index]
+            except KeyError:
+                usages = self._usages[lib_path, index] = [
+                    DescribedBlockUsage(bfile_path, descriptor)
+                    for descriptor in node.usages
+                ]
+            yield from usages
+
+        return blocks_per_lib
+
+    def _graph(
+        self, lib_path: pathlib.Path, id_names: typing.Set[bytes]
+    ) -> LibraryGraph:
+        """Return the graph of the library, waiting for the workers if necessary."""
+        self._request(lib_path, id_names)
+        while any(path == lib_path for path, _ in self._pending.values()):
+            done, _ = concurrent.futures.wait(
+                list(self._pending), return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                self._collect(future)
+
+        error = self._errors.get(lib_path)
+        if error is not None:
+            raise error
+        return self._graphs[lib_path]
+
+    def _request(self, lib_path: pathlib.Path, id_names: typing.Set[bytes]) -> None:
+        """Trace the blocks that are not yet traced, or load them from the cache."""
+        requested = self._requested[lib_path]
+        missing = frozenset(id_names - requested)
+        if not missing:
+            return
+        requested.update(missing)
+
+        graph = library_cache.load(lib_path, missing)
+        if graph is not None:
+            self._merge(lib_path, graph)
+            return
+
+        if self.jobs <= 1:
+            graph = trace_library(lib_path, sorted(missing))
+            self._traced[lib_path, missing] = graph
+            self._merge(lib_path, graph)
+            return
+
+        if self._executor is None:
+            log.debug("Starting %d worker processes", self.jobs)
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                self.jobs,
+                mp_context=self.mp_context,
+                initializer=init_worker,
+                initargs=(worker_settings(),),
+            )
+        future = self._executor.submit(trace_library, lib_path, sorted(missing))
+        self._pending[future] = (lib_path, missing)
+
+    def _collect(self, future: concurrent.futures.Future) -> None:
+        lib_path, id_names = self._pending.pop(future)
+        try:
+            graph = future.result()
+        except Exception as ex:
+            # Only raise when the library is actually visited; the worker may
+            # have been tracing blocks that turn out to be unused.
+            self._errors.setdefault(lib_path, ex)
+            return
+        self._traced[lib_path, id_names] = graph
+        self._merge(lib_path, graph)
+
+    def _merge(self, lib_path: pathlib.Path, graph: LibraryGraph) -> None:
+        existing = self._graphs.get(lib_path)
+        if existing is None:
+            self._graphs[lib_path] = LibraryGraph(dict(graph.nodes), dict(graph.seeds))
+        else:
+            existing.nodes.update(graph.nodes)
+            existing.seeds.update(graph.seeds)
+
+        blocks_per_lib = _linked_blocks(graph)
+        self._lib_refs[lib_path].update(
+            bpathlib.make_absolute(lib_bpath.to_path()) for lib_bpath in blocks_per_lib
+        )
+
+        # Start tracing the libraries linked from this one, without waiting
+        # for the main process to get there.
+        if self.jobs > 1:
+            self._prefetch(blocks_per_lib)
+
+    def _prefetch(self, blocks_per_lib) -> None:
+        for lib_bpath, id_names in blocks_per_lib.items():
+            lib_path = bpathlib.make_absolute(lib_bpath.to_path())
+            if lib_path.exists():
+                self._request(lib_path, id_names)
+
+    def _save_traced(self) -> None:
+        """Store the traced graphs in the library_cache."""
+        if not library_cache.is_enabled():
+            return
+        traced, self._traced = self._traced, {}
+        for (lib_path, id_names), graph in traced.items():
+            dependencies = set()  # type: typing.Set[pathlib.Path]
+            to_check = [
+                bpathlib.make_absolute(lib_bpath.to_path())
+                for lib_bpath in _linked_blocks(graph)
+            ]
+            while to_check:
+                path = to_check.pop()
+                if path in dependencies:
+                    continue
+                dependencies.add(path)
+                to_check.extend(self._lib_refs.get(path, ()))
+            dependencies.discard(lib_path)
+            library_cache.save(lib_path, id_names, graph, sorted(dependencies))
+
+
+def _linked_blocks(
+    graph: LibraryGraph,
+) -> typing.Dict[bpathlib.BlendPath, typing.Set[bytes]]:
+    """Return the names of the linked-in blocks, per library."""
+    blocks_per_lib = collections.defaultdict(set)  # type: typing.DefaultDict[bpathlib.BlendPath, typing.Set[bytes]]
+    for node in graph.nodes.values():
+        if node.id_name is not None:
+            blocks_per_lib[bpathlib.BlendPath(node.lib_path)].add(node.id_name)
+    return blocks_per_lib
@@ -29,3 +29,15 @@ class Callback:
 
     def trace_blendfile(self, filename: pathlib.Path) -> None:
         """Called for every blendfile opened when tracing dependencies."""
+
+    def trace_root_start(self, root: pathlib.Path) -> None:
+        """Called when batch tracing starts on one of its blend files."""
+
+    def trace_root_done(self, root: pathlib.Path) -> None:
+        """Called when batch tracing is done with one of its blend files."""
+
+    def trace_root_failed(self, root: pathlib.Path, error: Exception) -> None:
+        """Called when batch tracing fails on one of its blend files.
+
+        Tracing continues with the next blend file.
+        """
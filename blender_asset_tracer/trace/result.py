@@ -109,19 +109,40 @@ class BlockUsage:
             pass
         return b"-unnamed-"
 
-    def __repr__(self):
+    @property
+    def bfile_path(self) -> pathlib.Path:
+        """Path of the blend file containing the block."""
+        return self.block.bfile.filepath
+
+    @property
+    def block_code(self) -> bytes:
+        """Code of the block, like b"IM" or b"LI"."""
+        return self._block_key()[0]
+
+    @property
+    def field_name(self) -> str:
+        """Name of the field(s) containing the asset path, for display."""
         if self.path_full_field is None:
-            field_name = (
+            return (
                 self.path_dir_field.name.name_full.decode()
                 + "/"
                 + self.path_base_field.name.name_full.decode()
             )
-        else:
-            field_name = self.path_full_field.name.name_full.decode()
+        return self.path_full_field.name.name_full.decode()
+
+    def _block_key(self) -> typing.Tuple[bytes, int, pathlib.Path]:
+        """Values that identify the block, see BlendFileBlock.__eq__()."""
+        block = self.block
+        return block.code, block.addr_old, block.bfile.filepath
+
+    def _dna_type_name(self) -> str:
+        return self.block.dna_type_name
+
+    def __repr__(self):
         return "<BlockUsage name=%r type=%r field=%r asset=%r%s>" % (
             self.block_name,
-            self.block.dna_type_name,
-            field_name,
+            self._dna_type_name(),
+            self.field_name,
             self.asset_path,
             " sequence" if self.is_sequence else "",
         )
@@ -152,11 +173,14 @@ class BlockUsage:
     def __fspath__(self) -> pathlib.Path:
         """Determine the absolute path of the asset on the filesystem."""
         if self._abspath is None:
-            bpath = self.block.bfile.abspath(self.asset_path)
+            bpath = self.asset_path
+            if not bpath.is_absolute():
+                root = bpathlib.BlendPath(self.bfile_path.absolute().parent)
+                bpath = bpath.absolute(root)
             log.info(
                 "Resolved %s rel to %s -> %s",
                 self.asset_path,
-                self.block.bfile.filepath,
+                self.bfile_path,
                 bpath,
             )
 
@@ -175,7 +199,7 @@ class BlockUsage:
             log.info(
                 "Resolving %s rel to %s -> %s",
                 self.asset_path,
-                self.block.bfile.filepath,
+                self.bfile_path,
                 self._abspath,
             )
         else:
@@ -193,7 +217,10 @@ class BlockUsage:
     def __eq__(self, other: object):
         if not isinstance(other, BlockUsage):
             return False
-        return self.block_name == other.block_name and self.block == other.block
+        return (
+            self.block_name == other.block_name
+            and self._block_key() == other._block_key()
+        )
 
     def __hash__(self):
-        return hash((self.block_name, hash(self.block)))
+        return hash((self.block_name, hash(self._block_key())))
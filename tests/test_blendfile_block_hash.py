@@ -0,0 +1,78 @@
+import os
+import pathlib
+import tempfile
+
+from blender_asset_tracer import blendfile
+from blender_asset_tracer.blendfile import block_hash
+from tests.abstract_test import AbstractBlendFileTest
+
+
+class BlockHashTest(AbstractBlendFileTest):
+    def setUp(self):
+        self.tdir = tempfile.TemporaryDirectory()
+        self.to_modify = pathlib.Path(self.tdir.name) / "basic_file.blend"
+        self.to_modify.write_bytes((self.blendfiles / "basic_file.blend").read_bytes())
+        self.bf = blendfile.BlendFile(self.to_modify, mode="r+b")
+
+    def tearDown(self):
+        super().tearDown()
+        self.tdir.cleanup()
+
+    def _write_pointer(self, block: blendfile.BlendFileBlock, path, value: bytes):
+        psize = self.bf.header.pointer_size
+        _, field_offset = block.dna_type.field_from_path(psize, path)
+        self.bf.fileobj.seek(block.file_offset + field_offset, os.SEEK_SET)
+        self.bf.fileobj.write(value[:psize])
+        self.bf.fileobj.flush()
+
+    def test_pointers_are_ignored(self):
+        ob = self.bf.code_index[b"OB"][0]
+        pre_digest = block_hash.block_digest(ob)
+        pre_file_digest = block_hash.file_digest(self.bf)
+
+        self._write_pointer(ob, b"data", b"12345678")
+        self._write_pointer(ob, (b"id", b"next"), b"87654321")
+        self.assertNotEqual(0, ob[b"data"])
+
+        self.assertEqual(pre_digest, block_hash.block_digest(ob))
+        self.assertEqual(pre_file_digest, block_hash.file_digest(self.bf))
+
+    def test_data_changes(self):
+        ob = self.bf.code_index[b"OB"][0]
+        pre_hash = ob.hash()
+        pre_file_digest = block_hash.file_digest(self.bf)
+
+        ob[b"empty_drawsize"] = 47.0
+
+        self.assertNotEqual(pre_hash, ob.hash())
+        self.assertNotEqual(pre_file_digest, block_hash.file_digest(self.bf))
+
+    def test_block_outside_table(self):
+        for block in (self.bf.code_index[b"OB"][0], self.bf.code_index[b"DATA"][0]):
+            copy = blendfile.BlendFileBlock(
+                self.bf,
+                block.code,
+                block.size,
+                block.addr_old,
+                block.sdna_index,
+                block.count,
+                block.file_offset,
+            )
+            self.assertEqual(-1, copy._table_index)
+            self.assertEqual(
+                block_hash.block_digest(block), block_hash.block_digest(copy)
+            )
+
+    def test_iter_digests(self):
+        digests = list(block_hash.iter_digests(self.bf))
+        self.assertEqual(list(self.bf.blocks), [block for block, _ in digests])
+        for block, digest in digests:
+            self.assertEqual(block_hash.DIGEST_SIZE, len(digest))
+            self.assertEqual(block_hash.block_digest(block), digest)
+
+    def test_same_as_reopened(self):
+        expect = block_hash.file_digest(self.bf)
+        with blendfile.BlendFile(self.blendfiles / "basic_file.blend") as other:
+            self.assertEqual(expect, block_hash.file_digest(other))
+        with blendfile.BlendFile(self.blendfiles / "doubly_linked.blend") as other:
+            self.assertNotEqual(expect, block_hash.file_digest(other))
@@ -0,0 +1,153 @@
+import os
+import pathlib
+import pickle
+import tempfile
+from unittest import mock
+
+from blender_asset_tracer import blendfile
+from blender_asset_tracer.blendfile import block_index, sdna_cache
+from tests.abstract_test import AbstractBlendFileTest
+
+
+class BlockIndexTest(AbstractBlendFileTest):
+    def setUp(self):
+        super().setUp()
+        self.tdir = tempfile.TemporaryDirectory()
+        self.tpath = pathlib.Path(self.tdir.name)
+        self.cache_root = self.tpath / "block-index"
+        block_index.set_disk_cache(self.cache_root)
+
+    def tearDown(self):
+        super().tearDown()
+        block_index.set_disk_cache(None)
+        self.tdir.cleanup()
+
+    def _copy(self, filename: str) -> pathlib.Path:
+        path = self.tpath / filename
+        path.write_bytes((self.blendfiles / filename).read_bytes())
+        return path
+
+    def _headers(self, bf: blendfile.BlendFile) -> list:
+        return [
+            (b.code, b.size, b.addr_old, b.sdna_index, b.count, b.file_offset)
+            for b in bf.blocks
+        ]
+
+    def _open_without_scan(self, path: pathlib.Path) -> blendfile.BlendFile:
+        with mock.patch.object(
+            blendfile.BlendFile,
+            "iter_block_headers",
+            side_effect=AssertionError("file should not be scanned"),
+        ):
+            return blendfile.BlendFile(path)
+
+    def test_reopen_from_index(self):
+        path = self._copy("doubly_linked.blend")
+        with blendfile.BlendFile(path) as bf:
+            expect = self._headers(bf)
+        self.assertEqual(1, len(list(self.cache_root.glob("*.blockindex"))))
+        self.assertEqual([], list(self.cache_root.glob("*.tmp")))
+
+        self.bf = self._open_without_scan(path)
+        self.assertEqual(expect, self._headers(self.bf))
+
+        ob = self.bf.code_index[b"OB"][1]
+        self.assertEqual(b"OBPlane", ob.id_name)
+        self.assertIs(ob, self.bf.block_from_addr[ob.addr_old])
+        mesh = ob.get_pointer(b"data")
+        self.assertEqual(b"ME", mesh.code)
+
+    def test_compressed_file(self):
+        path = self._copy("basic_file_compressed.blend")
+        with blendfile.BlendFile(path) as bf:
+            expect = self._headers(bf)
+
+        self.bf = self._open_without_scan(path)
+        self.assertEqual(expect, self._headers(self.bf))
+        ob = self.bf.code_index[b"OB"][0]
+        self.assertEqual([2.0, 3.0, 5.0], ob.get(b"loc"))
+
+    def test_catalog_no_longer_cached(self):
+        path = self._copy("basic_file.blend")
+        blendfile.BlendFile(path).close()
+        sdna_cache.clear()
+
+        self.bf = self._open_without_scan(path)
+        self.assertTrue(self.bf.structs)
+        ob = self.bf.code_index[b"OB"][0]
+        self.assertEqual([2.0, 3.0, 5.0], ob.get(b"loc"))
+
+    def test_changed_file(self):
+        path = self._copy("basic_file.blend")
+        blendfile.BlendFile(path).close()
+
+        # Replace the file with another one, keeping the modification time.
+        stat = path.stat()
+        path.write_bytes((self.blendfiles / "doubly_linked.blend").read_bytes())
+        os.utime(str(path), ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        self.bf = blendfile.BlendFile(path)
+        self.assertEqual(
+            [b"OBCubes", b"OBPlane"], [ob.id_name for ob in self.bf.code_index[b"OB"]]
+        )
+
+    def test_not_for_writing(self):
+        path = self._copy("basic_file.blend")
+        self.bf = blendfile.BlendFile(path, "rb+")
+        self.assertFalse(self.cache_root.exists())
+
+    def test_corrupt_index(self):
+        path = self._copy("basic_file.blend")
+        blendfile.BlendFile(path).close()
+        index_file = next(self.cache_root.glob("*.blockindex"))
+        index_file.write_bytes(b"this is not an index")
+
+        with self.assertLogs(block_index.log, "WARNING"):
+            self.bf = blendfile.BlendFile(path)
+        ob = self.bf.code_index[b"OB"][0]
+        self.assertEqual([2.0, 3.0, 5.0], ob.get(b"loc"))
+
+    def test_truncated_index(self):
+        path = self._copy("basic_file.blend")
+        blendfile.BlendFile(path).close()
+        index_file = next(self.cache_root.glob("*.blockindex"))
+        index_file.write_bytes(index_file.read_bytes()[:-4])
+
+        with self.assertLogs(block_index.log, "WARNING"):
+            self.bf = blendfile.BlendFile(path)
+        ob = self.bf.code_index[b"OB"][0]
+        self.assertEqual([2.0, 3.0, 5.0], ob.get(b"loc"))
+
+    def test_outdated_index(self):
+        path = self._copy("basic_file.blend")
+        blendfile.BlendFile(path).close()
+        index_file = next(self.cache_root.glob("*.blockindex"))
+        # Index files of format version 1 were pickles.
+        index_file.write_bytes(pickle.dumps((1, "something")))
+
+        with self.assertLogs(block_index.log, "DEBUG") as logs:
+            self.bf = blendfile.BlendFile(path)
+        self.assertNotIn("WARNING", [record.levelname for record in logs.records])
+
+        # The index should have been replaced.
+        self.bf.close()
+        self.bf = self._open_without_scan(path)
+        self.assertEqual("OBümlaut".encode(), self.bf.code_index[b"OB"][0].id_name)
+
+    def test_eviction(self):
+        paths = [self._copy(name) for name in ("basic_file.blend", "linked_cube.blend")]
+        blendfile.BlendFile(paths[0]).close()
+        index_size = next(self.cache_root.glob("*.blockindex")).stat().st_size
+
+        block_index.set_disk_cache(self.cache_root, max_bytes=index_size + 10)
+        blendfile.BlendFile(paths[1]).close()
+
+        # Only the index of the most recently opened file should remain.
+        self.assertEqual(1, len(list(self.cache_root.glob("*.blockindex"))))
+        self.bf = self._open_without_scan(paths[1])
+
+    def test_clear(self):
+        path = self._copy("basic_file.blend")
+        blendfile.BlendFile(path).close()
+        block_index.clear()
+        self.assertEqual([], list(self.cache_root.glob("*.blockindex")))
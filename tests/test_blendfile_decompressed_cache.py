@@ -0,0 +1,108 @@
+import gzip
+import pathlib
+import tempfile
+from unittest import mock
+
+from blender_asset_tracer import blendfile
+from blender_asset_tracer.blendfile import (
+    cache_dir,
+    decompressed_cache,
+    magic_compression,
+)
+from tests.abstract_test import AbstractBlendFileTest
+
+
+class DecompressedCacheTest(AbstractBlendFileTest):
+    def setUp(self):
+        super().setUp()
+        self.tdir = tempfile.TemporaryDirectory()
+        self.tpath = pathlib.Path(self.tdir.name)
+        self.cache_root = self.tpath / "decompressed"
+        decompressed_cache.set_disk_cache(self.cache_root)
+
+        self.path = self.tpath / "compressed.blend"
+        self.path.write_bytes(
+            (self.blendfiles / "basic_file_compressed.blend").read_bytes()
+        )
+
+    def tearDown(self):
+        super().tearDown()
+        decompressed_cache.set_disk_cache(None)
+        self.tdir.cleanup()
+
+    def _cached_files(self) -> list:
+        return sorted(self.cache_root.glob("*" + decompressed_cache.SUFFIX))
+
+    def _check_loaded(self, bf: blendfile.BlendFile) -> None:
+        self.assertTrue(bf.is_compressed)
+        ob = bf.code_index[b"OB"][0]
+        self.assertEqual("OBümlaut", ob.get((b"id", b"name"), as_str=True))
+
+    def test_populate_and_reuse(self):
+        with blendfile.BlendFile(self.path) as bf:
+            self._check_loaded(bf)
+            self.assertEqual(self._cached_files(), [bf.raw_filepath])
+            self.assertEqual(0, bf.temp_file_size)
+            self.assertTrue(bf.is_mmapped)
+
+        # The decompressed file should stay after closing.
+        cached = self._cached_files()
+        self.assertEqual(1, len(cached))
+        self.assertEqual(gzip.decompress(self.path.read_bytes()), cached[0].read_bytes())
+        self.assertEqual([], list(self.cache_root.glob("*.tmp")))
+
+        with mock.patch.object(
+            magic_compression,
+            "_decompress_into",
+            side_effect=AssertionError("file should not be decompressed"),
+        ):
+            with blendfile.BlendFile(self.path) as bf:
+                self._check_loaded(bf)
+                self.assertEqual(cached[0], bf.raw_filepath)
+
+    def test_changed_file(self):
+        blendfile.BlendFile(self.path).close()
+
+        self.path.write_bytes(
+            (self.blendfiles / "linked_cube_compressed.blend").read_bytes()
+        )
+        with blendfile.BlendFile(self.path) as bf:
+            self.assertEqual([], list(bf.code_index[b"OB"]))
+        self.assertEqual(2, len(self._cached_files()))
+
+    def test_not_for_writing(self):
+        with blendfile.BlendFile(self.path, "rb+") as bf:
+            self._check_loaded(bf)
+        self.assertEqual([], self._cached_files())
+
+    def test_eviction(self):
+        other = self.tpath / "other.blend"
+        other.write_bytes(
+            (self.blendfiles / "linked_cube_compressed.blend").read_bytes()
+        )
+
+        blendfile.BlendFile(self.path).close()
+        size = self._cached_files()[0].stat().st_size
+        decompressed_cache.set_disk_cache(self.cache_root, max_bytes=size)
+
+        # Storing the other file should evict the first one, but not itself.
+        with blendfile.BlendFile(other) as bf:
+            self.assertEqual(self._cached_files(), [bf.raw_filepath])
+
+    def test_too_large_for_cache(self):
+        decompressed_cache.set_disk_cache(self.cache_root, max_bytes=1024)
+        with blendfile.BlendFile(self.path) as bf:
+            self._check_loaded(bf)
+        self.assertEqual([], self._cached_files())
+
+    def test_not_a_blend_file(self):
+        self.path.write_bytes(gzip.compress(b"this is not a blend file"))
+        with self.assertRaises(blendfile.exceptions.BlendFileError):
+            blendfile.BlendFile(self.path)
+        self.assertEqual([], self._cached_files())
+        self.assertEqual([], list(self.cache_root.glob("*" + cache_dir.TMP_SUFFIX)))
+
+    def test_clear(self):
+        blendfile.BlendFile(self.path).close()
+        decompressed_cache.clear()
+        self.assertEqual([], self._cached_files())
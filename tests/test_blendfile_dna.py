@@ -171,6 +171,34 @@ class StructTest(unittest.TestCase):
         with self.assertRaises(TypeError):
             self.s.field_from_path(psize, "path")
 
+    def test_pointer_mask(self):
+        mask = self.s.pointer_mask(8)
+        self.assertEqual(self.s.size, len(mask))
+        self.assertEqual(bytes(16), mask[:16])
+        self.assertEqual(b"\xff" * 4096, mask[16:4112])
+        self.assertEqual(bytes(24), mask[4112:4136])
+        self.assertEqual(b"\xff" * (self.s.size - 4136), mask[4136:])
+        self.assertIs(mask, self.s.pointer_mask(8))
+
+        self.assertIsNone(self.s_int.pointer_mask(8))
+        no_pointers = dna.Struct(b"NoPointers")
+        no_pointers.append_field(dna.Field(self.s_int, dna.Name(b"number"), 4, 0))
+        self.assertIsNone(no_pointers.pointer_mask(8))
+
+    def test_pointer_mask_nested(self):
+        inner = dna.Struct(b"Inner")
+        inner.append_field(dna.Field(self.s, dna.Name(b"*ptr"), 8, 0))
+        inner.append_field(dna.Field(self.s_int, dna.Name(b"number"), 4, 8))
+        outer = dna.Struct(b"Outer")
+        outer.append_field(dna.Field(self.s_int, dna.Name(b"number"), 4, 0))
+        outer.append_field(dna.Field(inner, dna.Name(b"inner[2]"), 24, 4))
+
+        self.assertEqual([(4, 8), (16, 8)], list(outer.pointer_ranges(8)))
+        self.assertEqual(
+            b"\xff" * 4 + bytes(8) + b"\xff" * 4 + bytes(8) + b"\xff" * 4,
+            outer.pointer_mask(8),
+        )
+
     def test_simple_field_get(self):
         fileobj = mock.MagicMock(io.BufferedReader)
         fileobj.read.return_value = b"\x01\x02\x03\x04\xff\xfe\xfd\xfa"
@@ -263,6 +291,56 @@ class StructTest(unittest.TestCase):
         self.assertAlmostEqual(2.79, val[1])
         fileobj.seek.assert_called_with(4144, os.SEEK_CUR)
 
+    def test_field_accessor_cached(self):
+        header = self.FakeHeader()
+        accessor = self.s.field_accessor(header, (b"floaty", 1))
+        self.assertIs(accessor, self.s.field_accessor(header, (b"floaty", 1)))
+        self.assertIs(self.f_floaty, accessor.field)
+        self.assertEqual(4148, accessor.offset)
+
+        self.assertIsNone(self.s.field_accessor(header, b"nonexistant"))
+
+        # Adding fields should invalidate the cache.
+        f_extra = dna.Field(self.s_int, dna.Name(b"nonexistant"), 4, 4194)
+        self.s.append_field(f_extra)
+        self.assertIs(f_extra, self.s.field_accessor(header, b"nonexistant").field)
+
+    def test_field_get_from_buffer(self):
+        header = self.FakeHeader()
+        buffer = bytearray(self.s.size + 8)
+        struct_offset = 8
+        buffer[struct_offset + 16 : struct_offset + 22] = b"\xf0\x9f\xa6\x87\x00d"
+        buffer[struct_offset + 4112 : struct_offset + 4120] = b"\xf0\x9f\xa6\x87\x00dum"
+        buffer[struct_offset + 4144 : struct_offset + 4152] = b"@333@2\x8f\\"
+        buffer[struct_offset + 4152] = 0xF0
+
+        def get(path, **kwargs):
+            _, val = self.s.field_get_from_buffer(
+                header, buffer, struct_offset, path, **kwargs
+            )
+            return val
+
+        self.assertEqual("🦇", get(b"path", as_str=True))
+        self.assertEqual(b"\xf0\x9f\xa6\x87", get(b"path", as_str=False))
+        self.assertEqual(
+            b"\xf0\x9f\xa6\x87\x00d\x00",
+            get(b"path", as_str=False, null_terminated=False)[:7],
+        )
+        self.assertEqual(0xF09FA6870064756D, get(b"ptr"))
+        self.assertEqual(0xF0, get(b"bitflag"))
+
+        floaty = get(b"floaty")
+        self.assertIsInstance(floaty, list)
+        self.assertAlmostEqual(2.8, floaty[0])
+        self.assertAlmostEqual(2.79, floaty[1])
+        self.assertAlmostEqual(2.79, get((b"floaty", 1)))
+
+        self.assertEqual(519871531, get(b"nonexistant", default=519871531))
+        with self.assertRaises(KeyError):
+            get(b"nonexistant")
+        with self.assertRaises(NotImplementedError):
+            get(b"bignum")
+
     def test_char_field_set(self):
         fileobj = mock.MagicMock(io.BufferedReader)
         value = 255
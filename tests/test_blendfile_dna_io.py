@@ -1,3 +1,4 @@
+import struct
 import unittest
 from unittest import mock
 
@@ -22,3 +23,28 @@ class StringTest(unittest.TestCase):
 
         expect_bytes = "බියර්".encode("utf8") + b"\0"
         fileobj.write.assert_called_with(expect_bytes)
+
+
+class PointerArrayTest(unittest.TestCase):
+    def test_little_endian(self):
+        data = struct.pack("<3Q", 1, 0, 0x123456789ABC)
+        pointers = dna_io.LittleEndianTypes.read_pointers_from(data, 8)
+        self.assertEqual([1, 0, 0x123456789ABC], list(pointers))
+
+    def test_big_endian(self):
+        data = struct.pack(">3Q", 1, 0, 0x123456789ABC)
+        pointers = dna_io.BigEndianTypes.read_pointers_from(data, 8)
+        self.assertEqual([1, 0, 0x123456789ABC], list(pointers))
+
+        data = struct.pack(">2I", 0xDEADBEEF, 47)
+        pointers = dna_io.BigEndianTypes.read_pointers_from(data, 4)
+        self.assertEqual([0xDEADBEEF, 47], list(pointers))
+
+    def test_partial_pointer(self):
+        data = struct.pack("<2I", 1, 2) + b"\x03\x00"
+        pointers = dna_io.LittleEndianTypes.read_pointers_from(memoryview(data), 4)
+        self.assertEqual([1, 2], list(pointers))
+
+    def test_unsupported_size(self):
+        with self.assertRaises(ValueError):
+            dna_io.LittleEndianTypes.read_pointers_from(b"\0" * 6, 2)
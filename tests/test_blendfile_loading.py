@@ -1,9 +1,17 @@
+import concurrent.futures
+import gzip
 import os
 import pathlib
 import tempfile
+from unittest import mock
 
 from blender_asset_tracer import blendfile
-from blender_asset_tracer.blendfile import iterators, exceptions, magic_compression
+from blender_asset_tracer.blendfile import (
+    iterators,
+    exceptions,
+    magic_compression,
+    block_index,
+)
 from tests.abstract_test import AbstractBlendFileTest
 
 
@@ -153,6 +161,230 @@ class BlendFileBlockTest(AbstractBlendFileTest):
         assert isinstance(ob, blendfile.BlendFileBlock)
         self.assertEqual("OBümlaut", ob.id_name.decode())
 
+    def test_get_many(self):
+        ob = self.bf.code_index[b"OB"][0]
+        paths = [b"loc", (b"id", b"name"), (b"loc", 2), b"data", b"nonexistant"]
+        expect = [ob.get(path, default=None) for path in paths]
+        self.assertEqual(expect, ob.get_many(paths, default=None))
+
+        with self.assertRaises(KeyError):
+            ob.get_many([b"loc", b"nonexistant"])
+
+    def test_get_many_not_mmapped(self):
+        blendfile.BlendFile.use_mmap = False
+        try:
+            unmapped = blendfile.BlendFile(self.blendfiles / "basic_file.blend")
+        finally:
+            blendfile.BlendFile.use_mmap = True
+        self.addCleanup(unmapped.close)
+
+        ob = unmapped.code_index[b"OB"][0]
+        with mock.patch.object(unmapped, "read_at", wraps=unmapped.read_at) as read_at:
+            name, loc, data = ob.get_many([(b"id", b"name"), b"loc", b"data"])
+        self.assertEqual(1, read_at.call_count)
+        self.assertEqual(b"OB\xc3\xbcmlaut", name)
+        self.assertEqual([2.0, 3.0, 5.0], loc)
+        self.assertEqual(ob[b"data"], data)
+
+    def test_get_many_return_field_and_dereference(self):
+        ob = self.bf.code_index[b"OB"][0]
+        (loc, loc_field), (mesh, data_field) = ob.get_many(
+            [b"loc", b"data"], return_field=True, dereference=True
+        )
+        self.assertEqual([2.0, 3.0, 5.0], loc)
+        self.assertEqual(b"loc", loc_field.name.name_only)
+        self.assertEqual(b"data", data_field.name.name_only)
+        self.assertEqual(b"ME", mesh.code)
+        self.assertIs(mesh, ob.get_pointer(b"data"))
+
+
+class MemoryMappedTest(AbstractBlendFileTest):
+    def test_read_only_is_mmapped(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "basic_file.blend")
+        self.assertTrue(self.bf.is_mmapped)
+
+    def test_compressed_is_mmapped(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "basic_file_compressed.blend")
+        self.assertTrue(self.bf.is_mmapped)
+
+        ob = self.bf.code_index[b"OB"][0]
+        self.assertEqual("OBümlaut", ob.get((b"id", b"name"), as_str=True))
+
+    def test_writable_is_not_mmapped(self):
+        with tempfile.TemporaryDirectory() as tdir:
+            copy = pathlib.Path(tdir) / "copy.blend"
+            copy.write_bytes((self.blendfiles / "basic_file.blend").read_bytes())
+            with blendfile.BlendFile(copy, mode="rb+") as bf:
+                self.assertFalse(bf.is_mmapped)
+
+    def test_same_as_seek_and_read(self):
+        mapped = blendfile.BlendFile(self.blendfiles / "multiple_materials.blend")
+        self.bf = mapped
+        self.assertTrue(mapped.is_mmapped)
+
+        blendfile.BlendFile.use_mmap = False
+        try:
+            unmapped = blendfile.BlendFile(self.blendfiles / "multiple_materials.blend")
+        finally:
+            blendfile.BlendFile.use_mmap = True
+        self.addCleanup(unmapped.close)
+        self.assertFalse(unmapped.is_mmapped)
+
+        for mapped_block, unmapped_block in zip(mapped.blocks, unmapped.blocks):
+            self.assertEqual(unmapped_block.raw_data(), mapped_block.raw_data())
+            if mapped_block.code == b"DATA":
+                continue
+            self.assertEqual(list(unmapped_block.items()), list(mapped_block.items()))
+
+        mapped_mesh = mapped.code_index[b"ME"][0]
+        unmapped_mesh = unmapped.code_index[b"ME"][0]
+        self.assertEqual(
+            [ma.addr_old for ma in unmapped_mesh.iter_array_of_pointers(b"mat", 4)],
+            [ma.addr_old for ma in mapped_mesh.iter_array_of_pointers(b"mat", 4)],
+        )
+
+    def test_close_unmaps(self):
+        bf = blendfile.BlendFile(self.blendfiles / "basic_file.blend")
+        bf.close()
+        self.assertFalse(bf.is_mmapped)
+        self.assertTrue(bf.fileobj.closed)
+
+
+class BlockHeaderScannerTest(AbstractBlendFileTest):
+    def _headers(self, path: pathlib.Path, use_mmap: bool):
+        blendfile.BlendFile.use_mmap = use_mmap
+        try:
+            with blendfile.BlendFile(path) as bf:
+                self.assertEqual(use_mmap, bf.is_mmapped)
+                return list(bf.iter_block_headers())
+        finally:
+            blendfile.BlendFile.use_mmap = True
+
+    def test_buffered_same_as_mapped(self):
+        path = self.blendfiles / "doubly_linked.blend"
+        mapped = self._headers(path, use_mmap=True)
+        buffered = self._headers(path, use_mmap=False)
+        self.assertEqual(mapped, buffered)
+
+    def test_headers_match_blocks(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "basic_file.blend")
+        headers = list(self.bf.iter_block_headers())
+        self.assertEqual(len(self.bf.blocks), len(headers))
+
+        for block, header in zip(self.bf.blocks, headers):
+            expect = (
+                block.code,
+                block.size,
+                block.addr_old,
+                block.sdna_index,
+                block.count,
+                block.file_offset,
+            )
+            self.assertEqual(expect, header)
+
+    def test_truncated(self):
+        data = (self.blendfiles / "basic_file.blend").read_bytes()
+        with tempfile.TemporaryDirectory() as tdir:
+            # Replace the ENDB block header with a partial block header.
+            header_size = 24  # This is a 64-bit blend file.
+            truncated = pathlib.Path(tdir) / "truncated.blend"
+            truncated.write_bytes(data[:-header_size] + b"DATA\0")
+
+            for use_mmap in (True, False):
+                with self.assertLogs("blender_asset_tracer.blendfile", "WARNING"):
+                    headers = self._headers(truncated, use_mmap)
+                self.assertTrue(headers)
+
+
+class BlockTableTest(AbstractBlendFileTest):
+    def setUp(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "with_sequencer.blend")
+
+    def test_blocks_created_on_access(self):
+        self.assertEqual(0, len(self.bf._materialised))
+
+        scene = self.bf.code_index[b"SC"][0]
+        self.assertEqual(b"SCScene", scene.id_name)
+        self.assertEqual(1, len(self.bf._materialised))
+
+    def test_same_block_while_referenced(self):
+        scene = self.bf.code_index[b"SC"][0]
+        self.assertIs(scene, self.bf.code_index[b"SC"][0])
+        self.assertIs(scene, self.bf.block_from_addr[scene.addr_old])
+        self.assertIn(scene, list(self.bf.blocks))
+
+    def test_sequence_interface(self):
+        blocks = self.bf.blocks
+        self.assertEqual(blocks[len(blocks) - 1], blocks[-1])
+        self.assertEqual([blocks[1], blocks[2]], blocks[1:3])
+        with self.assertRaises(IndexError):
+            blocks[len(blocks)]
+
+        self.assertEqual(0, len(self.bf.code_index[b"XXXX"]))
+        self.assertNotIn(b"XXXX", self.bf.code_index)
+        self.assertIn(b"SC", self.bf.code_index)
+
+    def test_refined_type_is_kept(self):
+        scene = self.bf.code_index[b"SC"][0]
+        ed = scene.get_pointer(b"ed")
+        seq = ed.get_pointer((b"seqbase", b"first"))
+        seq_addr = seq.addr_old
+        sdna_idx_sequence = self.bf.sdna_index_from_id[b"Sequence"]
+        seq.refine_type_from_index(sdna_idx_sequence)
+        del seq
+
+        # This is a new object for the same block.
+        seq = self.bf.block_from_addr[seq_addr]
+        self.assertEqual(sdna_idx_sequence, seq.sdna_index)
+        self.assertEqual(b"SQBlack", seq[b"name"])
+
+    def test_address_index(self):
+        for block in self.bf.blocks:
+            found = self.bf.block_from_addr[block.addr_old]
+            self.assertEqual(block.addr_old, found.addr_old)
+        self.assertNotIn(1, self.bf.block_from_addr)
+        with self.assertRaises(KeyError):
+            self.bf.block_from_addr[1]
+
+        scene = self.bf.code_index[b"SC"][0]
+        del self.bf.block_from_addr[scene.addr_old]
+        self.assertNotIn(scene.addr_old, self.bf.block_from_addr)
+        with self.assertRaises(KeyError):
+            del self.bf.block_from_addr[scene.addr_old]
+
+        self.bf.block_from_addr[scene.addr_old] = scene
+        self.assertIs(scene, self.bf.block_from_addr[scene.addr_old])
+
+    def test_id_name_index(self):
+        self.assertIsNone(self.bf._id_name_index)
+        for code in self.bf.code_index:
+            if code == b"DATA":
+                continue
+            for block in self.bf.code_index[code]:
+                if block.id_name is None:
+                    continue
+                found = self.bf.find_blocks_from_id_name(code, block.id_name)
+                self.assertEqual([block], list(found))
+        self.assertIsNotNone(self.bf._id_name_index)
+
+        self.assertEqual(0, len(self.bf.find_blocks_from_id_name(b"SC", b"SCNope")))
+        self.assertEqual(0, len(self.bf.find_blocks_from_id_name(b"OB", b"SCScene")))
+
+    def test_duplicate_addresses(self):
+        table = blendfile.block_table.BlockTable()
+        table.extend(
+            [
+                (b"DATA", 8, 1234, 0, 1, 100),
+                (b"DATA", 8, 5678, 0, 1, 200),
+                (b"DATA", 8, 1234, 0, 1, 300),
+            ]
+        )
+        # The last block in disk order wins, like with a dict.
+        self.assertEqual(2, table.find_address(1234))
+        self.assertEqual(1, table.find_address(5678))
+        self.assertIsNone(table.find_address(42))
+        self.assertEqual([1234, 5678], list(table.iter_addresses()))
+
 
 class PointerTest(AbstractBlendFileTest):
     def setUp(self):
@@ -189,6 +421,38 @@ class PointerTest(AbstractBlendFileTest):
         seq_next = seq.get_pointer(b"next")
         self.assertIsNone(seq_next)
 
+    def test_listbase_cycle(self):
+        scene = self.bf.code_index[b"SC"][0]
+        ed = scene.get_pointer(b"ed")
+        first = ed.get_pointer((b"seqbase", b"first"))
+        seqs = list(iterators.listbase(first))
+        self.assertEqual(3, len(seqs))
+
+        # Make the last strip link back to the second one.
+        offset, _ = seqs[-1].abs_offset(b"next")
+        data = bytearray((self.blendfiles / "with_sequencer.blend").read_bytes())
+        endian = self.bf.header.endian
+        if self.bf.header.pointer_size == 8:
+            endian.ULONG.pack_into(data, offset, seqs[1].addr_old)
+        else:
+            endian.UINT.pack_into(data, offset, seqs[1].addr_old)
+
+        with tempfile.TemporaryDirectory() as tdir:
+            corrupt = pathlib.Path(tdir) / "corrupt.blend"
+            corrupt.write_bytes(data)
+            with blendfile.BlendFile(corrupt) as bf:
+                first = bf.block_from_addr[first.addr_old]
+                with self.assertLogs(iterators.log, "WARNING"):
+                    looped = list(iterators.listbase(first))
+        self.assertEqual(
+            [seq.addr_old for seq in seqs], [seq.addr_old for seq in looped]
+        )
+
+    def test_listbase_missing_field(self):
+        scene = self.bf.code_index[b"SC"][0]
+        with self.assertRaises(KeyError):
+            list(iterators.listbase(scene, next_path=b"nonexistant"))
+
     def test_refine_sdna_by_name(self):
         scene = self.bf.code_index[b"SC"][0]
         ed = scene.get_pointer(b"ed")
@@ -278,6 +542,15 @@ class ArrayTest(AbstractBlendFileTest):
             self.assertEqual(b"TE", tex.code)
             self.assertEqual(name, tex.id_name)
 
+    def test_read_pointers_at(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "multiple_materials.blend")
+        mesh = self.bf.code_index[b"ME"][0]
+        array = mesh.get_pointer(b"mat")
+        ps = self.bf.header.pointer_size
+
+        expect = [self.bf.read_pointer_at(array.file_offset + ps * i) for i in range(4)]
+        self.assertEqual(expect, list(self.bf.read_pointers_at(array.file_offset, 4)))
+
 
 class CompressionRecognitionTest(AbstractBlendFileTest):
     def _find_compression_type(self, filename: str) -> magic_compression.Compression:
@@ -331,6 +604,66 @@ class LoadGZipCompressedTest(AbstractBlendFileTest):
         self.assertFalse(raw_filepath.exists())
 
 
+class DecompressionPolicyTest(AbstractBlendFileTest):
+    def setUp(self):
+        super().setUp()
+        self.tdir = tempfile.TemporaryDirectory()
+        self.spill_dir = pathlib.Path(self.tdir.name)
+
+    def tearDown(self):
+        super().tearDown()
+        magic_compression.set_decompression_policy()
+        self.tdir.cleanup()
+
+    def _check_loaded(self, bf: blendfile.BlendFile) -> None:
+        ob = bf.code_index[b"OB"][0]
+        self.assertEqual("OBümlaut", ob.get((b"id", b"name"), as_str=True))
+        self.assertEqual([2.0, 3.0, 5.0], ob.get(b"loc"))
+
+    def test_in_memory(self):
+        magic_compression.set_decompression_policy(spill_dir=self.spill_dir)
+        with blendfile.BlendFile(self.blendfiles / "basic_file_compressed.blend") as bf:
+            self.assertTrue(bf.is_compressed)
+            self.assertFalse(bf.raw_filepath.exists())
+            self.assertEqual([], list(self.spill_dir.iterdir()))
+            self.assertEqual(str(bf.raw_filepath), bf.fileobj.name)
+            if hasattr(os, "memfd_create"):
+                self.assertTrue(bf.is_mmapped)
+            self._check_loaded(bf)
+        self.assertTrue(bf.fileobj.closed)
+
+    def test_spill_dir(self):
+        magic_compression.set_decompression_policy(0, self.spill_dir)
+        with blendfile.BlendFile(self.blendfiles / "basic_file_compressed.blend") as bf:
+            self.assertEqual(self.spill_dir, bf.raw_filepath.parent)
+            self.assertTrue(bf.raw_filepath.exists())
+            self._check_loaded(bf)
+        self.assertEqual([], list(self.spill_dir.iterdir()))
+
+    def test_spill_when_too_large(self):
+        magic_compression.set_decompression_policy(4096, self.spill_dir)
+        with blendfile.BlendFile(self.blendfiles / "basic_file_compressed.blend") as bf:
+            self.assertEqual(self.spill_dir, bf.raw_filepath.parent)
+            self._check_loaded(bf)
+
+            # The spilled file should contain all data, including what was
+            # decompressed into memory before spilling.
+            compressed = bf.filepath.read_bytes()
+            self.assertEqual(gzip.decompress(compressed), bf.raw_filepath.read_bytes())
+        self.assertEqual([], list(self.spill_dir.iterdir()))
+
+    def test_modify_in_memory(self):
+        copy = self.spill_dir / "copy.blend"
+        copy.write_bytes((self.blendfiles / "basic_file_compressed.blend").read_bytes())
+
+        with blendfile.BlendFile(copy, "rb+") as bf:
+            bf.code_index[b"OB"][0].set(b"loc", 7.0)
+
+        with blendfile.BlendFile(copy) as bf:
+            self.assertTrue(bf.is_compressed)
+            self.assertEqual([7.0, 3.0, 5.0], bf.code_index[b"OB"][0].get(b"loc"))
+
+
 class LoadZStdCompressedTest(AbstractBlendFileTest):
     def setUp(self):
         super().setUp()
@@ -360,6 +693,128 @@ class LoadZStdCompressedTest(AbstractBlendFileTest):
         self.assertFalse(raw_filepath.exists())
 
 
+class SeekableZstdTest(AbstractBlendFileTest):
+    def setUp(self):
+        super().setUp()
+
+        try:
+            import zstandard
+        except ImportError:
+            self.skipTest("zstandard module not installed")
+        self.zstandard = zstandard
+
+        self.path = self.blendfiles / "basic_file_compressed_zstd.blend"
+        self.tdir = tempfile.TemporaryDirectory()
+        self.tpath = pathlib.Path(self.tdir.name)
+        magic_compression.set_decompression_policy(random_access=True)
+
+    def tearDown(self):
+        super().tearDown()
+        magic_compression.set_decompression_policy()
+        self.tdir.cleanup()
+
+    def _decompressed(self) -> bytes:
+        dctx = self.zstandard.ZstdDecompressor()
+        with self.path.open("rb") as infile:
+            return dctx.stream_reader(infile).read()
+
+    def test_seek_table(self):
+        with self.path.open("rb") as infile:
+            frame_sizes = magic_compression.read_zstd_seek_table(infile)
+        self.assertEqual(13, len(frame_sizes))
+        self.assertEqual((6943, 35060), frame_sizes[0])
+        self.assertEqual(
+            len(self._decompressed()), sum(size for _, size in frame_sizes)
+        )
+
+    def test_reader(self):
+        expect = self._decompressed()
+        with self.path.open("rb") as infile:
+            frame_sizes = magic_compression.read_zstd_seek_table(infile)
+        reader = magic_compression.SeekableZstdFile(
+            self.path.open("rb"), frame_sizes, "reader", cache_size=2
+        )
+        with reader:
+            self.assertEqual(len(expect), reader.size)
+
+            # Spanning the boundary between the 2nd and 3rd frame.
+            self.assertEqual(expect[36000:44000], reader.pread(36000, 8000))
+            self.assertEqual(2, reader.frames_decompressed)
+            self.assertEqual(expect[40000:41000], reader.pread(40000, 1000))
+            self.assertEqual(2, reader.frames_decompressed)
+
+            # This should evict the 2nd frame from the cache.
+            self.assertEqual(expect[:10], reader.pread(0, 10))
+            self.assertEqual(3, reader.frames_decompressed)
+            reader.pread(36000, 10)
+            self.assertEqual(4, reader.frames_decompressed)
+
+            reader.seek(-100, os.SEEK_END)
+            self.assertEqual(expect[-100:], reader.read(1000))
+            self.assertEqual(b"", reader.read(1000))
+            reader.seek(0)
+            self.assertEqual(expect, reader.read())
+        self.assertTrue(reader.closed)
+
+    def test_random_access(self):
+        self.bf = blendfile.BlendFile(self.path)
+        self.assertIsInstance(self.bf.fileobj, magic_compression.SeekableZstdFile)
+        self.assertTrue(self.bf.is_compressed)
+        self.assertEqual(0, self.bf.temp_file_size)
+
+        magic_compression.set_decompression_policy(random_access=False)
+        with blendfile.BlendFile(self.path) as full:
+            self.assertNotIsInstance(full.fileobj, magic_compression.SeekableZstdFile)
+            self.assertEqual(
+                [block.raw_data() for block in full.blocks],
+                [block.raw_data() for block in self.bf.blocks],
+            )
+
+    def test_not_by_default(self):
+        magic_compression.set_decompression_policy()
+        self.bf = blendfile.BlendFile(self.path)
+        self.assertNotIsInstance(self.bf.fileobj, magic_compression.SeekableZstdFile)
+
+    def test_read_without_file_position(self):
+        self.bf = blendfile.BlendFile(self.path)
+        # Reads should use the thread-safe pread(), not seek() and read().
+        with mock.patch.object(
+            magic_compression.SeekableZstdFile, "seek", side_effect=AssertionError
+        ):
+            ob = self.bf.code_index[b"OB"][0]
+            self.assertEqual("OBümlaut", ob.get((b"id", b"name"), as_str=True))
+
+    def test_only_needed_frames(self):
+        block_index.set_disk_cache(self.tpath)
+        self.addCleanup(block_index.set_disk_cache, None)
+        blendfile.BlendFile(self.path).close()
+
+        # With the block index, only the frames with the requested data
+        # should be decompressed.
+        self.bf = blendfile.BlendFile(self.path)
+        ob = self.bf.code_index[b"OB"][0]
+        self.assertEqual("OBümlaut", ob.get((b"id", b"name"), as_str=True))
+        self.assertLess(self.bf.fileobj.frames_decompressed, 5)
+
+    def test_no_seek_table(self):
+        # Compress as a single frame, without seek table.
+        path = self.tpath / "single_frame.blend"
+        path.write_bytes(self.zstandard.ZstdCompressor().compress(self._decompressed()))
+        with path.open("rb") as infile:
+            self.assertIsNone(magic_compression.read_zstd_seek_table(infile))
+
+        self.bf = blendfile.BlendFile(path)
+        self.assertNotIsInstance(self.bf.fileobj, magic_compression.SeekableZstdFile)
+        ob = self.bf.code_index[b"OB"][0]
+        self.assertEqual("OBümlaut", ob.get((b"id", b"name"), as_str=True))
+
+    def test_not_for_writing(self):
+        path = self.tpath / "copy.blend"
+        path.write_bytes(self.path.read_bytes())
+        self.bf = blendfile.BlendFile(path, "rb+")
+        self.assertNotIsInstance(self.bf.fileobj, magic_compression.SeekableZstdFile)
+
+
 class LoadNonBlendfileTest(AbstractBlendFileTest):
     def test_loading(self):
         with self.assertRaises(exceptions.BlendFileError):
@@ -459,3 +914,118 @@ class BlendFileCacheTest(AbstractBlendFileTest):
         self.assertIs(bf, blendfile._cached_bfiles[other])
 
         self.assertEqual(str(bf.raw_filepath), bf.fileobj.name)
+
+
+class BoundedBlendFileCacheTest(AbstractBlendFileTest):
+    def setUp(self):
+        super().setUp()
+        self.tdir = tempfile.TemporaryDirectory()
+        self.tpath = pathlib.Path(self.tdir.name)
+
+    def tearDown(self):
+        super().tearDown()
+        blendfile.set_cache_limits()
+        self.tdir.cleanup()
+
+    def test_evict_least_recently_used(self):
+        blendfile.set_cache_limits(max_open_files=2)
+        path1 = self.blendfiles / "basic_file.blend"
+        path2 = self.blendfiles / "doubly_linked.blend"
+        path3 = self.blendfiles / "linked_cube.blend"
+
+        bf1 = blendfile.open_cached(path1)
+        bf2 = blendfile.open_cached(path2)
+        self.assertIs(bf1, blendfile.open_cached(path1))  # bf2 is now the LRU.
+        bf3 = blendfile.open_cached(path3)
+
+        self.assertTrue(bf1.has_open_handles)
+        self.assertFalse(bf2.has_open_handles)
+        self.assertTrue(bf3.has_open_handles)
+
+        # The evicted file should still be cached, and be usable.
+        self.assertIs(bf2, blendfile._cached_bfiles[path2])
+        self.assertIs(bf2, blendfile.open_cached(path2))
+        ob = bf2.code_index[b"OB"][0]
+        self.assertEqual(b"OBCubes", ob.id_name)
+        self.assertEqual(b"OBCubes", ob.get((b"id", b"name")))
+
+        # Reopening should have evicted the least recently used file.
+        self.assertTrue(bf2.has_open_handles)
+        self.assertFalse(bf1.has_open_handles)
+
+    def test_evict_temp_bytes(self):
+        magic_compression.set_decompression_policy(memory_limit=0)
+        self.addCleanup(magic_compression.set_decompression_policy)
+
+        path1 = self.blendfiles / "basic_file_compressed.blend"
+        path2 = self.blendfiles / "linked_cube_compressed.blend"
+
+        bf1 = blendfile.open_cached(path1)
+        temp_path1 = bf1.raw_filepath
+        self.assertTrue(temp_path1.exists())
+        blendfile.set_cache_limits(max_temp_bytes=bf1.temp_file_size)
+
+        bf2 = blendfile.open_cached(path2)
+        self.assertFalse(bf1.has_open_handles)
+        self.assertFalse(temp_path1.exists())
+        self.assertTrue(bf2.has_open_handles)
+
+        # Reading from the evicted file should decompress it again.
+        ob = bf1.code_index[b"OB"][0]
+        self.assertEqual("OBümlaut", ob.get((b"id", b"name"), as_str=True))
+        self.assertTrue(bf1.raw_filepath.exists())
+        self.assertFalse(bf2.has_open_handles)
+
+    def test_modified_files_stay_open(self):
+        blendfile.set_cache_limits(max_open_files=1)
+        copy = self.tpath / "copy.blend"
+        copy.write_bytes((self.blendfiles / "basic_file.blend").read_bytes())
+
+        bf = blendfile.open_cached(copy, mode="rb+")
+        bf.code_index[b"OB"][0].set(b"loc", 5.0)
+        blendfile.open_cached(self.blendfiles / "linked_cube.blend")
+
+        self.assertTrue(bf.has_open_handles)
+        self.assertEqual([5.0, 3.0, 5.0], bf.code_index[b"OB"][0][b"loc"])
+
+    def test_changed_on_disk(self):
+        copy = self.tpath / "copy.blend"
+        copy.write_bytes((self.blendfiles / "basic_file.blend").read_bytes())
+
+        bf = blendfile.open_cached(copy)
+        ob = bf.code_index[b"OB"][0]
+        self.assertTrue(bf.close_handles())
+
+        with copy.open("ab") as outfile:
+            outfile.write(b"something else")
+        with self.assertRaises(exceptions.BlendFileError):
+            ob.get(b"loc")
+
+    def test_close_evicted(self):
+        path = self.blendfiles / "basic_file.blend"
+        bf = blendfile.open_cached(path)
+        self.assertTrue(bf.close_handles())
+        self.assertFalse(bf.close_handles())
+
+        bf.close()
+        self.assertNotIn(path, blendfile._cached_bfiles)
+
+    def test_open_missing_file(self):
+        path = self.blendfiles / "nonexistant.blend"
+        for _ in range(2):
+            with self.assertRaises(FileNotFoundError):
+                blendfile.open_cached(path)
+
+        self.assertNotIn(path, blendfile._cached_bfiles)
+        self.assertEqual({}, blendfile._cached_bfiles._path_locks)
+
+    def test_open_from_threads(self):
+        path = self.blendfiles / "doubly_linked.blend"
+        with concurrent.futures.ThreadPoolExecutor(8) as executor:
+            futures = [
+                executor.submit(blendfile.open_cached, path) for _ in range(16)
+            ]
+            bfiles = [future.result() for future in futures]
+
+        for bfile in bfiles:
+            self.assertIs(bfiles[0], bfile)
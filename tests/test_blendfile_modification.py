@@ -1,8 +1,14 @@
 from shutil import copyfile
+from unittest import mock
 
+import io
 import os
+import pathlib
+import tempfile
+import unittest
 
 from blender_asset_tracer import blendfile
+from blender_asset_tracer.blendfile import magic_compression, overlay
 from tests.abstract_test import AbstractBlendFileTest
 
 
@@ -90,3 +96,233 @@ class ModifyCompressedTest(AbstractBlendFileTest):
         library = self.bf.code_index[b"LI"][0]
         self.assertEqual(b"//basic_file.blend", library[b"filepath"])
         self.assertEqual(b"//basic_file.blend", library[b"name"])
+
+    def test_keeps_compression(self):
+        self.bf.code_index[b"LI"][0][b"name"] = b"//basic_file.blend"
+        self.bf.close()
+
+        with self.to_modify.open("rb") as infile:
+            compression = magic_compression.find_compression_type(infile)
+        self.assertEqual(magic_compression.Compression.GZIP, compression)
+
+
+class ModifyZstdCompressedTest(AbstractBlendFileTest):
+    def setUp(self):
+        try:
+            import zstandard
+        except ImportError:
+            self.skipTest("zstandard module not installed")
+
+        self.orig = self.blendfiles / "basic_file_compressed_zstd.blend"
+        self.tdir = tempfile.TemporaryDirectory()
+        self.to_modify = pathlib.Path(self.tdir.name) / "modified.blend"
+        copyfile(str(self.orig), str(self.to_modify))
+
+        self.bf = blendfile.BlendFile(self.to_modify, mode="r+b")
+        self.assertEqual(magic_compression.Compression.ZSTD, self.bf.compression)
+
+    def tearDown(self):
+        super().tearDown()
+        magic_compression.set_compression_policy()
+        magic_compression.set_decompression_policy()
+        self.tdir.cleanup()
+
+    def _modify_and_reload(self) -> None:
+        ob = self.bf.code_index[b"OB"][0]
+        ob[b"loc"] = 7.0
+        self.bf.close()
+
+        magic_compression.set_decompression_policy(random_access=True)
+        self.bf = blendfile.BlendFile(self.to_modify)
+        # The file should be written in the seekable format again.
+        self.assertIsInstance(self.bf.fileobj, magic_compression.SeekableZstdFile)
+        ob = self.bf.code_index[b"OB"][0]
+        self.assertEqual([7.0, 3.0, 5.0], ob[b"loc"])
+        self.assertEqual("OBümlaut", ob.get((b"id", b"name"), as_str=True))
+
+    def test_keeps_compression(self):
+        self._modify_and_reload()
+
+    def test_multiple_frames(self):
+        magic_compression.set_compression_policy(zstd_level=1, zstd_threads=4)
+        with mock.patch.object(magic_compression, "ZSTD_FRAME_SIZE", 4096):
+            self._modify_and_reload()
+
+        with self.to_modify.open("rb") as infile:
+            frame_sizes = magic_compression.read_zstd_seek_table(infile)
+        self.assertGreater(len(frame_sizes), 100)
+        self.assertEqual({4096}, {size for _, size in frame_sizes[:-1]})
+
+
+class ModifyInMemoryTest(AbstractBlendFileTest):
+    def setUp(self):
+        self.tdir = tempfile.TemporaryDirectory()
+        self.tpath = pathlib.Path(self.tdir.name)
+
+    def tearDown(self):
+        super().tearDown()
+        self.tdir.cleanup()
+
+    def _open_copy(self, filename: str) -> blendfile.BlendFile:
+        path = self.tpath / filename
+        copyfile(str(self.blendfiles / filename), str(path))
+        return blendfile.BlendFile(path)
+
+    def test_set_keeps_file_unchanged(self):
+        self.bf = self._open_copy("linked_cube.blend")
+        orig_contents = self.bf.filepath.read_bytes()
+
+        library = self.bf.code_index[b"LI"][0]
+        with self.bf.patch_mode():
+            library[b"filepath"] = b"//basic_file.blend"
+            library[b"name"] = b"//basic_file.blend"
+
+        self.assertTrue(self.bf.is_modified)
+        self.assertEqual(b"//basic_file.blend", library[b"filepath"])
+        self.assertEqual(b"//basic_file.blend", library[b"name"])
+        self.assertEqual(orig_contents, self.bf.filepath.read_bytes())
+
+    def test_write_to(self):
+        self.bf = self._open_copy("linked_cube.blend")
+        with self.bf.patch_mode():
+            self.bf.code_index[b"LI"][0][b"name"] = b"//basic_file.blend"
+        written = self.tpath / "written.blend"
+        with written.open("wb") as outfile:
+            self.bf.write_to(outfile)
+
+        # The result should be the same as when modifying the file directly.
+        expected = self.tpath / "expected.blend"
+        copyfile(str(self.bf.filepath), str(expected))
+        with blendfile.BlendFile(expected, "rb+") as bf:
+            bf.code_index[b"LI"][0][b"name"] = b"//basic_file.blend"
+        self.assertEqual(expected.read_bytes(), written.read_bytes())
+
+    def test_write_to_position(self):
+        self.bf = self._open_copy("linked_cube.blend")
+        with self.bf.patch_mode():
+            self.bf.code_index[b"LI"][0][b"name"] = b"//basic_file.blend"
+        expected = io.BytesIO()
+        self.bf.write_to(expected)
+        size = len(expected.getvalue())
+
+        for use_sendfile in (True, False):
+            written = self.tpath / "written.blend"
+            written.write_bytes(b"x" * (size + 200))
+            with mock.patch.object(
+                blendfile, "_USE_SENDFILE", use_sendfile
+            ), written.open("rb+") as outfile:
+                outfile.read(10)
+                outfile.write(b"prefix")
+                self.bf.write_to(outfile)
+                self.assertEqual(16 + size, outfile.tell())
+                outfile.write(b"suffix")
+
+            contents = written.read_bytes()
+            self.assertEqual(size + 200, len(contents))
+            self.assertEqual(b"x" * 10 + b"prefix", contents[:16])
+            self.assertEqual(expected.getvalue(), contents[16 : 16 + size])
+            self.assertEqual(b"suffix", contents[16 + size : 22 + size])
+
+    def test_write_to_compressed(self):
+        self.bf = self._open_copy("basic_file_compressed.blend")
+        with self.bf.patch_mode():
+            self.bf.code_index[b"OB"][0][b"loc"] = 7.0
+        written = self.tpath / "written.blend"
+        with written.open("wb") as outfile:
+            self.bf.write_to(outfile, self.bf.compression)
+
+        with blendfile.BlendFile(written) as bf:
+            self.assertEqual(magic_compression.Compression.GZIP, bf.compression)
+            self.assertEqual([7.0, 3.0, 5.0], bf.code_index[b"OB"][0][b"loc"])
+
+    def test_close_discards_changes(self):
+        self.bf = self._open_copy("basic_file_compressed.blend")
+        orig_contents = self.bf.filepath.read_bytes()
+        with self.bf.patch_mode():
+            self.bf.code_index[b"OB"][0][b"loc"] = 7.0
+        self.bf.close()
+
+        self.assertEqual(orig_contents, self.bf.filepath.read_bytes())
+        self.bf = blendfile.BlendFile(self.bf.filepath)
+        self.assertEqual([2.0, 3.0, 5.0], self.bf.code_index[b"OB"][0][b"loc"])
+
+    def test_not_mmapped(self):
+        blendfile.BlendFile.use_mmap = False
+        try:
+            self.bf = self._open_copy("basic_file.blend")
+        finally:
+            blendfile.BlendFile.use_mmap = True
+        ob = self.bf.code_index[b"OB"][0]
+        with self.bf.patch_mode():
+            ob[b"loc"] = 7.0
+        self.assertEqual([7.0, 3.0, 5.0], ob[b"loc"])
+
+    def test_set_requires_patch_mode(self):
+        self.bf = self._open_copy("basic_file.blend")
+        ob = self.bf.code_index[b"OB"][0]
+        with self.assertRaises(io.UnsupportedOperation):
+            ob[b"loc"] = 7.0
+        self.assertFalse(self.bf.is_modified)
+
+        with self.bf.patch_mode():
+            ob[b"loc"] = 7.0
+        with self.assertRaises(io.UnsupportedOperation):
+            ob[b"loc"] = 8.0
+        self.assertEqual([7.0, 3.0, 5.0], ob[b"loc"])
+
+    def test_id_name_change_drops_index(self):
+        self.bf = self._open_copy("basic_file.blend")
+        ob = self.bf.code_index[b"OB"][0]
+        self.assertTrue(ob._touches_id_name(ob.dna_type, b"id"))
+        self.assertFalse(ob._touches_id_name(ob.dna_type, b"loc"))
+
+        found = self.bf.find_blocks_from_id_name(b"OB", ob.id_name)
+        self.assertEqual([ob], list(found))
+        with self.bf.patch_mode():
+            ob[b"loc"] = 7.0
+        self.assertIsNotNone(self.bf._id_name_index)
+
+        # Setting b"id" itself is not supported, so pretend that b"loc" is
+        # part of the ID name.
+        with self.bf.patch_mode(), mock.patch.object(
+            blendfile.BlendFileBlock, "_touches_id_name", return_value=True
+        ):
+            ob[b"loc"] = 8.0
+        self.assertIsNone(self.bf._id_name_index)
+
+
+class PatchOverlayTest(unittest.TestCase):
+    def test_apply(self):
+        patches = overlay.PatchOverlay()
+        patches.patch(2, b"AB")
+        patches.patch(7, b"CD")
+        self.assertEqual(2, len(patches))
+
+        self.assertEqual(b"01AB456CD", patches.apply(0, b"012345678"))
+        self.assertEqual(b"B456C", patches.apply(3, b"34567"))
+        self.assertEqual(b"456", patches.apply(4, b"456"))
+        self.assertEqual(b"D9", patches.apply(8, b"89"))
+
+    def test_merge(self):
+        patches = overlay.PatchOverlay()
+        patches.patch(2, b"AB")
+        patches.patch(6, b"CD")
+        patches.patch(3, b"xyz")
+        self.assertEqual(1, len(patches))
+        self.assertEqual(6, patches.size)
+        self.assertEqual(b"01AxyzCD89", patches.apply(0, b"0123456789"))
+
+        # Adjacent patches are merged too.
+        patches.patch(8, b"E")
+        self.assertEqual(1, len(patches))
+        self.assertEqual(b"01AxyzCDE9", patches.apply(0, b"0123456789"))
+
+    def test_file_interface(self):
+        patches = overlay.PatchOverlay()
+        patches.seek(4)
+        patches.seek(2, os.SEEK_CUR)
+        self.assertEqual(2, patches.write(b"AB"))
+        self.assertEqual(8, patches.tell())
+        with self.assertRaises(io.UnsupportedOperation):
+            patches.seek(0, os.SEEK_END)
+        self.assertEqual(b"012345AB89", patches.apply(0, b"0123456789"))
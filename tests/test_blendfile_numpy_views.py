@@ -0,0 +1,94 @@
+import unittest
+from unittest import mock
+
+from blender_asset_tracer import blendfile
+from blender_asset_tracer.blendfile import numpy_views
+from tests.abstract_test import AbstractBlendFileTest
+
+
+class DtypeSpecTest(AbstractBlendFileTest):
+    def setUp(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "basic_file.blend")
+
+    def _spec(self, dna_type_id: bytes) -> dict:
+        dna_struct = self.bf.structs[self.bf.sdna_index_from_id[dna_type_id]]
+        spec = numpy_views.dtype_spec(dna_struct, self.bf.header)
+        self.assertEqual(dna_struct.size, spec["itemsize"])
+        return spec
+
+    def _field(self, spec: dict, name: str):
+        index = spec["names"].index(name)
+        return spec["formats"][index], spec["offsets"][index]
+
+    def test_mvert(self):
+        spec = self._spec(b"MVert")
+        self.assertEqual((("<f4", (3,)), 0), self._field(spec, "co"))
+        self.assertEqual((("<i2", (3,)), 12), self._field(spec, "no"))
+        self.assertEqual(("<u1", 18), self._field(spec, "flag"))
+
+    def test_object(self):
+        spec = self._spec(b"Object")
+        ob_struct = self.bf.structs[self.bf.sdna_index_from_id[b"Object"]]
+        psize = self.bf.header.pointer_size
+
+        id_format, id_offset = self._field(spec, "id")
+        self.assertEqual(0, id_offset)
+        self.assertEqual(("S66", 32), self._field(id_format, "name"))
+
+        _, data_offset = ob_struct.field_from_path(psize, b"data")
+        self.assertEqual(("<u%d" % psize, data_offset), self._field(spec, "data"))
+
+        _, obmat_offset = ob_struct.field_from_path(psize, b"obmat")
+        self.assertEqual((("<f4", (4, 4)), obmat_offset), self._field(spec, "obmat"))
+
+    def test_without_numpy(self):
+        mesh = self.bf.code_index[b"ME"][0]
+        mverts = mesh.get_pointer(b"mvert")
+        with mock.patch.object(numpy_views, "has_numpy", False):
+            with self.assertRaises(EnvironmentError):
+                numpy_views.block_array(mverts)
+            with self.assertRaises(EnvironmentError):
+                numpy_views.struct_dtype(mverts.dna_type, self.bf.header)
+
+
+@unittest.skipUnless(numpy_views.has_numpy, "NumPy is not installed")
+class BlockArrayTest(AbstractBlendFileTest):
+    def _mverts(self) -> blendfile.BlendFileBlock:
+        mesh = self.bf.code_index[b"ME"][0]
+        return mesh.get_pointer(b"mvert")
+
+    def _check_mverts(self, mverts: blendfile.BlendFileBlock):
+        array = numpy_views.block_array(mverts)
+        self.assertEqual((8,), array.shape)
+        self.assertFalse(array.flags.writeable)
+        records = mverts.decode_all()
+        for item, values in zip(array, records):
+            self.assertEqual(values[b"co"], item["co"].tolist())
+            self.assertEqual(values[b"no"], item["no"].tolist())
+            self.assertEqual(values[b"flag"], item["flag"])
+
+    def test_memory_mapped(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "basic_file.blend")
+        self.assertTrue(self.bf.is_mmapped)
+        mverts = self._mverts()
+        self._check_mverts(mverts)
+
+        # The array should refer to the mapped file, and not be a copy.
+        array = numpy_views.block_array(mverts)
+        self.assertIs(self.bf._mmap, array.base.obj)
+        del array
+
+    def test_not_mapped(self):
+        blendfile.BlendFile.use_mmap = False
+        try:
+            self.bf = blendfile.BlendFile(self.blendfiles / "basic_file.blend")
+        finally:
+            blendfile.BlendFile.use_mmap = True
+        self._check_mverts(self._mverts())
+
+    def test_struct_dtype_cached(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "basic_file.blend")
+        mverts = self._mverts()
+        dtype = numpy_views.struct_dtype(mverts.dna_type, self.bf.header)
+        self.assertIs(dtype, numpy_views.struct_dtype(mverts.dna_type, self.bf.header))
+        self.assertEqual(mverts.dna_type.size, dtype.itemsize)
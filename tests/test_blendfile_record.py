@@ -0,0 +1,169 @@
+import unittest
+from unittest import mock
+
+from blender_asset_tracer import blendfile
+from blender_asset_tracer.blendfile import dna, dna_io, exceptions, record
+from tests.abstract_test import AbstractBlendFileTest
+
+
+class FakeHeader:
+    pointer_size = 8
+    endian = dna_io.LittleEndianTypes
+    endian_str = b"<"
+
+
+class CompileTest(unittest.TestCase):
+    def setUp(self):
+        s_char = dna.Struct(b"char", 1)
+        s_int = dna.Struct(b"int", 4)
+        s_float = dna.Struct(b"float", 4)
+        s_double = dna.Struct(b"double", 8)
+
+        self.inner = dna.Struct(b"Inner")
+        self.inner.append_field(dna.Field(self.inner, dna.Name(b"*next"), 8, 0))
+        self.inner.append_field(dna.Field(s_float, dna.Name(b"co[2]"), 8, 8))
+
+        self.outer = dna.Struct(b"Outer")
+        self.outer.append_field(dna.Field(s_char, dna.Name(b"name[8]"), 8, 0))
+        self.outer.append_field(dna.Field(s_int, dna.Name(b"number"), 4, 8))
+        self.outer.append_field(dna.Field(s_char, dna.Name(b"flag"), 1, 12))
+        self.outer.append_field(dna.Field(s_double, dna.Name(b"weight"), 8, 16))
+        self.outer.append_field(dna.Field(self.inner, dna.Name(b"items[2]"), 32, 24))
+        self.outer.append_field(dna.Field(self.inner, dna.Name(b"*mats[2]"), 16, 56))
+
+    def test_compile_leaves(self):
+        Leaf, Kind = record.Leaf, record.Kind
+        self.assertEqual(
+            [
+                Leaf(b"name", 0, Kind.CHARS, 8, b"char"),
+                Leaf(b"number", 8, Kind.NUMBER, 1, b"int"),
+                Leaf(b"flag", 12, Kind.NUMBER, 1, b"char"),
+                Leaf(b"weight", 16, Kind.UNSUPPORTED, 1, b"double"),
+                Leaf((b"items", 0, b"next"), 24, Kind.POINTER, 1, b"Inner"),
+                Leaf((b"items", 0, b"co"), 32, Kind.ARRAY, 2, b"float"),
+                Leaf((b"items", 1, b"next"), 40, Kind.POINTER, 1, b"Inner"),
+                Leaf((b"items", 1, b"co"), 48, Kind.ARRAY, 2, b"float"),
+                Leaf(b"mats", 56, Kind.POINTER, 2, b"Inner"),
+            ],
+            record.compile_leaves(self.outer, 8),
+        )
+
+    def test_decode(self):
+        data = (
+            b"Suz\0junk"
+            + dna_io.LittleEndianTypes.SINT.pack(-47)
+            + b"\x05\0\0\0"
+            + bytes(8)
+            + b"".join(
+                dna_io.LittleEndianTypes.ULONG.pack(ptr)
+                + dna_io.LittleEndianTypes.FLOAT.pack(1.5)
+                + dna_io.LittleEndianTypes.FLOAT.pack(-2.0)
+                for ptr in (1234, 0)
+            )
+            + dna_io.LittleEndianTypes.ULONG.pack(4321)
+            + dna_io.LittleEndianTypes.ULONG.pack(8765)
+        )
+        decoder = record.decoder(self.outer, FakeHeader)
+        self.assertIs(decoder, record.decoder(self.outer, FakeHeader))
+        self.assertEqual(len(data), decoder.size)
+
+        expect = {
+            b"name": b"Suz",
+            b"number": -47,
+            b"flag": 5,
+            b"weight": "<double>",
+            (b"items", 0, b"next"): 1234,
+            (b"items", 0, b"co"): [1.5, -2.0],
+            (b"items", 1, b"next"): 0,
+            (b"items", 1, b"co"): [1.5, -2.0],
+            b"mats": [4321, 8765],
+        }
+        self.assertEqual(expect, decoder.decode_dict(data))
+        self.assertEqual(expect, decoder.decode_dict(b"pad" + data, 3))
+
+        values = decoder.decode(data, as_str=True, null_terminated=False)
+        self.assertEqual("Suz\0junk", values[0])
+
+    def test_only_unsupported(self):
+        s_double = dna.Struct(b"double", 8)
+        only_double = dna.Struct(b"OnlyDouble")
+        only_double.append_field(dna.Field(s_double, dna.Name(b"weight"), 8, 0))
+        decoder = record.decoder(only_double, FakeHeader)
+        self.assertEqual(["<double>"], decoder.decode(b""))
+
+
+class DecodeBlockTest(AbstractBlendFileTest):
+    def setUp(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "basic_file.blend")
+
+    def test_same_as_get(self):
+        for code in (b"OB", b"ME", b"MA", b"SC"):
+            block = self.bf.code_index[code][0]
+            decoder = record.decoder(block.dna_type, self.bf.header)
+            values = block.decode()
+            self.assertEqual(list(decoder.paths), list(values))
+
+            for leaf in decoder.leaves:
+                value = values[leaf.path]
+                if leaf.kind == record.Kind.UNSUPPORTED:
+                    with self.assertRaises(exceptions.NoReaderImplemented):
+                        block.get(leaf.path)
+                elif leaf.kind == record.Kind.POINTER and leaf.count > 1:
+                    # get() only returns the first pointer of an array.
+                    self.assertEqual(block.get(leaf.path), value[0])
+                else:
+                    self.assertEqual(block.get(leaf.path), value, leaf.path)
+
+    def test_decode(self):
+        ob = self.bf.code_index[b"OB"][0]
+        values = ob.decode(as_str=True)
+        self.assertEqual("OBümlaut", values[b"id", b"name"])
+        self.assertEqual([2.0, 3.0, 5.0], values[b"loc"])
+        self.assertEqual(ob.get_pointer(b"data").addr_old, values[b"data"])
+
+        decoder = record.decoder(ob.dna_type, self.bf.header)
+        leaves = {leaf.path: leaf for leaf in decoder.leaves}
+        self.assertEqual(record.Kind.POINTER, leaves[b"data"].kind)
+        self.assertEqual(record.Kind.ARRAY, leaves[b"loc"].kind)
+
+    def test_decode_all(self):
+        mesh = self.bf.code_index[b"ME"][0]
+        mverts = mesh.get_pointer(b"mvert")
+        self.assertEqual(8, mverts.count)
+
+        records = mverts.decode_all()
+        self.assertEqual(8, len(records))
+        self.assertEqual(mverts.decode(), records[0])
+        self.assertEqual(mverts.get(b"co"), records[0][b"co"])
+        for values in records:
+            self.assertEqual(3, len(values[b"co"]))
+        self.assertEqual(2, len(mverts.decode_all(limit=2)))
+
+    def test_items_recursive(self):
+        ob = self.bf.code_index[b"OB"][0]
+        self.assertEqual(list(ob.decode().items()), list(ob.items_recursive()))
+
+    def test_items_recursive_short_block(self):
+        ob = self.bf.code_index[b"OB"][0]
+        expect = [
+            item for k in ob.keys() for item in ob.get_recursive_iter(k, as_str=False)
+        ]
+
+        # Truncated files can have blocks that are smaller than their struct.
+        def raw_data(block):
+            return block.bfile.read_at(block.file_offset, 64)
+
+        with mock.patch.object(blendfile.BlendFileBlock, "raw_data", raw_data):
+            with self.assertRaises(ValueError):
+                ob.decode()
+            self.assertEqual(expect, list(ob.items_recursive()))
+
+    @unittest.skipUnless(record.has_numpy, "NumPy is not installed")
+    def test_numpy(self):
+        import numpy
+
+        ob = self.bf.code_index[b"OB"][0]
+        values = ob.decode(numpy_min_items=3)
+        self.assertIsInstance(values[b"loc"], numpy.ndarray)
+        self.assertEqual([2.0, 3.0, 5.0], values[b"loc"].tolist())
+        self.assertEqual(ob.decode()[b"obmat"], values[b"obmat"].tolist())
@@ -0,0 +1,134 @@
+import json
+import pathlib
+import tempfile
+import typing
+
+from blender_asset_tracer import blendfile
+from blender_asset_tracer.blendfile import sdna_cache
+from tests.abstract_test import AbstractBlendFileTest
+
+
+class SDNACacheTest(AbstractBlendFileTest):
+    def setUp(self):
+        super().setUp()
+        sdna_cache.clear()
+
+    def tearDown(self):
+        super().tearDown()
+        sdna_cache.clear()
+        sdna_cache.set_disk_cache(None)
+
+    def _struct_layout(self, bf: blendfile.BlendFile):
+        return [
+            (
+                struct.dna_type_id,
+                struct.size,
+                [
+                    (f.name.name_full, f.dna_type.dna_type_id, f.size, f.offset)
+                    for f in struct.fields
+                ],
+            )
+            for struct in bf.structs
+        ]
+
+    def test_shared_between_files(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "basic_file.blend")
+        with blendfile.BlendFile(self.blendfiles / "with_sequencer.blend") as other:
+            self.assertIs(self.bf.structs[0], other.structs[0])
+            self.assertEqual(self.bf.sdna_index_from_id, other.sdna_index_from_id)
+
+            # The lists themselves should not be shared.
+            self.assertIsNot(self.bf.structs, other.structs)
+
+    def test_not_shared_between_blender_versions(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "basic_file.blend")
+        with blendfile.BlendFile(self.blendfiles / "linked_cube.blend") as other:
+            self.assertIsNot(self.bf.structs[0], other.structs[0])
+
+    def test_disk_cache(self):
+        blendpath = self.blendfiles / "basic_file.blend"
+        with blendfile.BlendFile(blendpath) as bf:
+            expect_layout = self._struct_layout(bf)
+
+        with tempfile.TemporaryDirectory() as tdir:
+            cache_root = pathlib.Path(tdir) / "sdna"
+            sdna_cache.set_disk_cache(cache_root)
+            sdna_cache.clear()
+
+            # This should write the catalog to disk.
+            with blendfile.BlendFile(blendpath):
+                pass
+            self.assertEqual(1, len(list(cache_root.glob("*" + sdna_cache.SUFFIX))))
+            self.assertEqual([], list(cache_root.glob("*.tmp")))
+
+            # This should load the catalog from disk.
+            sdna_cache.clear()
+            self.bf = blendfile.BlendFile(blendpath)
+            self.assertEqual(expect_layout, self._struct_layout(self.bf))
+
+            ob = self.bf.code_index[b"OB"][0]
+            self.assertEqual("OBümlaut", ob.get((b"id", b"name"), as_str=True))
+            self.assertEqual([2.0, 3.0, 5.0], ob.get(b"loc"))
+
+    def test_corrupt_disk_cache(self):
+        blendpath = self.blendfiles / "basic_file.blend"
+        with tempfile.TemporaryDirectory() as tdir:
+            cache_root = pathlib.Path(tdir)
+            sdna_cache.set_disk_cache(cache_root)
+            with blendfile.BlendFile(blendpath):
+                pass
+
+            cache_file = next(cache_root.glob("*" + sdna_cache.SUFFIX))
+            cache_file.write_bytes(b"this is not JSON")
+            sdna_cache.clear()
+
+            with self.assertLogs(sdna_cache.log, "WARNING"):
+                self.bf = blendfile.BlendFile(blendpath)
+            ob = self.bf.code_index[b"OB"][0]
+            self.assertEqual([2.0, 3.0, 5.0], ob.get(b"loc"))
+
+    def test_invalid_disk_cache(self):
+        blendpath = self.blendfiles / "basic_file.blend"
+        with tempfile.TemporaryDirectory() as tdir:
+            cache_root = pathlib.Path(tdir)
+            sdna_cache.set_disk_cache(cache_root)
+            with blendfile.BlendFile(blendpath):
+                pass
+
+            cache_file = next(cache_root.glob("*" + sdna_cache.SUFFIX))
+            payload = json.loads(cache_file.read_text())
+            payload["catalog"]["types"][0][0] = 47
+            cache_file.write_text(json.dumps(payload))
+            sdna_cache.clear()
+
+            with self.assertLogs(sdna_cache.log, "WARNING"):
+                self.bf = blendfile.BlendFile(blendpath)
+            ob = self.bf.code_index[b"OB"][0]
+            self.assertEqual([2.0, 3.0, 5.0], ob.get(b"loc"))
+
+    def test_disk_cache_eviction(self):
+        blendpaths = [
+            self.blendfiles / "basic_file.blend",
+            self.blendfiles / "linked_cube.blend",
+        ]
+        with tempfile.TemporaryDirectory() as tdir:
+            cache_root = pathlib.Path(tdir)
+            sdna_cache.set_disk_cache(cache_root)
+            cache_files = []  # type: typing.List[pathlib.Path]
+            for blendpath in blendpaths:
+                blendfile.BlendFile(blendpath).close()
+                stored = set(cache_root.glob("*" + sdna_cache.SUFFIX))
+                cache_files.append((stored - set(cache_files)).pop())
+            max_size = max(path.stat().st_size for path in cache_files)
+            for path in cache_files:
+                path.unlink()
+
+            sdna_cache.set_disk_cache(cache_root, max_size + 10)
+            for blendpath in blendpaths:
+                sdna_cache.clear()
+                blendfile.BlendFile(blendpath).close()
+
+            # Only the catalog of the most recently opened file should remain.
+            self.assertEqual(
+                [cache_files[1]], list(cache_root.glob("*" + sdna_cache.SUFFIX))
+            )
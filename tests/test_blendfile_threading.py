@@ -0,0 +1,108 @@
+import concurrent.futures
+
+from blender_asset_tracer import blendfile, trace
+from tests.abstract_test import AbstractBlendFileTest
+
+NUM_THREADS = 8
+
+
+class ThreadedReadTest(AbstractBlendFileTest):
+    def _read_all(self, bfile: blendfile.BlendFile) -> list:
+        result = []
+        for block in bfile.blocks:
+            raw = block.raw_data()
+            if block.code == b"DATA" or block.dna_type_id == b"Link":
+                result.append((block.addr_old, raw))
+                continue
+            items = [
+                (key, value)
+                for key, value in block.items_recursive()
+                if not isinstance(value, str) or value != "<ID>"
+            ]
+            result.append((block.addr_old, raw, items))
+        return result
+
+    def _read_from_threads(self, bfile: blendfile.BlendFile) -> None:
+        expect = self._read_all(bfile)
+        with concurrent.futures.ThreadPoolExecutor(NUM_THREADS) as executor:
+            futures = [
+                executor.submit(self._read_all, bfile) for _ in range(NUM_THREADS)
+            ]
+            for future in futures:
+                self.assertEqual(expect, future.result())
+
+    def _open_unmapped(self, filename: str) -> blendfile.BlendFile:
+        blendfile.BlendFile.use_mmap = False
+        try:
+            return blendfile.BlendFile(self.blendfiles / filename)
+        finally:
+            blendfile.BlendFile.use_mmap = True
+
+    def test_mmap(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "with_sequencer.blend")
+        self.assertTrue(self.bf.is_mmapped)
+        self._read_from_threads(self.bf)
+
+    def test_pread(self):
+        self.bf = self._open_unmapped("with_sequencer.blend")
+        self.assertFalse(self.bf.is_mmapped)
+        self.assertIsNotNone(self.bf._pread_file)
+        self._read_from_threads(self.bf)
+
+    def test_seek_and_read(self):
+        # Mimick a file object that cannot be used with os.pread().
+        self.bf = self._open_unmapped("with_sequencer.blend")
+        self.bf._pread_file = None
+        self._read_from_threads(self.bf)
+
+    def test_same_block_objects(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "doubly_linked.blend")
+
+        def all_blocks():
+            return list(self.bf.blocks)
+
+        with concurrent.futures.ThreadPoolExecutor(NUM_THREADS) as executor:
+            futures = [executor.submit(all_blocks) for _ in range(NUM_THREADS)]
+            results = [future.result() for future in futures]
+
+        for blocks in results[1:]:
+            self.assertEqual(len(results[0]), len(blocks))
+            for expect, actual in zip(results[0], blocks):
+                self.assertIs(expect, actual)
+
+
+class ThreadedTraceTest(AbstractBlendFileTest):
+    def _trace(self, filename: str) -> set:
+        return {
+            (
+                usage.block.bfile.filepath,
+                usage.block.addr_old,
+                usage.block_name,
+                usage.asset_path,
+            )
+            for usage in trace.deps(self.blendfiles / filename)
+        }
+
+    def test_trace_cached_file(self):
+        filename = "doubly_linked.blend"
+        self.bf = blendfile.open_cached(self.blendfiles / filename)
+        expect = self._trace(filename)
+        self.assertTrue(expect)
+
+        blendfile.BlendFile.use_mmap = False
+        try:
+            # Reopen the files, so that they are read with os.pread().
+            blendfile.close_all_cached()
+            self.bf = blendfile.open_cached(self.blendfiles / filename)
+            with concurrent.futures.ThreadPoolExecutor(NUM_THREADS) as executor:
+                futures = [
+                    executor.submit(self._trace, filename)
+                    for _ in range(NUM_THREADS * 2)
+                ]
+                for future in futures:
+                    self.assertEqual(expect, future.result())
+        finally:
+            blendfile.BlendFile.use_mmap = True
+
+        # All threads should have shared the same BlendFile.
+        self.assertIs(self.bf, blendfile.open_cached(self.blendfiles / filename))
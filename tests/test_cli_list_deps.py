@@ -0,0 +1,64 @@
+import contextlib
+import io
+import json
+from unittest import mock
+
+from blender_asset_tracer import cli
+from tests.abstract_test import AbstractBlendFileTest
+
+
+class ListDepsCLITest(AbstractBlendFileTest):
+    def _bat(self, *args) -> str:
+        """Run the bat command, returning its standard output.
+
+        The disk caches are not enabled, to keep ~/.cache untouched.
+        """
+        stdout = io.StringIO()
+        argv = ["bat", "--quiet"] + [str(arg) for arg in args]
+        with mock.patch("sys.argv", argv), mock.patch.object(
+            cli, "enable_disk_caches"
+        ), contextlib.redirect_stdout(stdout):
+            cli.cli_main()
+        return stdout.getvalue()
+
+    def test_single_file(self):
+        output = self._bat("list", self.blendfiles / "linked_cube.blend")
+        self.assertIn("basic_file.blend", output)
+
+    def test_single_missing_file(self):
+        with self.assertRaises(SystemExit) as ctx:
+            self._bat("list", self.blendfiles / "nonexistant.blend")
+        self.assertEqual(3, ctx.exception.code)
+
+    def test_batch(self):
+        output = self._bat(
+            "list",
+            "--json",
+            self.blendfiles / "linked_cube.blend",
+            self.blendfiles / "basic_file.blend",
+        )
+        report = json.loads(output)
+        self.assertEqual(
+            [
+                str(self.blendfiles / "linked_cube.blend"),
+                str(self.blendfiles / "basic_file.blend"),
+            ],
+            list(report),
+        )
+
+    def test_batch_failure_exit_status(self):
+        for fmt in ([], ["--json"]):
+            with self.subTest(fmt), self.assertRaises(SystemExit) as ctx:
+                self._bat(
+                    "list",
+                    *fmt,
+                    self.blendfiles / "linked_cube.blend",
+                    self.blendfiles / "nonexistant.blend",
+                )
+            self.assertEqual(1, ctx.exception.code)
+
+    def test_batch_directory_failure_exit_status(self):
+        # The directory contains corrupt blend files.
+        with self.assertRaises(SystemExit) as ctx:
+            self._bat("list", self.blendfiles)
+        self.assertEqual(1, ctx.exception.code)
@@ -8,8 +8,9 @@ import unittest
 from pathlib import Path, PurePosixPath
 from unittest import mock
 
-from blender_asset_tracer import blendfile, pack, bpathlib
+from blender_asset_tracer import blendfile, pack, bpathlib, trace
 from blender_asset_tracer.pack import progress
+from blender_asset_tracer.trace import depgraph
 from tests.abstract_test import AbstractBlendFileTest
 
 
@@ -185,6 +186,21 @@ class PackTest(AbstractPackTest):
         self.assertEqual(b"LILib.002", libs[1].id_name)
         self.assertEqual(b"//../material_textures.blend", libs[1][b"name"])
 
+    def test_execute_rewrite_opened_for_writing(self):
+        infile = self.blendfiles / "subdir" / "doubly_linked_up.blend"
+        bfile = blendfile.open_cached(infile, "rb+", assert_cached=False)
+
+        self._pack_with_rewrite()
+
+        # The file opened for writing should not be closed or changed.
+        self.assertIs(bfile, blendfile.open_cached(infile, "rb+"))
+        self.assertTrue(bfile.is_writable)
+        self.assertFalse(bfile.is_modified)
+
+        packed = blendfile.open_cached(self.tpath / infile.name, assert_cached=False)
+        lib_paths = {lib[b"name"] for lib in packed.code_index[b"LI"]}
+        self.assertNotIn(b"//../linked_cube.blend", lib_paths)
+
     def test_execute_rewrite(self):
         infile, _ = self._pack_with_rewrite()
 
@@ -415,6 +431,31 @@ class PackTest(AbstractPackTest):
             sorted(packer.missing_files),
         )
 
+    def test_reuse_dependency_graph(self):
+        infile = self.blendfiles / "missing_textures.blend"
+        graph = trace.dependency_graph(infile)
+
+        packer = pack.Packer(infile, self.blendfiles, self.tpath)
+        packer.graph = graph
+        with mock.patch.object(trace, "deps", side_effect=AssertionError("traced")):
+            packer.strategise()
+        self.assertIs(graph, packer.graph)
+        self.assertEqual(2, len(packer.missing_files))
+
+        # Without a graph, strategise() sets one.
+        packer = pack.Packer(infile, self.blendfiles, self.tpath)
+        packer.strategise()
+        self.assertEqual(graph.edges, packer.graph.edges)
+
+    def test_reuse_dependency_graph_without_usages(self):
+        infile = self.blendfiles / "missing_textures.blend"
+        graph = trace.dependency_graph(infile)
+
+        packer = pack.Packer(infile, self.blendfiles, self.tpath)
+        packer.graph = depgraph.DependencyGraph.from_json(graph.to_json())
+        with self.assertRaises(ValueError):
+            packer.strategise()
+
     def test_exclude_filter(self):
         # Files shouldn't be reported missing if they should be ignored.
         infile = self.blendfiles / "image_sequencer.blend"
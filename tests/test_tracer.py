@@ -1,10 +1,15 @@
 import collections
 import logging
+import multiprocessing
+import pathlib
+import shutil
 import sys
+import tempfile
 import typing
 
 from blender_asset_tracer import trace, blendfile
 from blender_asset_tracer.blendfile import dna
+from blender_asset_tracer.trace import parallel
 from tests.abstract_test import AbstractBlendFileTest
 
 # Mimicks a BlockUsage, but without having to set the block to an expected value.
@@ -541,3 +546,82 @@ class DepsTest(AbstractTracerTest):
                 pass
         finally:
             sys.setrecursionlimit(reclim)
+
+
+class ParallelDepsTest(AbstractTracerTest):
+    def assert_same_as_serial(self, relpath: str):
+        blendpath = self.blendfiles / relpath
+        serial = list(trace.deps(blendpath))
+        parallel = list(trace.deps(blendpath, jobs=2))
+
+        self.assertEqual(serial, parallel)
+        for expect, actual in zip(serial, parallel):
+            self.assertIs(expect.block, actual.block)
+            self.assertEqual(repr(expect), repr(actual))
+            self.assertIs(expect.path_full_field, actual.path_full_field)
+            self.assertIs(expect.path_dir_field, actual.path_dir_field)
+            self.assertIs(expect.path_base_field, actual.path_base_field)
+        return parallel
+
+    def test_linked(self):
+        usages = self.assert_same_as_serial("linked_cube.blend")
+        self.assertEqual(1, len(usages))
+
+    def test_doubly_linked(self):
+        usages = self.assert_same_as_serial("doubly_linked.blend")
+        self.assertIn(
+            "linked_cube.blend",
+            {usage.block.bfile.filepath.name for usage in usages},
+        )
+
+    def test_nested_libraries(self):
+        self.assert_same_as_serial("geometry-nodes-3/shot_file.blend")
+
+    def test_recursion_loop(self):
+        self.assert_same_as_serial("recursive_dependency_1.blend")
+
+    def test_progress(self):
+        class Recorder(trace.progress.Callback):
+            def __init__(self):
+                self.traced = []
+
+            def trace_blendfile(self, filename):
+                self.traced.append(filename)
+
+        blendpath = self.blendfiles / "doubly_linked.blend"
+        serial = Recorder()
+        list(trace.deps(blendpath, serial))
+        parallel = Recorder()
+        list(trace.deps(blendpath, parallel, jobs=2))
+        self.assertEqual(serial.traced, parallel.traced)
+
+    def test_spawned_workers_non_strict_pointers(self):
+        tdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tdir.cleanup)
+        tpath = pathlib.Path(tdir.name)
+        for filename in ("doubly_linked.blend", "linked_cube.blend"):
+            shutil.copy(str(self.blendfiles / filename), str(tpath / filename))
+
+        # Make the first object of the linked-in collection a dangling pointer.
+        library = tpath / "linked_cube.blend"
+        with blendfile.BlendFile(library) as bfile:
+            group = bfile.code_index[b"GR"][0]
+            item = group.get_pointer((b"gobject", b"first"))
+            offset, _ = item.abs_offset((b"ob",))
+            endian = bfile.header.endian
+            pointer_size = bfile.header.pointer_size
+        with library.open("r+b") as outfile:
+            outfile.seek(offset)
+            endian.write_pointer(outfile, pointer_size, 0xDEAD0000)
+
+        blendfile.set_strict_pointer_mode(False)
+        self.addCleanup(blendfile.set_strict_pointer_mode, True)
+        root = tpath / "doubly_linked.blend"
+        blendfile.close_all_cached()
+        serial = [repr(usage) for usage in trace.deps(root)]
+
+        # Spawned processes do not inherit the pointer mode by themselves.
+        blendfile.close_all_cached()
+        context = multiprocessing.get_context("spawn")
+        with parallel.ParallelTracer(2, mp_context=context) as tracer:
+            self.assertEqual(serial, [repr(usage) for usage in tracer.usages(root)])
@@ -0,0 +1,121 @@
+from unittest import mock
+
+from blender_asset_tracer import blendfile, trace
+from blender_asset_tracer.trace import batch, parallel, progress
+from tests.abstract_test import AbstractBlendFileTest
+
+
+class RecordingCallback(progress.Callback):
+    def __init__(self):
+        self.calls = []
+
+    def trace_blendfile(self, filename):
+        self.calls.append(("blendfile", filename.name))
+
+    def trace_root_start(self, root):
+        self.calls.append(("start", root.name))
+
+    def trace_root_done(self, root):
+        self.calls.append(("done", root.name))
+
+    def trace_root_failed(self, root, error):
+        self.calls.append(("failed", root.name))
+
+
+class BatchDepsTest(AbstractBlendFileTest):
+    @staticmethod
+    def _usages(usages) -> list:
+        return [(repr(usage), usage.bfile_path, usage.abspath) for usage in usages]
+
+    def test_same_as_deps(self):
+        roots = [
+            self.blendfiles / "doubly_linked.blend",
+            self.blendfiles / "subdir/doubly_linked_up.blend",
+            self.blendfiles / "image_sequencer.blend",
+        ]
+        results = list(batch.deps(roots))
+
+        self.assertEqual(roots, [result.root for result in results])
+        for result in results:
+            self.assertIsNone(result.error)
+            blendfile.close_all_cached()
+            expect = self._usages(trace.deps(result.root))
+            self.assertEqual(expect, self._usages(result.graph.usages))
+            self.assertEqual(result.root, result.graph.paths[result.graph.root])
+
+    def test_same_as_deps_parallel(self):
+        roots = [
+            self.blendfiles / "doubly_linked.blend",
+            self.blendfiles / "subdir/doubly_linked_up.blend",
+        ]
+        results = list(batch.deps(roots, jobs=2))
+
+        for result in results:
+            self.assertIsNone(result.error)
+            blendfile.close_all_cached()
+            expect = self._usages(trace.deps(result.root))
+            self.assertEqual(expect, self._usages(result.graph.usages))
+
+    def test_shared_library_traced_once(self):
+        roots = [
+            self.blendfiles / "doubly_linked.blend",
+            self.blendfiles / "subdir/doubly_linked_up.blend",
+        ]
+        traced = []
+        orig_trace_library = parallel.trace_library
+
+        def trace_library(lib_path, id_names):
+            traced.append(lib_path.name)
+            return orig_trace_library(lib_path, id_names)
+
+        with mock.patch.object(parallel, "trace_library", trace_library):
+            results = list(batch.deps(roots))
+
+        self.assertEqual(2, len(results))
+        self.assertEqual(1, traced.count("linked_cube.blend"), traced)
+        self.assertEqual(1, traced.count("basic_file.blend"), traced)
+
+    def test_directory(self):
+        subdir = self.blendfiles / "subdir"
+        found = batch.find_blendfiles([subdir, subdir / "doubly_linked_up.blend"])
+        self.assertEqual(sorted(subdir.rglob("*.blend")), found)
+
+        results = list(batch.deps([subdir]))
+        self.assertEqual(found, [result.root for result in results])
+
+    def test_failures_continue(self):
+        roots = [
+            self.blendfiles / "corrupt_only_magic.blend",
+            self.blendfiles / "nonexistant.blend",
+            self.blendfiles / "linked_cube.blend",
+        ]
+        cb = RecordingCallback()
+        results = list(batch.deps(roots, progress_cb=cb))
+
+        self.assertEqual(roots, [result.root for result in results])
+        self.assertIsInstance(results[0].error, Exception)
+        self.assertIsInstance(results[1].error, FileNotFoundError)
+        self.assertIsNone(results[2].error)
+        self.assertEqual(
+            [
+                self.blendfiles / "linked_cube.blend",
+                self.blendfiles / "basic_file.blend",
+            ],
+            results[2].graph.blendfiles(),
+        )
+
+        self.assertEqual(
+            [
+                ("start", "corrupt_only_magic.blend"),
+                ("blendfile", "corrupt_only_magic.blend"),
+                ("failed", "corrupt_only_magic.blend"),
+                ("start", "nonexistant.blend"),
+                ("blendfile", "nonexistant.blend"),
+                ("failed", "nonexistant.blend"),
+                ("start", "linked_cube.blend"),
+                ("blendfile", "linked_cube.blend"),
+                ("blendfile", "basic_file.blend"),
+                ("done", "linked_cube.blend"),
+            ],
+            cb.calls,
+        )
@@ -0,0 +1,120 @@
+import pathlib
+
+from blender_asset_tracer import trace
+from blender_asset_tracer.trace import depgraph
+from tests.abstract_test import AbstractBlendFileTest
+
+
+class DependencyGraphTest(AbstractBlendFileTest):
+    def test_linked_libraries(self):
+        infile = self.blendfiles / "doubly_linked.blend"
+        graph = trace.dependency_graph(infile)
+
+        self.assertEqual(0, graph.root)
+        self.assertEqual(infile, graph.paths[graph.root])
+        self.assertEqual(
+            [
+                infile,
+                self.blendfiles / "linked_cube.blend",
+                self.blendfiles / "material_textures.blend",
+                self.blendfiles / "basic_file.blend",
+            ],
+            graph.blendfiles(),
+        )
+        self.assertEqual([], graph.assets())
+
+        self.assertEqual(
+            [
+                self.blendfiles / "linked_cube.blend",
+                self.blendfiles / "material_textures.blend",
+            ],
+            graph.libraries(infile),
+        )
+        edge = graph.outgoing(graph.root)[0]
+        self.assertEqual(b"LILib", edge.block_name)
+        self.assertEqual("name[1024]", edge.field_name)
+        self.assertFalse(edge.is_sequence)
+
+        self.assertEqual(
+            {
+                self.blendfiles / "linked_cube.blend",
+                self.blendfiles / "material_textures.blend",
+                self.blendfiles / "basic_file.blend",
+            },
+            graph.reachable_blendfiles(infile),
+        )
+        self.assertEqual(
+            {self.blendfiles / "basic_file.blend"},
+            graph.reachable_blendfiles(self.blendfiles / "linked_cube.blend"),
+        )
+
+        order = graph.topological_order()
+        self.assertEqual(set(graph.blendfiles()), set(order))
+        self.assertLess(
+            order.index(self.blendfiles / "basic_file.blend"),
+            order.index(self.blendfiles / "linked_cube.blend"),
+        )
+        self.assertEqual(infile, order[-1])
+        self.assertEqual([], graph.cycles())
+
+    def test_usages(self):
+        infile = self.blendfiles / "image_sequencer.blend"
+        graph = trace.dependency_graph(infile)
+
+        self.assertEqual(list(trace.deps(infile)), graph.usages)
+        self.assertEqual(len(graph.usages), len(graph.edges))
+        for usage, edge in zip(graph.usages, graph.edges):
+            self.assertEqual(usage.abspath, graph.paths[edge.target])
+            self.assertEqual(usage.block_name, edge.block_name)
+            self.assertEqual(usage.is_sequence, edge.is_sequence)
+
+        assets = {usage.abspath for usage in graph.usages}
+        self.assertEqual(assets, set(graph.assets()))
+        self.assertEqual(assets, graph.reachable_assets(infile))
+        self.assertEqual(assets, set(graph.direct_assets(infile)))
+
+    def test_cycles(self):
+        graph = depgraph.DependencyGraph(pathlib.Path("/root.blend"))
+        lib1 = graph.node(pathlib.Path("/lib1.blend"), depgraph.BLENDFILE)
+        lib2 = graph.node(pathlib.Path("/lib2.blend"), depgraph.BLENDFILE)
+        lib3 = graph.node(pathlib.Path("/lib3.blend"), depgraph.BLENDFILE)
+        texture = graph.node(pathlib.Path("/texture.png"))
+
+        def link(source, target):
+            graph.add_edge(depgraph.Edge(source, target, b"LILib", "name", False))
+
+        link(graph.root, lib1)
+        link(lib1, lib2)
+        link(lib2, lib1)
+        link(lib2, lib3)
+        link(lib3, lib3)
+        link(lib2, texture)
+
+        root_path, lib1_path, lib2_path, lib3_path = graph.blendfiles()
+        self.assertEqual([[lib3_path], [lib1_path, lib2_path]], graph.cycles())
+        self.assertEqual(
+            [lib3_path, lib1_path, lib2_path, root_path], graph.topological_order()
+        )
+        self.assertEqual(
+            {pathlib.Path("/texture.png")}, graph.reachable_assets(lib1_path)
+        )
+        self.assertEqual(
+            {lib1_path, lib2_path, lib3_path}, graph.reachable_blendfiles(lib1_path)
+        )
+
+    def test_json(self):
+        infile = self.blendfiles / "image_sequencer.blend"
+        graph = trace.dependency_graph(infile)
+
+        loaded = depgraph.DependencyGraph.from_json(graph.to_json())
+        self.assertEqual(graph.paths, loaded.paths)
+        self.assertEqual(graph.kinds, loaded.kinds)
+        self.assertEqual(graph.edges, loaded.edges)
+        self.assertEqual(graph.root, loaded.root)
+        self.assertEqual([], loaded.usages)
+        self.assertEqual(
+            graph.reachable_assets(infile), loaded.reachable_assets(infile)
+        )
+
+        with self.assertRaises(ValueError):
+            depgraph.DependencyGraph.from_json('{"format": 0}')
@@ -34,3 +34,80 @@ class File2BlocksTest(AbstractTracerTest):
         self.assertIn(b"MAMaterial", blocks)
         self.assertIn(b"OBCube", blocks)
         self.assertIn(b"MECube", blocks)
+
+
+class BlockQueueTest(AbstractTracerTest):
+    def test_disk_order(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "basic_file.blend")
+        # REND and GLOB blocks share their address, so skip those.
+        blocks = [
+            block
+            for block in self.bf.blocks
+            if block.code not in {b"DATA", b"REND", b"GLOB"}
+        ]
+
+        to_visit = file2blocks.BlockQueue()
+        for block in reversed(blocks):
+            self.assertTrue(to_visit.put(block))
+        self.assertEqual(len(blocks), len(to_visit))
+
+        visited = []
+        while not to_visit.empty():
+            visited.append(to_visit.get())
+        self.assertEqual(sorted(blocks, key=lambda block: block.file_offset), visited)
+        self.assertRaises(IndexError, to_visit.get)
+
+    def test_dedup_on_insert(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "basic_file.blend")
+        ob = self.bf.code_index[b"OB"][0]
+        me = self.bf.code_index[b"ME"][0]
+
+        to_visit = file2blocks.BlockQueue()
+        self.assertTrue(to_visit.put(me))
+        self.assertTrue(to_visit.put(ob))
+        self.assertFalse(to_visit.put(me))
+        self.assertEqual(2, len(to_visit))
+
+        first = to_visit.get()
+        self.assertLess(first.file_offset, to_visit.get().file_offset)
+        self.assertTrue(to_visit.empty())
+
+        # Blocks can be queued again after they were taken from the queue.
+        self.assertTrue(to_visit.put(me))
+        self.assertEqual(me, to_visit.get())
+
+    def test_shared_address(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "basic_file.blend")
+        rend = self.bf.code_index[b"REND"][0]
+        glob = self.bf.code_index[b"GLOB"][0]
+        ob = self.bf.code_index[b"OB"][0]
+        self.assertEqual(rend.addr_old, glob.addr_old)
+        first, last = sorted([rend, glob], key=lambda block: block.file_offset)
+
+        # The block with the lowest file offset wins, whichever is queued first.
+        for blocks in ([first, last], [last, first]):
+            to_visit = file2blocks.BlockQueue()
+            to_visit.put(ob)
+            self.assertTrue(to_visit.put(blocks[0]))
+            self.assertEqual(blocks[0] is last, to_visit.put(blocks[1]))
+            self.assertEqual(2, len(to_visit))
+
+            visited = [to_visit.get(), to_visit.get()]
+            self.assertIn(first, visited)
+            self.assertNotIn(last, visited)
+            self.assertTrue(to_visit.empty())
+            self.assertRaises(IndexError, to_visit.get)
+
+    def test_multiple_files(self):
+        self.bf = blendfile.BlendFile(self.blendfiles / "linked_cube.blend")
+        other = blendfile.BlendFile(self.blendfiles / "basic_file.blend")
+        self.addCleanup(other.close)
+        sc_other = other.code_index[b"SC"][0]
+        sc_linked = self.bf.code_index[b"SC"][0]
+
+        to_visit = file2blocks.BlockQueue()
+        to_visit.put(sc_other)
+        to_visit.put(sc_linked)
+        # Blend files are visited in the order in which they were first queued.
+        self.assertEqual(sc_other, to_visit.get())
+        self.assertEqual(sc_linked, to_visit.get())
@@ -0,0 +1,257 @@
+import argparse
+import json
+import os
+import pathlib
+import pickle
+import tempfile
+from unittest import mock
+
+from blender_asset_tracer import blendfile, bpathlib, cli, pack, trace
+from blender_asset_tracer.blendfile import block_index, sdna_cache
+from blender_asset_tracer.trace import library_cache
+from tests.abstract_test import AbstractBlendFileTest
+
+
+class LibraryCacheTest(AbstractBlendFileTest):
+    def setUp(self):
+        super().setUp()
+        self.tdir = tempfile.TemporaryDirectory()
+        self.tpath = pathlib.Path(self.tdir.name)
+        filenames = ("doubly_linked.blend", "linked_cube.blend", "basic_file.blend")
+        for filename in filenames:
+            path = self.tpath / filename
+            path.write_bytes((self.blendfiles / filename).read_bytes())
+        self.root = self.tpath / "doubly_linked.blend"
+        self.cache_root = self.tpath / "trace-results"
+
+    def tearDown(self):
+        super().tearDown()
+        library_cache.set_disk_cache(None)
+        self.tdir.cleanup()
+
+    def _deps(self) -> list:
+        blendfile.close_all_cached()
+        return [
+            (repr(usage), usage.bfile_path, usage.abspath)
+            for usage in trace.deps(self.root)
+        ]
+
+    def _results(self) -> list:
+        return sorted(self.cache_root.glob("*" + library_cache.SUFFIX))
+
+    def _trace_root(self) -> None:
+        for usage in trace.deps(self.root):
+            usage.bfile_path, usage.abspath, repr(usage)
+
+    def _opened_files(self, func=None) -> list:
+        """Call func, returning the names of the opened blend files.
+
+        :param func: defaults to tracing the root file.
+        """
+        opened = []
+        orig_init = blendfile.BlendFile.__init__
+
+        def init(bfile, path, *args, **kwargs):
+            opened.append(path.name)
+            orig_init(bfile, path, *args, **kwargs)
+
+        blendfile.close_all_cached()
+        with mock.patch.object(blendfile.BlendFile, "__init__", init):
+            (func or self._trace_root)()
+        return opened
+
+    def test_same_as_uncached(self):
+        expect = self._deps()
+        self.assertIn("linked_cube.blend", {bpath.name for _, bpath, _ in expect})
+
+        library_cache.set_disk_cache(self.cache_root)
+        self.assertEqual(expect, self._deps())
+        self.assertEqual(2, len(self._results()))
+        self.assertEqual(expect, self._deps())
+
+    def test_hit_skips_library(self):
+        library_cache.set_disk_cache(self.cache_root)
+        self.assertEqual(
+            ["doubly_linked.blend", "linked_cube.blend", "basic_file.blend"],
+            self._opened_files(),
+        )
+        self.assertEqual(["doubly_linked.blend"], self._opened_files())
+
+    def test_block_opens_library(self):
+        library_cache.set_disk_cache(self.cache_root)
+        self._deps()
+
+        blendfile.close_all_cached()
+        usages = [
+            usage
+            for usage in trace.deps(self.root)
+            if usage.bfile_path.name == "linked_cube.blend"
+        ]
+        self.assertEqual(1, len(usages))
+        block = usages[0].block
+        self.assertEqual(b"LI", block.code)
+        linked_cube = blendfile.open_cached(self.tpath / "linked_cube.blend")
+        self.assertIs(linked_cube, block.bfile)
+        field_name = usages[0].path_full_field.name.name_only
+        self.assertEqual(b"//basic_file.blend", block.get(field_name))
+
+    def test_changed_library(self):
+        library_cache.set_disk_cache(self.cache_root)
+        self._opened_files()
+
+        linked_cube = self.tpath / "linked_cube.blend"
+        stat = linked_cube.stat()
+        os.utime(str(linked_cube), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(
+            ["doubly_linked.blend", "linked_cube.blend"], self._opened_files()
+        )
+
+    def test_changed_nested_library(self):
+        library_cache.set_disk_cache(self.cache_root)
+        self._opened_files()
+
+        # linked_cube.blend itself is unchanged, but links to basic_file.blend.
+        basic_file = self.tpath / "basic_file.blend"
+        stat = basic_file.stat()
+        os.utime(str(basic_file), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(
+            ["doubly_linked.blend", "linked_cube.blend", "basic_file.blend"],
+            self._opened_files(),
+        )
+
+    def test_other_bat_version(self):
+        library_cache.set_disk_cache(self.cache_root)
+        self._opened_files()
+
+        with mock.patch.object(library_cache, "__version__", "0.1"):
+            self.assertEqual(
+                ["doubly_linked.blend", "linked_cube.blend", "basic_file.blend"],
+                self._opened_files(),
+            )
+
+    def test_other_pointer_mode(self):
+        library_cache.set_disk_cache(self.cache_root)
+        self._opened_files()
+
+        blendfile.set_strict_pointer_mode(False)
+        self.addCleanup(blendfile.set_strict_pointer_mode, True)
+        self.assertEqual(
+            ["doubly_linked.blend", "linked_cube.blend", "basic_file.blend"],
+            self._opened_files(),
+        )
+        self.assertEqual(["doubly_linked.blend"], self._opened_files())
+        self.assertEqual(4, len(self._results()))
+
+    def test_other_expander(self):
+        library_cache.set_disk_cache(self.cache_root)
+        self._opened_files()
+
+        def expand_group(block):
+            yield from ()
+
+        with mock.patch.dict(
+            trace.expanders._funcs_for_code, {b"GR": expand_group}
+        ):
+            self.assertEqual(
+                ["doubly_linked.blend", "linked_cube.blend"], self._opened_files()
+            )
+
+    def test_cli_opt_in(self):
+        def enable_disk_caches(*options) -> bool:
+            args = argparse.Namespace(
+                no_block_index=True,
+                clear_block_index=False,
+                trace_cache=False,
+                clear_trace_cache=False,
+                decompressed_cache=False,
+            )
+            for option in options:
+                setattr(args, option, True)
+            with mock.patch.object(library_cache, "CACHE_ROOT", self.cache_root):
+                cli.enable_disk_caches(args)
+            return library_cache.is_enabled()
+
+        self.addCleanup(sdna_cache.set_disk_cache, None)
+        self.addCleanup(block_index.set_disk_cache, None)
+        with mock.patch.object(sdna_cache, "CACHE_ROOT", self.tpath / "sdna"):
+            self.assertFalse(enable_disk_caches())
+            self.assertTrue(enable_disk_caches("trace_cache"))
+
+    def test_clear(self):
+        library_cache.set_disk_cache(self.cache_root)
+        self._opened_files()
+        library_cache.clear()
+        self.assertEqual([], self._results())
+
+    def test_corrupt_result(self):
+        library_cache.set_disk_cache(self.cache_root)
+        self._opened_files()
+
+        for path in self._results():
+            path.write_bytes(b"this is not JSON")
+        with self.assertLogs(library_cache.log, "WARNING"):
+            self.assertEqual(
+                ["doubly_linked.blend", "linked_cube.blend", "basic_file.blend"],
+                self._opened_files(),
+            )
+        self.assertEqual(["doubly_linked.blend"], self._opened_files())
+
+    def test_invalid_result(self):
+        library_cache.set_disk_cache(self.cache_root)
+        self._opened_files()
+
+        for path in self._results():
+            payload = json.loads(path.read_text())
+            payload["id_names"] = [47]
+            path.write_text(json.dumps(payload))
+        with self.assertLogs(library_cache.log, "WARNING"):
+            self.assertEqual(
+                ["doubly_linked.blend", "linked_cube.blend", "basic_file.blend"],
+                self._opened_files(),
+            )
+
+    def test_old_pickle_removed(self):
+        library_cache.set_disk_cache(self.cache_root)
+        old_result = self.cache_root / "0123456789abcdef.traceresult"
+        self.cache_root.mkdir()
+        old_result.write_bytes(pickle.dumps((1, "1.15", None, [], None, [])))
+
+        self._opened_files()
+        self.assertFalse(old_result.exists())
+        self.assertEqual(2, len(self._results()))
+
+    def test_pack_without_rewrites(self):
+        library_cache.set_disk_cache(self.cache_root)
+        self._opened_files()
+
+        packer = pack.Packer(self.root, self.tpath, self.tpath / "packed")
+        self.assertEqual(["doubly_linked.blend"], self._opened_files(packer.strategise))
+        self.assertEqual({}, {p: a for p, a in packer._actions.items() if a.rewrites})
+
+    def test_pack_with_rewrites(self):
+        subdir = self.tpath / "subdir"
+        subdir.mkdir()
+        self.root = subdir / "doubly_linked_up.blend"
+        self.root.write_bytes(
+            (self.blendfiles / "subdir/doubly_linked_up.blend").read_bytes()
+        )
+        library_cache.set_disk_cache(self.cache_root)
+        self._opened_files()
+
+        # Only the blend files whose paths are rewritten are opened.
+        packer = pack.Packer(self.root, subdir, self.tpath / "packed")
+        self.assertEqual(
+            ["doubly_linked_up.blend"], self._opened_files(packer.strategise)
+        )
+        self.assertEqual(
+            ["doubly_linked_up.blend", "linked_cube.blend"],
+            sorted(self._opened_files(packer.execute)),
+        )
+        packer.close()
+
+        packed = blendfile.open_cached(self.tpath / "packed/doubly_linked_up.blend")
+        lib_paths = {lib[b"name"] for lib in packed.code_index[b"LI"]}
+        linked_cube = bpathlib.strip_root(self.tpath / "linked_cube.blend")
+        self.assertIn(
+            b"//_outside_project/" + linked_cube.as_posix().encode(), lib_paths
+        )